@@ -48,6 +48,13 @@ class ComplianceAssessmentRequest(BaseModel):
         default=None,
         description="System containing the indexed regulation corpus to compare against.",
     )
+    regulation_systems: list[str] | None = Field(
+        default=None,
+        description=(
+            "Optional list of regulation pools searched together; the first one "
+            "is used when regulation_system is not set."
+        ),
+    )
     framework: str | None = Field(
         default=None,
         description="Optional framework, jurisdiction, or quality system label.",
@@ -105,6 +112,7 @@ def _build_assessment_record(
     *,
     assessment_id: str,
     regulation_system: str,
+    regulation_systems: list[str],
     payload: ComplianceAssessmentRequest,
     resolved_document_path: str | None,
     document_text: str,
@@ -121,6 +129,7 @@ def _build_assessment_record(
         "assessment_status": infer_assessment_status(answer_text),
         "system_id": regulation_system,
         "regulation_system": regulation_system,
+        "regulation_systems": regulation_systems,
         "trace_id": response.get("trace_id"),
         "review_id": response.get("review_id"),
         "user_id": user_id,
@@ -177,7 +186,13 @@ def assess_document(
             document_text=payload.document_text,
             document_path=payload.document_path,
         )
-        regulation_system = resolve_regulation_system(payload.regulation_system)
+        pools = [str(name).strip() for name in payload.regulation_systems or []]
+        regulation_system = resolve_regulation_system(
+            payload.regulation_system or next((p for p in pools if p), None)
+        )
+        regulation_systems = list(
+            dict.fromkeys([regulation_system, *filter(None, pools)])
+        )
         compliance_question = build_compliance_question(
             document_name=payload.document_name,
             document_text=document_text,
@@ -192,6 +207,7 @@ def assess_document(
             regulation_system,
             compliance_question,
             runtime_selection=runtime_selection,
+            systems=regulation_systems,
         )
         response = build_controlled_response(
             system_id=regulation_system,
@@ -209,6 +225,7 @@ def assess_document(
                 "assessment_id": assessment_id,
                 "document_name": payload.document_name,
                 "regulation_system": regulation_system,
+                "regulation_systems": regulation_systems,
                 "framework": payload.framework,
                 "focus": payload.focus,
             },
@@ -227,6 +244,7 @@ def assess_document(
         assessment = _build_assessment_record(
             assessment_id=assessment_id,
             regulation_system=regulation_system,
+            regulation_systems=regulation_systems,
             payload=payload,
             resolved_document_path=resolved_document_path,
             document_text=document_text,
@@ -19,6 +19,7 @@ except ImportError:  # pragma: no cover - optional runtime dependency
     torch = None  # type: ignore[assignment]
 
 from rag_llm_api_pipeline.core import audit
+from rag_llm_api_pipeline.core.controlled import get_query_coalescing_status
 from rag_llm_api_pipeline.core.feedback import record_quality_feedback
 from rag_llm_api_pipeline.core.hitl import utc_now_iso
 from rag_llm_api_pipeline.core.index_admin import get_index_status, list_index_statuses
@@ -40,6 +41,7 @@ from rag_llm_api_pipeline.core.query_worker import (
     get_query_worker_status,
     reset_query_worker,
 )
+from rag_llm_api_pipeline.core.record_writer import get_record_writer_status
 from rag_llm_api_pipeline.core.security import validate_api_key_header
 from rag_llm_api_pipeline.core.system_assets import list_regulation_pools
 from rag_llm_api_pipeline.core.system_metadata import get_system_metadata
@@ -233,6 +235,8 @@ def _runtime_summary() -> dict[str, Any]:
         "hint": hint,
         "query_worker": query_worker,
         "index_worker": get_index_worker_status(),
+        "record_writer": get_record_writer_status(),
+        "query_coalescing": get_query_coalescing_status(),
         "recent_logs": recent_logs,
     }
 
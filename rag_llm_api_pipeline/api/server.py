@@ -19,6 +19,7 @@ from rag_llm_api_pipeline.core.controlled import (
     build_controlled_response,
     execute_query_with_runtime,
 )
+from rag_llm_api_pipeline.core.record_writer import shutdown_record_writer
 from rag_llm_api_pipeline.core.security import get_user_id
 from rag_llm_api_pipeline.db import compliance_store, metadata_store, review_store
 from rag_llm_api_pipeline.ui.ui_routes import root_router, router as ui_router
@@ -175,6 +176,23 @@ class QueryRequest(BaseModel):
         default=None,
         description="Optional Hugging Face embedding model key or identifier.",
     )
+    filters: dict[str, Any] | None = Field(
+        default=None,
+        description=(
+            "Optional chunk metadata filter over file, page, doc_type, "
+            "revision_date and pool. A value, a list (any of) or operators "
+            "(eq, ne, in, gt, gte, lt, lte); all fields must match."
+        ),
+        examples=[{"doc_type": "manual", "revision_date": {"gte": "2024-01-01"}}],
+    )
+    systems: list[str] | None = Field(
+        default=None,
+        description=(
+            "Optional additional systems or regulation pools searched together "
+            "with `system`; results are merged and tagged with `source_system`."
+        ),
+        examples=[["RegulationPool"]],
+    )
 
 
 class ControlledAgentQueryRequest(BaseModel):
@@ -209,6 +227,23 @@ class ControlledAgentQueryRequest(BaseModel):
         default=None,
         description="Optional embedding model override for this query.",
     )
+    filters: dict[str, Any] | None = Field(
+        default=None,
+        description=(
+            "Optional chunk metadata filter over file, page, doc_type, "
+            "revision_date and pool. A value, a list (any of) or operators "
+            "(eq, ne, in, gt, gte, lt, lte); all fields must match."
+        ),
+        examples=[{"doc_type": "manual", "revision_date": {"gte": "2024-01-01"}}],
+    )
+    systems: list[str] | None = Field(
+        default=None,
+        description=(
+            "Optional additional systems or regulation pools searched together "
+            "with `system`; results are merged and tagged with `source_system`."
+        ),
+        examples=[["RegulationPool"]],
+    )
 
 
 def create_app() -> FastAPI:
@@ -237,6 +272,10 @@ def create_app() -> FastAPI:
     app.include_router(root_router)
     _wire_orchestrator(app)
 
+    @app.on_event("shutdown")
+    def _drain_record_writer() -> None:
+        shutdown_record_writer()
+
     @app.get("/health", tags=["Health"])
     def health() -> dict[str, str]:
         logger.info("Health check called")
@@ -268,6 +307,8 @@ def create_app() -> FastAPI:
                 payload.system,
                 payload.question,
                 runtime_selection=runtime_selection,
+                filters=payload.filters,
+                systems=payload.systems,
             )
             return build_controlled_response(
                 system_id=payload.system,
@@ -313,6 +354,8 @@ def create_app() -> FastAPI:
                 payload.system,
                 payload.question,
                 runtime_selection=runtime_selection,
+                filters=payload.filters,
+                systems=payload.systems,
             )
             return build_controlled_response(
                 system_id=payload.system,
@@ -0,0 +1,275 @@
+"""
+Columnar per-chunk metadata and metadata filters.
+
+String fields are dictionary-encoded (one code array per field, one list of
+distinct values); pages are a plain integer column with 0 for "no page".
+Filters are evaluated into boolean masks per field value, cached, and turned
+into FAISS ``IDSelectorBitmap`` selectors so filtered search runs inside the
+index instead of over-fetching and post-filtering.
+
+A chunk that stands for several near-duplicates (see ``dedup``) has one
+extra row per merged chunk after the chunk rows; ``owners`` maps each extra
+row to its chunk, and a chunk matches a filter when any of its rows does.
+"""
+
+from __future__ import annotations
+
+import datetime as dt
+import json
+import os
+import threading
+from array import array
+from collections import OrderedDict
+from typing import Any, Iterable
+
+import numpy as np
+
+CATEGORICAL_FIELDS = ("file", "doc_type", "revision_date", "pool")
+FILTER_FIELDS = (*CATEGORICAL_FIELDS, "page")
+_RANGE_OPS = ("gt", "gte", "lt", "lte")
+_MAX_CACHED_FILTERS = 256
+
+DOC_TYPES_BY_EXT = {
+    ".pdf": "pdf",
+    ".txt": "text",
+    ".md": "text",
+    ".png": "image",
+    ".jpg": "image",
+    ".jpeg": "image",
+    ".wav": "audio",
+    ".mp3": "audio",
+    ".mp4": "video",
+}
+
+
+class FilterError(ValueError):
+    pass
+
+
+def chunk_rows(
+    file: str,
+    path: str,
+    count: int,
+    *,
+    pool: str,
+    overrides: dict[str, Any] | None = None,
+) -> list[dict[str, Any]]:
+    """Metadata rows for the ``count`` chunks parsed from one document.
+
+    PDF chunks are pages, so they get page numbers. The doc type defaults to the
+    extension family, and the revision date defaults to the file's mtime.
+    ``overrides`` come from the asset's ``doc_metadata`` entry for the file."""
+    overrides = overrides or {}
+    ext = os.path.splitext(file)[-1].lower()
+    revision_date = overrides.get("revision_date")
+    if not revision_date:
+        try:
+            revision_date = dt.date.fromtimestamp(os.path.getmtime(path)).isoformat()
+        except OSError:
+            revision_date = ""
+    base = {
+        "file": file,
+        "doc_type": str(
+            overrides.get("doc_type")
+            or DOC_TYPES_BY_EXT.get(ext)
+            or ext.lstrip(".")
+            or "unknown"
+        ),
+        "revision_date": str(revision_date),
+        "pool": pool,
+    }
+    paged = ext == ".pdf"
+    return [{**base, "page": i + 1 if paged else 0} for i in range(count)]
+
+
+class ChunkColumns:
+    __slots__ = (
+        "size",
+        "values",
+        "codes",
+        "pages",
+        "owners",
+        "_lock",
+        "_masks",
+        "_selectors",
+    )
+
+    def __init__(self) -> None:
+        self.size = 0
+        self.values: dict[str, list[str]] = {f: [] for f in CATEGORICAL_FIELDS}
+        self.codes: dict[str, array] = {f: array("I") for f in CATEGORICAL_FIELDS}
+        self.pages = array("I")
+        self.owners = array("I")  # chunk of each row past ``size``
+        self._init_caches()
+
+    @property
+    def _rows(self) -> int:
+        return self.size + len(self.owners)
+
+    def _init_caches(self) -> None:
+        self._lock = threading.Lock()
+        self._masks: dict[tuple[str, str], np.ndarray] = {}
+        self._selectors: OrderedDict[str, tuple[np.ndarray, Any, Any]] = OrderedDict()
+
+    def __getstate__(self):
+        return {
+            "size": self.size,
+            "values": self.values,
+            "codes": self.codes,
+            "pages": self.pages,
+            "owners": self.owners,
+        }
+
+    def __setstate__(self, state) -> None:
+        self.size = state["size"]
+        self.values = state["values"]
+        self.codes = state["codes"]
+        self.pages = state["pages"]
+        self.owners = state.get("owners", array("I"))
+        self._init_caches()
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[dict[str, Any]]) -> "ChunkColumns":
+        columns = cls()
+        lookup: dict[str, dict[str, int]] = {f: {} for f in CATEGORICAL_FIELDS}
+        merged: list[tuple[int, dict[str, Any]]] = []
+
+        def _append(row: dict[str, Any]) -> None:
+            for field in CATEGORICAL_FIELDS:
+                value = str(row.get(field) or "")
+                code = lookup[field].get(value)
+                if code is None:
+                    code = lookup[field][value] = len(columns.values[field])
+                    columns.values[field].append(value)
+                columns.codes[field].append(code)
+            columns.pages.append(int(row.get("page") or 0))
+
+        for row in rows:
+            merged.extend((columns.size, member) for member in row.get("merged") or ())
+            _append(row)
+            columns.size += 1
+        for owner, member in merged:
+            _append(member)
+            columns.owners.append(owner)
+        return columns
+
+    def row(self, i: int) -> dict[str, Any]:
+        out: dict[str, Any] = {}
+        for field in CATEGORICAL_FIELDS:
+            value = self.values[field][self.codes[field][i]]
+            if value:
+                out[field] = value
+        if self.pages[i]:
+            out["page"] = self.pages[i]
+        return out
+
+    # ---- filters -----------------------------------------------------------
+    def _value_mask(self, field: str, value: str) -> np.ndarray:
+        # One precomputed bitmap per (field, value), built on first use.
+        key = (field, value)
+        mask = self._masks.get(key)
+        if mask is None:
+            codes = np.frombuffer(self.codes[field], dtype=np.uint32)
+            try:
+                code = self.values[field].index(value)
+            except ValueError:
+                mask = np.zeros(self._rows, dtype=bool)
+            else:
+                mask = codes == code
+            self._masks[key] = mask
+        return mask
+
+    def _field_mask(self, field: str, condition: Any) -> np.ndarray:
+        if field not in FILTER_FIELDS:
+            raise FilterError(
+                f"Unknown filter field '{field}'; expected one of "
+                f"{', '.join(FILTER_FIELDS)}."
+            )
+        if isinstance(condition, dict):
+            ops = dict(condition)
+            mask = np.ones(self._rows, dtype=bool)
+            if "in" in ops:
+                mask &= self._field_mask(field, list(ops.pop("in")))
+            if "eq" in ops:
+                mask &= self._field_mask(field, ops.pop("eq"))
+            if "ne" in ops:
+                mask &= ~self._field_mask(field, ops.pop("ne"))
+            bounds = {op: ops.pop(op) for op in _RANGE_OPS if op in ops}
+            if ops:
+                raise FilterError(f"Unknown operators for '{field}': {sorted(ops)}")
+            if bounds:
+                mask &= self._range_mask(field, bounds)
+            return mask
+        if isinstance(condition, (list, tuple, set)):
+            mask = np.zeros(self._rows, dtype=bool)
+            for value in condition:
+                mask |= self._field_mask(field, value)
+            return mask
+        if field == "page":
+            return np.frombuffer(self.pages, dtype=np.uint32) == int(condition)
+        return self._value_mask(field, str(condition))
+
+    def _range_mask(self, field: str, bounds: dict[str, Any]) -> np.ndarray:
+        def _inside(value) -> bool:
+            return (
+                ("gt" not in bounds or value > bounds["gt"])
+                and ("gte" not in bounds or value >= bounds["gte"])
+                and ("lt" not in bounds or value < bounds["lt"])
+                and ("lte" not in bounds or value <= bounds["lte"])
+            )
+
+        if field == "page":
+            bounds = {op: int(v) for op, v in bounds.items()}
+            pages = np.frombuffer(self.pages, dtype=np.uint32).astype(np.int64)
+            mask = pages > 0
+            for op, bound in bounds.items():
+                mask &= {
+                    "gt": pages > bound,
+                    "gte": pages >= bound,
+                    "lt": pages < bound,
+                    "lte": pages <= bound,
+                }[op]
+            return mask
+        # Categorical ranges (ISO dates compare as strings) are a union of the
+        # matching values' bitmaps.
+        bounds = {op: str(v) for op, v in bounds.items()}
+        return self._field_mask(
+            field, [v for v in self.values[field] if v and _inside(v)]
+        )
+
+    def mask(self, filters: dict[str, Any] | None) -> np.ndarray | None:
+        """Boolean mask of the chunks matching every field condition."""
+        if not filters:
+            return None
+        mask = np.ones(self._rows, dtype=bool)
+        with self._lock:
+            for field, condition in filters.items():
+                mask &= self._field_mask(field, condition)
+        if not len(self.owners):
+            return mask
+        chunks = mask[: self.size].copy()
+        np.logical_or.at(
+            chunks, np.frombuffer(self.owners, dtype=np.uint32), mask[self.size :]
+        )
+        return chunks
+
+    def selector(self, filters: dict[str, Any] | None, faiss: Any):
+        """``(mask, IDSelectorBitmap)`` for a filter, cached per expression."""
+        if not filters:
+            return None, None
+        key = json.dumps(filters, sort_keys=True, default=str)
+        with self._lock:
+            cached = self._selectors.get(key)
+            if cached is not None:
+                self._selectors.move_to_end(key)
+                return cached[0], cached[2]
+        mask = self.mask(filters)
+        assert mask is not None
+        bits = np.packbits(mask, bitorder="little")
+        # The selector only holds a pointer; ``bits`` is kept alongside it.
+        selector = faiss.IDSelectorBitmap(self.size, faiss.swig_ptr(bits))
+        with self._lock:
+            self._selectors[key] = (mask, bits, selector)
+            while len(self._selectors) > _MAX_CACHED_FILTERS:
+                self._selectors.popitem(last=False)
+        return mask, selector
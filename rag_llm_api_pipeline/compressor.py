@@ -0,0 +1,159 @@
+"""
+Extractive context compression.
+
+Retrieved chunks are split into sentences, each sentence is scored by
+embedding similarity to the question, and the best sentences are kept, in
+their original order, until the token budget is spent.
+"""
+
+from __future__ import annotations
+
+import math
+import re
+import time
+from typing import Any, Sequence
+
+from rag_llm_api_pipeline.config_loader import load_cached_config
+
+_SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?;])\s+|\n+")
+CHARS_PER_TOKEN = 4  # rough estimate; the generator re-tokenizes anyway
+
+
+def get_compression_settings(config: dict[str, Any] | None = None) -> dict[str, Any]:
+    config = config if config is not None else load_cached_config()
+    raw = ((config or {}).get("retriever", {}) or {}).get("compression", {}) or {}
+    return {
+        "enabled": bool(raw.get("enabled", False)),
+        "budget_tokens": int(raw.get("budget_tokens", 1024)),
+        "min_sentence_chars": int(raw.get("min_sentence_chars", 20)),
+    }
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def split_sentences(text: str, min_chars: int = 20) -> list[str]:
+    """Split on sentence punctuation and line breaks, merging short fragments
+    (headings, list markers) into the following sentence."""
+    out: list[str] = []
+    carry = ""
+    for part in _SENTENCE_BOUNDARY.split(text or ""):
+        part = part.strip()
+        if not part:
+            continue
+        part = f"{carry} {part}".strip() if carry else part
+        if len(part) < min_chars:
+            carry = part
+            continue
+        out.append(part)
+        carry = ""
+    if carry:
+        out.append(carry)
+    return out
+
+
+def _cosine(a: Sequence[float], b: Sequence[float]) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+
+def select_sentences(
+    question_vector: Sequence[float],
+    sentence_vectors: Sequence[Sequence[float]],
+    sentences: Sequence[str],
+    budget_tokens: int,
+) -> list[int]:
+    """Indices of the highest-scoring sentences that fit the budget, in order."""
+    scores = [_cosine(question_vector, vec) for vec in sentence_vectors]
+    kept: list[int] = []
+    used = 0
+    for i in sorted(range(len(sentences)), key=lambda i: scores[i], reverse=True):
+        cost = estimate_tokens(sentences[i])
+        if used + cost > budget_tokens:
+            continue
+        kept.append(i)
+        used += cost
+    return sorted(kept)
+
+
+def chunk_sentences(
+    chunks: Sequence[str], min_sentence_chars: int = 20
+) -> tuple[list[int], list[str]]:
+    """Flatten chunks to sentences, returning each sentence's chunk index."""
+    owners: list[int] = []
+    sentences: list[str] = []
+    for c, chunk in enumerate(chunks):
+        for sentence in split_sentences(chunk, min_sentence_chars):
+            owners.append(c)
+            sentences.append(sentence)
+    return owners, sentences
+
+
+def compress_sentences(
+    chunks: Sequence[str],
+    sentence_vectors: Sequence[Sequence[float]],
+    question_vector: Sequence[float],
+    *,
+    budget_tokens: int,
+    min_sentence_chars: int = 20,
+) -> tuple[list[str], list[int], dict[str, Any]]:
+    """Compress ``chunks`` given vectors for the output of ``chunk_sentences``.
+
+    Chunks left with no sentence are dropped; the second value holds the
+    input index of every chunk that survived."""
+    owners, sentences = chunk_sentences(chunks, min_sentence_chars)
+    kept = select_sentences(question_vector, sentence_vectors, sentences, budget_tokens)
+    by_chunk: dict[int, list[str]] = {}
+    for i in kept:
+        by_chunk.setdefault(owners[i], []).append(sentences[i])
+    survivors = sorted(by_chunk)
+    compressed = [" ".join(by_chunk[c]) for c in survivors]
+
+    original_tokens = sum(estimate_tokens(chunk) for chunk in chunks)
+    compressed_tokens = sum(estimate_tokens(chunk) for chunk in compressed)
+    return (
+        compressed,
+        survivors,
+        {
+            "budget_tokens": budget_tokens,
+            "original_tokens": original_tokens,
+            "compressed_tokens": compressed_tokens,
+            "compression_ratio": round(compressed_tokens / original_tokens, 4)
+            if original_tokens
+            else 1.0,
+            "sentences_kept": len(kept),
+            "sentences_total": len(sentences),
+        },
+    )
+
+
+def compress_chunks(
+    question: str,
+    chunks: Sequence[str],
+    *,
+    budget_tokens: int | None = None,
+    model_selection: dict[str, Any] | None = None,
+) -> tuple[list[str], list[int], dict[str, Any]]:
+    """Embed the question and every sentence in one batched call with the
+    runtime's (already loaded) embedder, then keep the best within budget."""
+    from rag_llm_api_pipeline.retriever import embed_texts
+
+    settings = get_compression_settings()
+    budget = budget_tokens or settings["budget_tokens"]
+    started_at = time.perf_counter()
+    _, sentences = chunk_sentences(chunks, settings["min_sentence_chars"])
+    if not sentences:
+        return list(chunks), list(range(len(chunks))), {"compression_ratio": 1.0}
+    vectors = embed_texts([question, *sentences], model_selection=model_selection)
+    rows = [[float(v) for v in row] for row in vectors]
+    compressed, survivors, stats = compress_sentences(
+        chunks,
+        rows[1:],
+        rows[0],
+        budget_tokens=budget,
+        min_sentence_chars=settings["min_sentence_chars"],
+    )
+    stats["compress_sec"] = round(time.perf_counter() - started_at, 4)
+    return compressed, survivors, stats
@@ -15,6 +15,9 @@ DEFAULTS_DIR = PACKAGE_ROOT / "defaults"
 DEFAULT_CONFIG_PATH = DEFAULTS_DIR / "system.yaml"
 DEFAULT_SAMPLE_MANUAL_PATH = DEFAULTS_DIR / "sample.txt"
 
+ConfigGeneration = tuple[str, int, int]
+_cached_config: tuple[ConfigGeneration, dict[str, Any]] | None = None
+
 
 def _runtime_home_candidates() -> list[Path]:
     override = os.getenv(HOME_ENV_VAR)
@@ -128,6 +131,8 @@ def _normalize_runtime_paths(cfg: dict[str, Any], config_path: str) -> dict[str,
     _resolve("settings", "data_dir")
     _resolve("settings", "index_dir")
     _resolve("retriever", "index_dir")
+    _resolve("retriever", "embedding_cache_dir")
+    _resolve("loader", "parse_cache_dir")
     _resolve("review_store", "sqlite_path")
     _resolve("audit", "log_path")
     _resolve("feedback", "corrections_path")
@@ -150,3 +155,29 @@ def load_config() -> dict[str, Any]:
     config_path = get_config_path()
     cfg = load_raw_config(config_path)
     return _normalize_runtime_paths(cfg, config_path)
+
+
+def get_config_generation(config_path: str | Path | None = None) -> ConfigGeneration:
+    """Identify the current config file revision by path, mtime and size."""
+    resolved = str(Path(config_path or get_config_path()).expanduser().resolve())
+    try:
+        stat = os.stat(resolved)
+    except OSError:
+        return (resolved, 0, 0)
+    return (resolved, stat.st_mtime_ns, stat.st_size)
+
+
+def load_cached_config() -> dict[str, Any]:
+    """Return the parsed config, re-reading the file only when it changes.
+
+    The returned dict is shared between callers and must not be mutated; use
+    `load_config` when a private copy is needed.
+    """
+    global _cached_config
+    generation = get_config_generation()
+    cached = _cached_config
+    if cached is not None and cached[0] == generation:
+        return cached[1]
+    cfg = _normalize_runtime_paths(load_raw_config(generation[0]), generation[0])
+    _cached_config = (generation, cfg)
+    return cfg
@@ -2,63 +2,631 @@ from __future__ import annotations
 
 import json
 import os
-from typing import Any
+import threading
+from collections import deque
+from datetime import datetime, timedelta
+from itertools import groupby
+from typing import IO, Any, Iterable, Iterator
 
-from rag_llm_api_pipeline.config_loader import load_config
+from rag_llm_api_pipeline.config_loader import load_cached_config, load_config
+from rag_llm_api_pipeline.core import audit_segments, record_writer
 from rag_llm_api_pipeline.core.hitl import utc_now_iso
-from rag_llm_api_pipeline.core.system_metadata import get_system_metadata
+from rag_llm_api_pipeline.core.system_metadata import get_system_metadata_snapshot
+from rag_llm_api_pipeline.db import audit_index_store
 
 DEFAULT_AUDIT_LOG_PATH = os.path.join("data", "audit", "audit_log.jsonl")
+TAIL_READ_BLOCK_BYTES = 64 * 1024
 
+_write_lock = threading.Lock()
+# Byte position up to which this process knows the sidecar index is complete,
+# keyed by (log path, segment). A mismatch on append means another writer (or a
+# crash between write and index) left lines unindexed, which triggers a catch-up.
+_indexed_end: dict[tuple[str, int], int] = {}
+# Hash of the newest record per log path, so appends extend the chain without
+# re-reading the log.
+_chain_heads: dict[str, str] = {}
+# Fingerprint of the system metadata last written into each (log path, segment).
+# Events only carry ``system_metadata_ref``; the full metadata is written as a
+# ``system_metadata`` event at the start of every segment and whenever it changes.
+_segment_metadata: dict[tuple[str, int], str] = {}
+# When each (log path, segment) was opened, i.e. its first record's time, so
+# the age check does not re-read the active log on every append.
+_segment_opened_at: dict[tuple[str, int], datetime] = {}
+# Full metadata by fingerprint, for expanding references on read.
+_metadata_by_ref: dict[str, dict[str, Any]] = {}
+METADATA_EVENT_TYPE = "system_metadata"
 
-def get_audit_log_path() -> str:
-    config = load_config() or {}
-    audit_cfg = config.get("audit", {})
+
+def get_audit_log_path(config: dict[str, Any] | None = None) -> str:
+    cfg = config or load_config() or {}
+    audit_cfg = cfg.get("audit", {})
     return os.getenv("KRIONIS_AUDIT_LOG_PATH") or audit_cfg.get(
         "log_path", DEFAULT_AUDIT_LOG_PATH
     )
 
 
+def _index_entry(payload: dict[str, Any], offset: int, length: int) -> dict[str, Any]:
+    return {
+        "byte_offset": offset,
+        "byte_length": length,
+        "event_type": payload.get("event_type"),
+        "trace_id": payload.get("trace_id"),
+        "review_id": payload.get("review_id"),
+        "recorded_at": payload.get("recorded_at"),
+    }
+
+
+def _decode_line(line: bytes) -> dict[str, Any] | None:
+    try:
+        event = json.loads(line)
+    except (UnicodeDecodeError, json.JSONDecodeError):
+        return None
+    return event if isinstance(event, dict) else None
+
+
+def _index_lines(
+    handle: IO[bytes], start: int, *, complete_only: bool
+) -> tuple[list[dict[str, Any]], int]:
+    entries: list[dict[str, Any]] = []
+    offset = start
+    for line in handle:
+        if complete_only and not line.endswith(b"\n"):
+            break  # partial trailing write; index it once it completes
+        event = _decode_line(line) or {}
+        entries.append(_index_entry(event, offset, len(line)))
+        offset += len(line)
+    return entries, offset
+
+
+def _sync_index(path: str, manifest: dict[str, Any]) -> int:
+    """Index sealed segments and active lines the sidecar has not seen yet."""
+    sealed = audit_index_store.sealed_segments(path)
+    for segment in manifest["segments"]:
+        segment_id = int(segment["segment"])
+        if segment_id in sealed:
+            continue
+        audit_index_store.reset_segment(path, segment_id)
+        with audit_segments.open_segment(
+            audit_segments.segment_file_path(path, segment), segment["compression"]
+        ) as handle:
+            entries, _ = _index_lines(handle, 0, complete_only=False)
+        audit_index_store.add_entries(path, segment_id, entries)
+        audit_index_store.mark_sealed(path, segment_id, segment["sealed_at"])
+
+    active = int(manifest["active_segment"])
+    size = os.path.getsize(path) if os.path.exists(path) else 0
+    indexed = audit_index_store.indexed_through(path, active)
+    if indexed > size:
+        # The log was truncated or replaced; the sidecar no longer describes it.
+        audit_index_store.reset_segment(path, active)
+        _segment_metadata.pop((path, active), None)
+        indexed = 0
+
+    if indexed < size:
+        with open(path, "rb") as handle:
+            handle.seek(indexed)
+            entries, indexed = _index_lines(handle, indexed, complete_only=True)
+        audit_index_store.add_entries(path, active, entries)
+
+    _indexed_end[(path, active)] = indexed
+    return indexed
+
+
+def _iter_lines_reversed(
+    handle: IO[bytes], block_size: int = TAIL_READ_BLOCK_BYTES
+) -> Iterator[bytes]:
+    position = handle.seek(0, os.SEEK_END)
+    remainder = b""
+    while position > 0:
+        read_size = min(block_size, position)
+        position -= read_size
+        handle.seek(position)
+        lines = (handle.read(read_size) + remainder).split(b"\n")
+        remainder = lines.pop(0)
+        for line in reversed(lines):
+            if line.strip():
+                yield line
+    if remainder.strip():
+        yield remainder
+
+
+def _first_line(path: str) -> bytes:
+    if not os.path.exists(path):
+        return b""
+    with open(path, "rb") as handle:
+        return handle.readline()
+
+
+def _chain_head(path: str, manifest: dict[str, Any]) -> str:
+    cached = _chain_heads.get(path)
+    if cached is not None:
+        return cached
+    head = None
+    if os.path.exists(path):
+        with open(path, "rb") as handle:
+            for line in _iter_lines_reversed(handle):
+                head = audit_segments.line_hash(_decode_line(line), line)
+                break
+    if head is None and manifest["segments"]:
+        head = manifest["segments"][-1].get("last_record_hash")
+    head = head or audit_segments.GENESIS_HASH
+    _chain_heads[path] = head
+    return head
+
+
+def _needs_rotation(
+    path: str, segment: int, size: int, incoming: int, settings: dict[str, Any]
+) -> bool:
+    if size <= 0:
+        return False
+    if size + incoming > settings["max_segment_bytes"]:
+        return True
+    max_age_hours = settings["max_segment_age_hours"]
+    if max_age_hours is None:
+        return False
+    key = (path, segment)
+    opened = _segment_opened_at.get(key)
+    if opened is None:
+        # The first line may still be pending in this batch; look again later.
+        opened_at = (_decode_line(_first_line(path)) or {}).get("recorded_at")
+        if not opened_at:
+            return False
+        opened = _segment_opened_at[key] = datetime.fromisoformat(str(opened_at))
+    return datetime.fromisoformat(utc_now_iso()) - opened >= timedelta(
+        hours=max_age_hours
+    )
+
+
+def _seal_active(
+    path: str, manifest: dict[str, Any], compression: str
+) -> dict[str, Any] | None:
+    active = int(manifest["active_segment"])
+    # Make sure every line is indexed under this segment before it moves.
+    _sync_index(path, manifest)
+    sealed_at = utc_now_iso()
+    segment = audit_segments.seal_segment(
+        path, manifest, compression=compression, sealed_at=sealed_at
+    )
+    if segment is not None:
+        audit_index_store.mark_sealed(path, active, sealed_at)
+        _indexed_end.pop((path, active), None)
+        _segment_metadata.pop((path, active), None)
+        _segment_opened_at.pop((path, active), None)
+    return segment
+
+
+def _segment_metadata_ref(
+    path: str, manifest: dict[str, Any], segment: int
+) -> str | None:
+    """Return the metadata fingerprint last written into ``segment``, if any."""
+    key = (path, segment)
+    if key not in _segment_metadata:
+        _sync_index(path, manifest)
+        locations = audit_index_store.lookup(
+            path,
+            event_type=METADATA_EVENT_TYPE,
+            segment=segment,
+            limit=1,
+            newest_first=True,
+        )
+        events = _read_at(path, manifest, locations)
+        ref = events[0].get("system_metadata_ref") if events else None
+        if ref is None:
+            return None
+        _segment_metadata[key] = str(ref)
+    return _segment_metadata[key]
+
+
+def _expand_metadata(
+    path: str, manifest: dict[str, Any], events: list[dict[str, Any]]
+) -> list[dict[str, Any]]:
+    """Attach the full system metadata to events that only carry a reference."""
+    refs = {
+        event["system_metadata_ref"]
+        for event in events
+        if event.get("system_metadata_ref") and "system_metadata" not in event
+    }
+    if refs - _metadata_by_ref.keys():
+        locations = audit_index_store.lookup(path, event_type=METADATA_EVENT_TYPE)
+        for event in _read_at(path, manifest, locations):
+            if event.get("system_metadata_ref") and event.get("system_metadata"):
+                _metadata_by_ref[event["system_metadata_ref"]] = event[
+                    "system_metadata"
+                ]
+    for event in events:
+        ref = event.get("system_metadata_ref")
+        if ref in refs and ref in _metadata_by_ref:
+            event["system_metadata"] = _metadata_by_ref[ref]
+    return events
+
+
+def _commit_audit_batch(items: list[dict[str, Any]], *, fsync: bool) -> None:
+    """Chain, rotate and append a batch of audit payloads.
+
+    Lines bound for the same segment are written with one write and one fsync,
+    and their sidecar index entries are inserted in one transaction.
+    """
+    with _write_lock:
+        for path, group in groupby(items, key=lambda item: item["path"]):
+            try:
+                _commit_audit_lines(path, list(group), fsync=fsync)
+            except Exception:
+                # Part of the batch may be on disk; re-derive the head from it.
+                _chain_heads.pop(path, None)
+                raise
+
+
+def _commit_audit_lines(path: str, items: list[dict[str, Any]], *, fsync: bool) -> None:
+    settings = items[-1]["settings"]
+    manifest = audit_segments.load_manifest(path)
+    recovered = audit_segments.recover_pending_seal(
+        path,
+        manifest,
+        compression=settings["compression"],
+        sealed_at=utc_now_iso(),
+    )
+    if recovered is not None:
+        audit_index_store.mark_sealed(
+            path, recovered["segment"], recovered["sealed_at"]
+        )
+
+    head = _chain_head(path, manifest)
+    written = os.path.getsize(path) if os.path.exists(path) else 0
+    pending: list[tuple[dict[str, Any], bytes]] = []
+    pending_bytes = 0
+
+    def _flush_pending() -> None:
+        nonlocal written, pending_bytes
+        if not pending:
+            return
+        active = int(manifest["active_segment"])
+        if _indexed_end.get((path, active)) != written:
+            _sync_index(path, manifest)
+        offset = record_writer.append_lines(
+            path, [line for _, line in pending], fsync=fsync
+        )
+        entries = []
+        for payload, line in pending:
+            entries.append(_index_entry(payload, offset, len(line)))
+            offset += len(line)
+        audit_index_store.add_entries(path, active, entries)
+        _indexed_end[(path, active)] = offset
+        written = offset
+        pending.clear()
+        pending_bytes = 0
+
+    def _chain(payload: dict[str, Any]) -> bytes:
+        nonlocal head, pending_bytes
+        payload["prev_hash"] = head
+        payload["record_hash"] = audit_segments.compute_record_hash(payload)
+        line = (json.dumps(payload, ensure_ascii=True, sort_keys=True) + "\n").encode(
+            "ascii"
+        )
+        pending.append((payload, line))
+        pending_bytes += len(line)
+        head = payload["record_hash"]
+        return line
+
+    for item in items:
+        payload = dict(item["payload"])
+        # Rough size check with the hash fields still missing; they add a
+        # fixed amount per line, well below any sensible segment size.
+        incoming = len(json.dumps(payload, ensure_ascii=True)) + 160
+        if _needs_rotation(
+            path,
+            int(manifest["active_segment"]),
+            written + pending_bytes,
+            incoming,
+            item["settings"],
+        ):
+            _flush_pending()
+            _seal_active(path, manifest, item["settings"]["compression"])
+            written = 0
+
+        active = int(manifest["active_segment"])
+        ref = payload.get("system_metadata_ref")
+        if ref and _segment_metadata_ref(path, manifest, active) != ref:
+            _chain(
+                {
+                    "event_type": METADATA_EVENT_TYPE,
+                    "recorded_at": payload.get("recorded_at"),
+                    "system_metadata_ref": ref,
+                    "system_metadata": item["metadata"],
+                }
+            )
+            _segment_metadata[(path, active)] = ref
+            _metadata_by_ref[ref] = item["metadata"]
+        _chain(payload)
+    _flush_pending()
+    _chain_heads[path] = head
+
+
+record_writer.register_sink("audit", _commit_audit_batch)
+
+
 def append_audit_record(record: dict[str, Any]) -> dict[str, Any]:
-    path = get_audit_log_path()
-    os.makedirs(os.path.dirname(path), exist_ok=True)
+    """Queue an audit record with the group-commit writer and return its payload.
+
+    ``prev_hash`` and ``record_hash`` are assigned when the batch is committed,
+    so they are not part of the returned payload.
+    """
+    config = load_cached_config() or {}
+    fingerprint, metadata = get_system_metadata_snapshot()
     payload = {
         "recorded_at": utc_now_iso(),
-        "system_metadata": get_system_metadata(),
+        "system_metadata_ref": fingerprint,
         **record,
     }
-    with open(path, "a", encoding="utf-8") as handle:
-        handle.write(json.dumps(payload, ensure_ascii=True, sort_keys=True) + "\n")
-        handle.flush()
+    record_writer.submit_record(
+        "audit",
+        {
+            "path": get_audit_log_path(config),
+            "settings": audit_segments.get_rotation_settings(config),
+            "metadata": metadata,
+            "payload": payload,
+        },
+    )
     return payload
 
 
-def get_audit_events(limit: int = 100) -> list[dict[str, Any]]:
+def rotate_audit_log() -> dict[str, Any] | None:
+    """Seal the active audit segment now, regardless of size or age."""
+    record_writer.flush_record_writer()
+    config = load_config() or {}
+    path = get_audit_log_path(config)
+    settings = audit_segments.get_rotation_settings(config)
+    with _write_lock:
+        manifest = audit_segments.load_manifest(path)
+        return _seal_active(path, manifest, settings["compression"])
+
+
+def _open_for_read(
+    path: str, manifest: dict[str, Any], segment_id: int
+) -> IO[bytes] | None:
+    if segment_id == int(manifest["active_segment"]):
+        return open(path, "rb") if os.path.exists(path) else None
+    for segment in manifest["segments"]:
+        if int(segment["segment"]) == segment_id:
+            return audit_segments.open_segment(
+                audit_segments.segment_file_path(path, segment),
+                segment["compression"],
+            )
+    return None
+
+
+def _read_at(
+    path: str, manifest: dict[str, Any], locations: list[tuple[int, int, int]]
+) -> list[dict[str, Any]]:
+    """Read indexed lines, one forward pass per segment in (segment, offset) order."""
+    events: list[dict[str, Any]] = []
+    for segment_id, group in groupby(sorted(locations), key=lambda item: item[0]):
+        handle = _open_for_read(path, manifest, segment_id)
+        if handle is None:
+            continue
+        with handle:
+            for _, offset, length in group:
+                handle.seek(offset)
+                event = _decode_line(handle.read(length))
+                if event is not None:
+                    events.append(event)
+    return events
+
+
+def _is_metadata_event(event: dict[str, Any]) -> bool:
+    return event.get("event_type") == METADATA_EVENT_TYPE
+
+
+def _in_range(event: dict[str, Any], since: str | None, until: str | None) -> bool:
+    recorded_at = event.get("recorded_at")
+    if not recorded_at:
+        return since is None and until is None
+    if since is not None and recorded_at < since:
+        return False
+    if until is not None and recorded_at > until:
+        return False
+    return True
+
+
+def iter_audit_events(
+    since: str | None = None, until: str | None = None
+) -> Iterator[dict[str, Any]]:
+    """Yield events across sealed and active segments in chronological order.
+
+    Sealed segments whose recorded time range falls outside ``since``/``until``
+    are skipped without being opened. As in the other readers,
+    ``system_metadata`` events are not yielded and references are expanded.
+    """
+    record_writer.flush_record_writer()
     path = get_audit_log_path()
-    if not os.path.exists(path):
+    manifest = audit_segments.load_manifest(path)
+    for segment in manifest["segments"]:
+        if not audit_segments.overlaps(segment, since, until):
+            continue
+        with audit_segments.open_segment(
+            audit_segments.segment_file_path(path, segment), segment["compression"]
+        ) as handle:
+            yield from _iter_expanded(path, manifest, handle, since, until)
+    if os.path.exists(path):
+        with open(path, "rb") as handle:
+            yield from _iter_expanded(path, manifest, handle, since, until)
+
+
+def _iter_expanded(
+    path: str,
+    manifest: dict[str, Any],
+    lines: Iterable[bytes],
+    since: str | None,
+    until: str | None,
+) -> Iterator[dict[str, Any]]:
+    for line in lines:
+        event = _decode_line(line)
+        if event is None:
+            continue
+        if _is_metadata_event(event):
+            # Every segment opens with one, ahead of the events that use it.
+            ref = event.get("system_metadata_ref")
+            if ref and event.get("system_metadata"):
+                _metadata_by_ref[ref] = event["system_metadata"]
+            continue
+        if _in_range(event, since, until):
+            yield _expand_metadata(path, manifest, [event])[0]
+
+
+def get_audit_events(
+    limit: int = 100,
+    event_type: str | None = None,
+    *,
+    since: str | None = None,
+    until: str | None = None,
+) -> list[dict[str, Any]]:
+    """Return the newest ``limit`` events in chronological order.
+
+    Plain tails are read backwards from the end of the active segment and only
+    fall through to sealed segments when it holds fewer than ``limit`` events.
+    Filtered reads are answered from the sidecar index. ``system_metadata``
+    events are skipped unless asked for by ``event_type``, and references are
+    expanded as in trace reads.
+    """
+    record_writer.flush_record_writer()
+    path = get_audit_log_path()
+    if limit <= 0:
         return []
+    manifest = audit_segments.load_manifest(path)
+
+    if event_type is not None or since is not None or until is not None:
+        _sync_index(path, manifest)
+        locations = audit_index_store.lookup(
+            path,
+            event_type=event_type,
+            exclude_event_type=None if event_type else METADATA_EVENT_TYPE,
+            since=since,
+            until=until,
+            limit=limit,
+            newest_first=True,
+        )
+        return _expand_metadata(path, manifest, _read_at(path, manifest, locations))
+
+    events: list[dict[str, Any]] = []
+    if os.path.exists(path):
+        with open(path, "rb") as handle:
+            for line in _iter_lines_reversed(handle):
+                event = _decode_line(line)
+                if event is None or _is_metadata_event(event):
+                    continue
+                events.append(event)
+                if len(events) >= limit:
+                    break
+    events.reverse()
+
+    for segment in reversed(manifest["segments"]):
+        remaining = limit - len(events)
+        if remaining <= 0:
+            break
+        with audit_segments.open_segment(
+            audit_segments.segment_file_path(path, segment), segment["compression"]
+        ) as handle:
+            decoded = (_decode_line(line) for line in handle)
+            older = deque(
+                (
+                    event
+                    for event in decoded
+                    if event is not None and not _is_metadata_event(event)
+                ),
+                maxlen=remaining,
+            )
+        events = list(older) + events
+    return _expand_metadata(path, manifest, events)
 
-    with open(path, "r", encoding="utf-8") as handle:
-        lines = handle.readlines()
 
-    events = [json.loads(line) for line in lines if line.strip()]
-    return events[-limit:]
+def get_trace_events(
+    trace_id: str, *, since: str | None = None, until: str | None = None
+) -> list[dict[str, Any]]:
+    record_writer.flush_record_writer()
+    path = get_audit_log_path()
+    manifest = audit_segments.load_manifest(path)
+    _sync_index(path, manifest)
+    locations = audit_index_store.lookup(
+        path, trace_id=trace_id, since=since, until=until
+    )
+    return _expand_metadata(path, manifest, _read_at(path, manifest, locations))
+
+
+def get_review_events(
+    review_id: str, *, since: str | None = None, until: str | None = None
+) -> list[dict[str, Any]]:
+    record_writer.flush_record_writer()
+    path = get_audit_log_path()
+    manifest = audit_segments.load_manifest(path)
+    _sync_index(path, manifest)
+    locations = audit_index_store.lookup(
+        path, review_id=review_id, since=since, until=until
+    )
+    return _expand_metadata(path, manifest, _read_at(path, manifest, locations))
+
 
+def verify_audit_chain() -> dict[str, Any]:
+    """Recompute the hash chain across every segment and report any breaks."""
+    record_writer.flush_record_writer()
+    path = get_audit_log_path()
+    manifest = audit_segments.load_manifest(path)
+    errors: list[dict[str, Any]] = []
+    previous = audit_segments.GENESIS_HASH
+    checked = 0
 
-def get_trace_events(trace_id: str) -> list[dict[str, Any]]:
-    return [
-        event
-        for event in get_audit_events(limit=5000)
-        if event.get("trace_id") == trace_id
-    ]
+    def _walk(handle: IO[bytes], segment_id: int, head: str) -> str:
+        nonlocal checked
+        for line in handle:
+            if not line.strip():
+                continue
+            event = _decode_line(line)
+            checked += 1
+            if event is not None and event.get("record_hash"):
+                if event.get("prev_hash") != head:
+                    errors.append(
+                        {"segment": segment_id, "error": "chain_break", "line": checked}
+                    )
+                if audit_segments.compute_record_hash(event) != event["record_hash"]:
+                    errors.append(
+                        {
+                            "segment": segment_id,
+                            "error": "hash_mismatch",
+                            "line": checked,
+                        }
+                    )
+            head = audit_segments.line_hash(event, line)
+        return head
 
+    for segment in manifest["segments"]:
+        segment_path = audit_segments.segment_file_path(path, segment)
+        segment_id = int(segment["segment"])
+        if not os.path.exists(segment_path):
+            errors.append({"segment": segment_id, "error": "missing_segment"})
+            continue
+        with audit_segments.open_segment(
+            segment_path, segment["compression"]
+        ) as handle:
+            summary = audit_segments.summarize_lines(iter(handle))
+        if summary["sha256"] != segment.get("sha256"):
+            errors.append({"segment": segment_id, "error": "segment_digest_mismatch"})
+        with audit_segments.open_segment(
+            segment_path, segment["compression"]
+        ) as handle:
+            previous = _walk(handle, segment_id, previous)
+        if previous != segment.get("last_record_hash"):
+            errors.append({"segment": segment_id, "error": "manifest_head_mismatch"})
 
-def get_review_events(review_id: str) -> list[dict[str, Any]]:
-    return [
-        event
-        for event in get_audit_events(limit=5000)
-        if event.get("review_id") == review_id
-    ]
+    if os.path.exists(path):
+        with open(path, "rb") as handle:
+            previous = _walk(handle, int(manifest["active_segment"]), previous)
+
+    return {
+        "ok": not errors,
+        "events_checked": checked,
+        "sealed_segments": len(manifest["segments"]),
+        "active_segment": manifest["active_segment"],
+        "head_hash": previous,
+        "errors": errors,
+    }
 
 
 def log_query_event(
@@ -0,0 +1,243 @@
+from __future__ import annotations
+
+import gzip
+import hashlib
+import io
+import json
+import os
+import shutil
+from typing import IO, Any, Iterator
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional runtime dependency
+    zstandard = None  # type: ignore[assignment]
+
+MANIFEST_VERSION = 1
+GENESIS_HASH = "0" * 64
+DEFAULT_MAX_SEGMENT_BYTES = 64 * 1024 * 1024
+DEFAULT_COMPRESSION = "zstd"
+
+_EXTENSIONS = {"zstd": ".zst", "gzip": ".gz", "none": ""}
+
+
+def manifest_path(log_path: str) -> str:
+    return f"{log_path}.manifest.json"
+
+
+def segments_dir(log_path: str) -> str:
+    root, _ = os.path.splitext(log_path)
+    return f"{root}.segments"
+
+
+def resolve_compression(value: Any) -> str:
+    normalized = str(value or "none").strip().lower()
+    if normalized in {"zstd", "zstandard", "zst"}:
+        return "zstd" if zstandard is not None else "gzip"
+    if normalized in {"gzip", "gz"}:
+        return "gzip"
+    return "none"
+
+
+def get_rotation_settings(config: dict[str, Any]) -> dict[str, Any]:
+    rotation = (config.get("audit", {}) or {}).get("rotation") or {}
+    max_age_hours = rotation.get("max_segment_age_hours")
+    return {
+        "max_segment_bytes": max(
+            1, int(rotation.get("max_segment_bytes", DEFAULT_MAX_SEGMENT_BYTES))
+        ),
+        "max_segment_age_hours": float(max_age_hours) if max_age_hours else None,
+        "compression": resolve_compression(
+            rotation.get("compression", DEFAULT_COMPRESSION)
+        ),
+    }
+
+
+def load_manifest(log_path: str) -> dict[str, Any]:
+    path = manifest_path(log_path)
+    if not os.path.exists(path):
+        return {"version": MANIFEST_VERSION, "active_segment": 1, "segments": []}
+    with open(path, "r", encoding="utf-8") as handle:
+        manifest = json.load(handle)
+    manifest.setdefault("segments", [])
+    manifest.setdefault("active_segment", len(manifest["segments"]) + 1)
+    return manifest
+
+
+def save_manifest(log_path: str, manifest: dict[str, Any]) -> None:
+    path = manifest_path(log_path)
+    staging = f"{path}.tmp"
+    with open(staging, "w", encoding="utf-8") as handle:
+        json.dump(manifest, handle, ensure_ascii=True, indent=2, sort_keys=True)
+        handle.flush()
+        os.fsync(handle.fileno())
+    os.replace(staging, path)
+
+
+def segment_file_path(log_path: str, segment: dict[str, Any]) -> str:
+    return os.path.join(os.path.dirname(log_path), segment["file"])
+
+
+def open_segment(path: str, compression: str) -> IO[bytes]:
+    """Open a segment for sequential reads and forward seeks on raw bytes."""
+    if compression == "gzip":
+        return gzip.open(path, "rb")  # type: ignore[return-value]
+    if compression == "zstd":
+        if zstandard is None:
+            raise RuntimeError(
+                f"Audit segment '{path}' is zstd-compressed but the optional "
+                "'zstandard' package is not installed."
+            )
+        reader = zstandard.ZstdDecompressor().stream_reader(
+            open(path, "rb"), closefd=True
+        )
+        return io.BufferedReader(reader)  # type: ignore[arg-type]
+    return open(path, "rb")
+
+
+def line_hash(event: dict[str, Any] | None, raw_line: bytes) -> str:
+    """Return the chain hash of a line, hashing legacy unchained lines as-is."""
+    if event and event.get("record_hash"):
+        return str(event["record_hash"])
+    return hashlib.sha256(raw_line.rstrip(b"\n")).hexdigest()
+
+
+def compute_record_hash(payload: dict[str, Any]) -> str:
+    body = {key: value for key, value in payload.items() if key != "record_hash"}
+    encoded = json.dumps(body, ensure_ascii=True, sort_keys=True).encode("ascii")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def summarize_lines(lines: Iterator[bytes]) -> dict[str, Any]:
+    digest = hashlib.sha256()
+    summary: dict[str, Any] = {
+        "event_count": 0,
+        "uncompressed_bytes": 0,
+        "first_recorded_at": None,
+        "last_recorded_at": None,
+        "first_prev_hash": None,
+        "last_record_hash": None,
+    }
+    for raw in lines:
+        digest.update(raw)
+        summary["uncompressed_bytes"] += len(raw)
+        if not raw.strip():
+            continue
+        try:
+            event = json.loads(raw)
+        except (UnicodeDecodeError, json.JSONDecodeError):
+            event = None
+        if not isinstance(event, dict):
+            event = None
+        summary["event_count"] += 1
+        recorded_at = (event or {}).get("recorded_at")
+        if recorded_at:
+            summary["first_recorded_at"] = summary["first_recorded_at"] or recorded_at
+            summary["last_recorded_at"] = recorded_at
+        if summary["event_count"] == 1:
+            summary["first_prev_hash"] = (event or {}).get("prev_hash")
+        summary["last_record_hash"] = line_hash(event, raw)
+    summary["sha256"] = digest.hexdigest()
+    return summary
+
+
+def _compress_file(source: str, target: str, compression: str) -> None:
+    staging = f"{target}.tmp"
+    with open(source, "rb") as src:
+        if compression == "gzip":
+            with gzip.open(staging, "wb") as dst:
+                shutil.copyfileobj(src, dst)
+        elif compression == "zstd" and zstandard is not None:
+            with open(staging, "wb") as dst:
+                zstandard.ZstdCompressor().copy_stream(src, dst)
+        else:
+            with open(staging, "wb") as dst:
+                shutil.copyfileobj(src, dst)
+    with open(staging, "rb") as handle:
+        os.fsync(handle.fileno())
+    os.replace(staging, target)
+
+
+def seal_segment(
+    log_path: str,
+    manifest: dict[str, Any],
+    *,
+    compression: str,
+    sealed_at: str,
+) -> dict[str, Any] | None:
+    """Move the active log into a compressed, manifest-tracked segment.
+
+    The active file is first renamed into the segments directory, so a crash
+    mid-seal never leaves records in two places; `recover_pending_seal` finishes
+    the job on the next write.
+    """
+    if not os.path.exists(log_path) or os.path.getsize(log_path) == 0:
+        return None
+    segment_id = int(manifest["active_segment"])
+    directory = segments_dir(log_path)
+    os.makedirs(directory, exist_ok=True)
+    staged = os.path.join(directory, f"{segment_id:06d}.jsonl")
+    os.replace(log_path, staged)
+    return _finish_seal(
+        log_path, manifest, staged, compression=compression, sealed_at=sealed_at
+    )
+
+
+def recover_pending_seal(
+    log_path: str,
+    manifest: dict[str, Any],
+    *,
+    compression: str,
+    sealed_at: str,
+) -> dict[str, Any] | None:
+    segment_id = int(manifest["active_segment"])
+    staged = os.path.join(segments_dir(log_path), f"{segment_id:06d}.jsonl")
+    if not os.path.exists(staged):
+        return None
+    return _finish_seal(
+        log_path, manifest, staged, compression=compression, sealed_at=sealed_at
+    )
+
+
+def _finish_seal(
+    log_path: str,
+    manifest: dict[str, Any],
+    staged: str,
+    *,
+    compression: str,
+    sealed_at: str,
+) -> dict[str, Any]:
+    segment_id = int(manifest["active_segment"])
+    with open(staged, "rb") as handle:
+        summary = summarize_lines(iter(handle))
+
+    target = f"{staged}{_EXTENSIONS[compression]}"
+    if target != staged:
+        _compress_file(staged, target, compression)
+
+    segment = {
+        "segment": segment_id,
+        "file": os.path.relpath(target, os.path.dirname(log_path)),
+        "compression": compression,
+        "compressed_bytes": os.path.getsize(target),
+        "sealed_at": sealed_at,
+        **summary,
+    }
+    manifest["segments"].append(segment)
+    manifest["active_segment"] = segment_id + 1
+    save_manifest(log_path, manifest)
+    if target != staged:
+        os.remove(staged)
+    return segment
+
+
+def overlaps(
+    segment: dict[str, Any], since: str | None = None, until: str | None = None
+) -> bool:
+    first = segment.get("first_recorded_at")
+    last = segment.get("last_recorded_at")
+    if since and last and last < since:
+        return False
+    if until and first and first > until:
+        return False
+    return True
@@ -4,7 +4,7 @@ from pathlib import Path
 
 from rag_llm_api_pipeline.config_loader import load_config
 from rag_llm_api_pipeline.core.system_assets import list_regulation_pools
-from rag_llm_api_pipeline.loader import load_docs
+from rag_llm_api_pipeline.parse_cache import load_docs_cached
 
 DEFAULT_EXCERPT_CHARS = 4000
 DEFAULT_AUDIT_EXCERPT_CHARS = 1200
@@ -70,7 +70,8 @@ def resolve_document_text(
     if not path.exists():
         raise ValueError(f"Document path was not found: {path}")
 
-    pages = [page.strip() for page in load_docs(str(path.resolve())) if page.strip()]
+    parts, _ = load_docs_cached(str(path.resolve()))
+    pages = [page.strip() for page in parts if page.strip()]
     if not pages:
         raise ValueError(f"No readable text was extracted from: {path}")
     return "\n\n".join(pages), str(path.resolve())
@@ -1,9 +1,11 @@
 from __future__ import annotations
 
+import copy
+import json
 import os
 from typing import Any
 
-from rag_llm_api_pipeline.config_loader import load_config
+from rag_llm_api_pipeline.config_loader import load_cached_config, load_config
 from rag_llm_api_pipeline.core import audit
 from rag_llm_api_pipeline.core.hitl import (
     create_review_item,
@@ -19,8 +21,11 @@ from rag_llm_api_pipeline.core.model_selection import (
 from rag_llm_api_pipeline.core.orchestrator import get_orchestrator
 from rag_llm_api_pipeline.core.platform_state import record_query_route
 from rag_llm_api_pipeline.core.query_worker import run_query_in_worker
+from rag_llm_api_pipeline.core.single_flight import SingleFlight
 from rag_llm_api_pipeline.db import review_store
 
+_query_flights = SingleFlight()
+
 
 def build_trace(trace_id: str, status: str, stats: dict[str, Any]) -> dict[str, Any]:
     return {
@@ -85,18 +90,71 @@ def _resolve_runtime(
     )
 
 
+def _coalescing_enabled() -> bool:
+    settings = load_cached_config().get("settings", {}) or {}
+    return bool(settings.get("coalesce_identical_queries", True))
+
+
+def _runtime_signature(resolved_runtime: dict[str, Any]) -> str:
+    signature = resolved_runtime.get("signature")
+    if signature:
+        return str(signature)
+    return json.dumps(resolved_runtime, sort_keys=True, default=str)
+
+
+def get_query_coalescing_status() -> dict[str, Any]:
+    return {"enabled": _coalescing_enabled(), **_query_flights.status()}
+
+
 def execute_query_with_runtime(
     system_id: str,
     question: str,
     runtime_selection: dict[str, Any] | None = None,
+    filters: dict[str, Any] | None = None,
+    systems: list[str] | None = None,
 ) -> dict[str, Any]:
+    """``filters`` restrict retrieval by chunk metadata; ``systems`` adds more
+    systems or regulation pools to search alongside ``system_id``."""
     resolved_runtime = _resolve_runtime(system_id, runtime_selection)
+    options: dict[str, Any] = {}
+    if filters:
+        options["filters"] = filters
+    if systems and [s for s in systems if s != system_id]:
+        options["systems"] = list(dict.fromkeys([system_id, *systems]))
+    if not _coalescing_enabled():
+        return _run_query(system_id, question, resolved_runtime, options)
+
+    # Identical questions already being answered for the same runtime share
+    # that run; each caller still gets its own trace id and audit record.
+    key = (
+        system_id,
+        question.strip(),
+        _runtime_signature(resolved_runtime),
+        json.dumps(options, sort_keys=True, default=str),
+    )
+    result, shared = _query_flights.do(
+        key, lambda: _run_query(system_id, question, resolved_runtime, options)
+    )
+    if not shared:
+        return result
+    result = copy.deepcopy(result)
+    result["coalesced"] = True
+    return result
+
+
+def _run_query(
+    system_id: str,
+    question: str,
+    resolved_runtime: dict[str, Any],
+    options: dict[str, Any] | None = None,
+) -> dict[str, Any]:
     if os.getenv("KRIONIS_DISABLE_QUERY_WORKER", "").strip() == "1":
         return normalize_result(
             get_orchestrator().run_query(
                 system_name=system_id,
                 question=question,
                 model_selection=resolved_runtime,
+                **(options or {}),
             )
         )
     return normalize_result(
@@ -104,10 +162,27 @@ def execute_query_with_runtime(
             system_id,
             question,
             runtime_selection=resolved_runtime,
+            options=options,
         )
     )
 
 
+def _index_build_ids(stats: dict[str, Any], system_id: str) -> dict[str, str]:
+    """Published index build per searched system, for audit records."""
+    retrieval = stats.get("retrieval") or {}
+    if not isinstance(retrieval, dict):
+        return {}
+    per_system = retrieval.get("systems")
+    if isinstance(per_system, dict):
+        return {
+            system: timings["index_build_id"]
+            for system, timings in per_system.items()
+            if isinstance(timings, dict) and timings.get("index_build_id")
+        }
+    build_id = retrieval.get("index_build_id")
+    return {system_id: build_id} if build_id else {}
+
+
 def build_controlled_response(
     *,
     system_id: str,
@@ -163,6 +238,14 @@ def build_controlled_response(
     if agent_task_id:
         audit_fields["agent_task_id"] = agent_task_id
     audit_fields["runtime"] = summarize_runtime(resolved_runtime)
+    build_ids = _index_build_ids(stats, system_id)
+    if build_ids:
+        audit_fields["index_build_ids"] = build_ids
+    if normalized.get("coalesced"):
+        audit_fields["coalesced"] = True
+        trace["steps"].insert(
+            2, {"stage": "coalesced_with_in_flight_query", "timestamp": utc_now_iso()}
+        )
 
     if requires_human_review(question, answer):
         review_item = create_review_item(
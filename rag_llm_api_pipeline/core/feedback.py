@@ -5,6 +5,7 @@ import os
 from typing import Any
 
 from rag_llm_api_pipeline.config_loader import load_config
+from rag_llm_api_pipeline.core import record_writer
 from rag_llm_api_pipeline.core.hitl import utc_now_iso
 from rag_llm_api_pipeline.db import metadata_store
 
@@ -20,9 +21,45 @@ def get_feedback_log_path() -> str:
     )
 
 
+def _commit_feedback_batch(items: list[dict[str, Any]], *, fsync: bool) -> None:
+    """Append feedback with one write per JSONL file and one transaction per DB."""
+    lines: dict[str, list[bytes]] = {}
+    records: dict[str, list[dict[str, Any]]] = {}
+    for item in items:
+        lines.setdefault(item["path"], []).append(item["line"])
+        records.setdefault(item["db_path"], []).append(item["record"])
+    for path, encoded in lines.items():
+        record_writer.append_lines(path, encoded, fsync=fsync)
+    for db_path, rows in records.items():
+        metadata_store.save_records(rows, db_path=db_path)
+
+
+record_writer.register_sink("feedback", _commit_feedback_batch)
+# Readers of the metadata store see every feedback record already submitted.
+metadata_store.register_read_barrier(record_writer.flush_record_writer)
+
+
+def _submit_feedback(path: str, payload: dict[str, Any], **record: Any) -> None:
+    line = (json.dumps(payload, ensure_ascii=True, sort_keys=True) + "\n").encode(
+        "ascii"
+    )
+    record_writer.submit_record(
+        "feedback",
+        {
+            "path": path,
+            "db_path": metadata_store.get_db_path(),
+            "line": line,
+            "record": {
+                "created_at": payload["recorded_at"],
+                "payload": payload,
+                **record,
+            },
+        },
+    )
+
+
 def record_review_feedback(item: dict[str, Any]) -> dict[str, Any]:
     path = get_feedback_log_path()
-    os.makedirs(os.path.dirname(path), exist_ok=True)
     recorded_at = utc_now_iso()
     payload = {
         "recorded_at": recorded_at,
@@ -38,13 +75,10 @@ def record_review_feedback(item: dict[str, Any]) -> dict[str, Any]:
         "model_version": item.get("model_version"),
         "prompt_version": item.get("prompt_version"),
     }
-    with open(path, "a", encoding="utf-8") as handle:
-        handle.write(json.dumps(payload, ensure_ascii=True, sort_keys=True) + "\n")
-        handle.flush()
-    metadata_store.save_record(
+    _submit_feedback(
+        path,
+        payload,
         event_type="review_feedback",
-        created_at=recorded_at,
-        payload=payload,
         trace_id=payload.get("trace_id"),
         review_id=payload.get("review_id"),
         status=payload.get("status"),
@@ -74,7 +108,6 @@ def record_quality_feedback(
     user_id: str | None = None,
 ) -> dict[str, Any]:
     path = get_quality_log_path()
-    os.makedirs(os.path.dirname(path), exist_ok=True)
     recorded_at = utc_now_iso()
     payload = {
         "recorded_at": recorded_at,
@@ -86,13 +119,10 @@ def record_quality_feedback(
         "response": response,
         "user_id": user_id,
     }
-    with open(path, "a", encoding="utf-8") as handle:
-        handle.write(json.dumps(payload, ensure_ascii=True, sort_keys=True) + "\n")
-        handle.flush()
-    metadata_store.save_record(
+    _submit_feedback(
+        path,
+        payload,
         event_type="quality_feedback",
-        created_at=recorded_at,
-        payload=payload,
         trace_id=payload.get("trace_id"),
         review_id=payload.get("review_id"),
         rating=payload.get("rating"),
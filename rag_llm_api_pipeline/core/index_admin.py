@@ -11,6 +11,11 @@ from rag_llm_api_pipeline.core.model_selection import (
     resolve_runtime_selection,
 )
 from rag_llm_api_pipeline.core.system_assets import find_asset, get_assets
+from rag_llm_api_pipeline.index_versions import (
+    artifact_paths,
+    list_builds,
+    read_pointer,
+)
 
 
 def _utc_iso(ts: float | None) -> str | None:
@@ -63,17 +68,51 @@ def _chunk_count(texts_path: str) -> int | None:
         return None
 
 
-def _artifact_paths(
-    index_dir: str, system_name: str, runtime: dict[str, Any]
-) -> dict[str, str]:
-    variant = embedding_index_slug(runtime)
+def _variant_paths(index_dir: str, system_name: str, variant: str) -> dict[str, Any]:
     base = f"{system_name}--{variant}"
+    published = read_pointer(index_dir, base) or {}
+    build_id = published.get("build_id")
     return {
-        "faiss": os.path.join(index_dir, f"{base}.faiss"),
-        "texts": os.path.join(index_dir, f"{base}_texts.pkl"),
-        "meta": os.path.join(index_dir, f"{base}_meta.pkl"),
-        "normflag": os.path.join(index_dir, f"{base}.normflag"),
+        **artifact_paths(index_dir, base, build_id),
         "variant": variant,
+        "build": {
+            "build_id": build_id,
+            "published_at": published.get("published_at"),
+            "previous_build_id": published.get("previous_build_id"),
+            "builds_on_disk": list_builds(index_dir, base),
+            "vector_storage": published.get("vector_storage"),
+            "bytes_per_vector": published.get("bytes_per_vector"),
+        },
+    }
+
+
+def _artifact_paths(
+    index_dir: str, system_name: str, runtime: dict[str, Any]
+) -> dict[str, Any]:
+    return _variant_paths(index_dir, system_name, embedding_index_slug(runtime))
+
+
+def _vector_path(artifacts: dict[str, Any]) -> str:
+    # Sharded builds write a shard manifest instead of a single .faiss file.
+    if not os.path.exists(artifacts["faiss"]) and os.path.exists(artifacts["shards"]):
+        return artifacts["shards"]
+    return artifacts["faiss"]
+
+
+def _storage_info(artifacts: dict[str, Any], chunk_count: int | None) -> dict[str, Any]:
+    build = artifacts["build"]
+    if build["bytes_per_vector"] is not None:
+        return {
+            "vector_storage": build["vector_storage"],
+            "bytes_per_vector": build["bytes_per_vector"],
+        }
+    # Unversioned indexes predate quantized storage and are float32; the file
+    # is a short header plus the raw vectors.
+    if not chunk_count or not os.path.exists(artifacts["faiss"]):
+        return {"vector_storage": None, "bytes_per_vector": None}
+    return {
+        "vector_storage": "float32",
+        "bytes_per_vector": os.path.getsize(artifacts["faiss"]) // chunk_count,
     }
 
 
@@ -83,14 +122,24 @@ def _list_index_variants(index_dir: str, system_name: str) -> list[dict[str, Any
     if not os.path.isdir(index_dir):
         return variants
 
-    for name in sorted(os.listdir(index_dir)):
-        if not name.startswith(prefix) or not name.endswith(".faiss"):
+    names = set()
+    for name in os.listdir(index_dir):
+        if not name.startswith(prefix):
+            continue
+        for ext in (".current", ".shards.json", ".faiss"):
+            if name.endswith(ext) and ".shard" not in name[: -len(ext)]:
+                names.add(name[len(prefix) : -len(ext)])
+                break
+
+    for variant in sorted(names):
+        artifacts = _variant_paths(index_dir, system_name, variant)
+        faiss_path = _vector_path(artifacts)
+        texts_path = artifacts["texts"]
+        meta_path = artifacts["meta"]
+        normflag_path = artifacts["normflag"]
+        if not os.path.exists(faiss_path):
             continue
-        variant = name[len(prefix) : -len(".faiss")]
-        faiss_path = os.path.join(index_dir, name)
-        texts_path = os.path.join(index_dir, f"{system_name}--{variant}_texts.pkl")
-        meta_path = os.path.join(index_dir, f"{system_name}--{variant}_meta.pkl")
-        normflag_path = os.path.join(index_dir, f"{system_name}--{variant}.normflag")
+        chunk_count = _chunk_count(texts_path)
         variants.append(
             {
                 "variant": variant,
@@ -98,8 +147,10 @@ def _list_index_variants(index_dir: str, system_name: str) -> list[dict[str, Any
                     os.path.exists(path)
                     for path in (faiss_path, texts_path, meta_path, normflag_path)
                 ),
-                "indexed_chunk_count": _chunk_count(texts_path),
+                "indexed_chunk_count": chunk_count,
                 "last_built_at": _utc_iso(os.path.getmtime(faiss_path)),
+                "build_id": artifacts["build"]["build_id"],
+                **_storage_info(artifacts, chunk_count),
                 "index_files": {
                     "faiss": os.path.abspath(faiss_path),
                     "texts": os.path.abspath(texts_path),
@@ -126,21 +177,21 @@ def get_index_status(
         overrides=model_selection,
     )
     artifacts = _artifact_paths(index_dir, system_name, runtime)
+    vector_path = _vector_path(artifacts)
 
     index_exists = all(
         os.path.exists(path)
         for path in (
-            artifacts["faiss"],
+            vector_path,
             artifacts["texts"],
             artifacts["meta"],
             artifacts["normflag"],
         )
     )
     last_built_ts = (
-        os.path.getmtime(artifacts["faiss"])
-        if os.path.exists(artifacts["faiss"])
-        else None
+        os.path.getmtime(vector_path) if os.path.exists(vector_path) else None
     )
+    chunk_count = _chunk_count(artifacts["texts"])
 
     return {
         "system_name": system_name,
@@ -152,13 +203,15 @@ def get_index_status(
         "embedding_model": runtime["embedding_model"],
         "embedding_variant": artifacts["variant"],
         "index_files": {
-            "faiss": os.path.abspath(artifacts["faiss"]),
+            "faiss": os.path.abspath(vector_path),
             "texts": os.path.abspath(artifacts["texts"]),
             "meta": os.path.abspath(artifacts["meta"]),
             "normflag": os.path.abspath(artifacts["normflag"]),
         },
-        "indexed_chunk_count": _chunk_count(artifacts["texts"]),
+        "indexed_chunk_count": chunk_count,
         "last_built_at": _utc_iso(last_built_ts),
+        **artifacts["build"],
+        **_storage_info(artifacts, chunk_count),
         "variants": _list_index_variants(index_dir, system_name),
     }
 
@@ -27,6 +27,27 @@ class Retriever(ABC):
         system_name: str,
         question: str,
         model_selection: dict[str, Any] | None = None,
+        top_k: int | None = None,
+        filters: dict[str, Any] | None = None,
+        systems: list[str] | None = None,
+    ) -> RetrievalResult:
+        raise NotImplementedError
+
+
+class Reranker(ABC):
+    @abstractmethod
+    def rerank(
+        self, retrieval: RetrievalResult, top_k: int | None = None
+    ) -> RetrievalResult:
+        raise NotImplementedError
+
+
+class Compressor(ABC):
+    @abstractmethod
+    def compress(
+        self,
+        retrieval: RetrievalResult,
+        model_selection: dict[str, Any] | None = None,
     ) -> RetrievalResult:
         raise NotImplementedError
 
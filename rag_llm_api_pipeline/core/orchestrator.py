@@ -22,11 +22,15 @@ class PlaceholderOrchestrator:
         system_name: str,
         question: str,
         model_selection: dict[str, Any] | None = None,
+        filters: dict[str, Any] | None = None,
+        systems: list[str] | None = None,
     ) -> dict[str, Any]:
         return self.document_search_tool.run(
             system_name=system_name,
             question=question,
             model_selection=model_selection,
+            filters=filters,
+            systems=systems,
         )
 
 
@@ -31,12 +31,16 @@ _worker_status: dict[str, Any] = {
 
 
 def _run_query_in_worker(
-    system_name: str, question: str, runtime_selection: dict[str, Any] | None = None
+    system_name: str,
+    question: str,
+    runtime_selection: dict[str, Any] | None = None,
+    options: dict[str, Any] | None = None,
 ) -> dict[str, Any]:
     result = get_orchestrator().run_query(
         system_name=system_name,
         question=question,
         model_selection=runtime_selection,
+        **(options or {}),
     )
     normalized = dict(result or {})
     normalized["worker_pid"] = os.getpid()
@@ -105,6 +109,7 @@ def run_query_in_worker(
     question: str,
     *,
     runtime_selection: dict[str, Any] | None = None,
+    options: dict[str, Any] | None = None,
     timeout_sec: float = 900.0,
 ) -> dict[str, Any]:
     resolved_runtime = resolve_runtime_selection(overrides=runtime_selection)
@@ -121,6 +126,7 @@ def run_query_in_worker(
             system_name,
             question,
             resolved_runtime,
+            options,
         )
         result = future.result(timeout=timeout_sec)
         _set_status(
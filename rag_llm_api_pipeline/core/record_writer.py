@@ -0,0 +1,275 @@
+from __future__ import annotations
+
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from dataclasses import dataclass
+from typing import Any, Callable
+
+from rag_llm_api_pipeline.config_loader import load_config
+
+logger = logging.getLogger(__name__)
+
+DURABILITY_MODES = ("sync", "group", "async")
+DEFAULT_DURABILITY_MODE = "group"
+DEFAULT_MAX_QUEUE = 10000
+DEFAULT_MAX_BATCH = 256
+DEFAULT_ENQUEUE_TIMEOUT_SEC = 5.0
+_FLUSH_SINK = "__flush__"
+
+SinkHandler = Callable[..., None]
+_sinks: dict[str, SinkHandler] = {}
+
+
+class RecordWriterFull(RuntimeError):
+    """Raised when the record queue stays full for longer than the enqueue timeout."""
+
+
+def register_sink(name: str, handler: SinkHandler) -> None:
+    """Register a batch handler called as ``handler(items, fsync=...)``."""
+    _sinks[name] = handler
+
+
+def append_lines(path: str, lines: list[bytes], *, fsync: bool) -> int:
+    """Append pre-encoded lines with a single write, flush, and optional fsync."""
+    if not lines:
+        return 0
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "ab") as handle:
+        offset = handle.seek(0, os.SEEK_END)
+        handle.write(b"".join(lines))
+        handle.flush()
+        if fsync:
+            os.fsync(handle.fileno())
+    return offset
+
+
+@dataclass(slots=True)
+class _Pending:
+    sink: str
+    item: Any
+    future: Future | None
+
+
+class RecordWriter:
+    """Background writer that turns concurrent appends into group commits.
+
+    ``sync`` writes on the caller's thread, ``group`` enqueues and waits for the
+    batch holding the record to be committed (so the commit stays on the
+    caller's path, shared with whoever else is in the batch), and ``async``
+    returns as soon as the record is queued. A full queue blocks callers for up to
+    ``enqueue_timeout_sec`` before raising `RecordWriterFull`.
+    """
+
+    def __init__(
+        self,
+        *,
+        mode: str = DEFAULT_DURABILITY_MODE,
+        max_queue: int = DEFAULT_MAX_QUEUE,
+        max_batch: int = DEFAULT_MAX_BATCH,
+        enqueue_timeout_sec: float = DEFAULT_ENQUEUE_TIMEOUT_SEC,
+        fsync: bool = True,
+    ) -> None:
+        if mode not in DURABILITY_MODES:
+            raise ValueError(
+                f"Unknown durability mode '{mode}'. Expected one of {DURABILITY_MODES}."
+            )
+        self.mode = mode
+        self.fsync = fsync
+        self._max_batch = max(1, max_batch)
+        self._enqueue_timeout = enqueue_timeout_sec
+        self._queue: queue.Queue[_Pending | None] = queue.Queue(maxsize=max_queue)
+        self._thread: threading.Thread | None = None
+        self._thread_lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._status: dict[str, Any] = {
+            "total_records": 0,
+            "total_batches": 0,
+            "failed_batches": 0,
+            "queue_full_events": 0,
+            "last_batch_size": None,
+            "last_commit_sec": None,
+            "last_error": None,
+        }
+
+    def _ensure_thread(self) -> None:
+        with self._thread_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="krionis-record-writer", daemon=True
+                )
+                self._thread.start()
+
+    def submit(self, sink: str, item: Any) -> None:
+        if sink not in _sinks:
+            raise KeyError(f"No record sink registered for '{sink}'.")
+        if self.mode == "sync":
+            with self._sync_lock:
+                self._commit([_Pending(sink, item, None)])
+            return
+
+        future: Future | None = Future() if self.mode == "group" else None
+        self._ensure_thread()
+        try:
+            self._queue.put(_Pending(sink, item, future), timeout=self._enqueue_timeout)
+        except queue.Full as exc:
+            self._status["queue_full_events"] += 1
+            raise RecordWriterFull(
+                f"Record writer queue is full ({self._queue.maxsize} pending)."
+            ) from exc
+        if future is not None:
+            future.result()
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """Block until every record queued before this call is committed."""
+        thread = self._thread
+        if thread is None or not thread.is_alive():
+            return True
+        if threading.current_thread() is thread:
+            return False
+        marker: Future = Future()
+        self._queue.put(_Pending(_FLUSH_SINK, None, marker))
+        try:
+            marker.result(timeout=timeout)
+        except FutureTimeoutError:  # not the builtin before Python 3.11
+            return False
+        return True
+
+    def close(self, timeout: float | None = None) -> None:
+        self.flush(timeout=timeout)
+        thread = self._thread
+        if thread is not None and thread.is_alive():
+            self._queue.put(None)
+            thread.join(timeout=timeout)
+
+    def _run(self) -> None:
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch = [first]
+            stop = False
+            while len(batch) < self._max_batch:
+                try:
+                    nxt = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if nxt is None:
+                    stop = True
+                    break
+                batch.append(nxt)
+            self._commit(batch)
+            if stop:
+                return
+
+    def _commit(self, batch: list[_Pending]) -> None:
+        started_at = time.perf_counter()
+        groups: dict[str, list[_Pending]] = {}
+        for pending in batch:
+            groups.setdefault(pending.sink, []).append(pending)
+
+        records = 0
+        for sink, items in groups.items():
+            if sink == _FLUSH_SINK:
+                continue
+            try:
+                _sinks[sink]([pending.item for pending in items], fsync=self.fsync)
+            except Exception as exc:
+                if self.mode == "sync":
+                    raise
+                logger.exception("Record writer failed to commit %s batch.", sink)
+                self._status["failed_batches"] += 1
+                self._status["last_error"] = str(exc)
+                for pending in items:
+                    if pending.future is not None and not pending.future.done():
+                        pending.future.set_exception(exc)
+                continue
+            records += len(items)
+
+        # Flush markers are resolved last so they only fire after every record
+        # queued ahead of them has been written.
+        for pending in batch:
+            if pending.future is not None and not pending.future.done():
+                pending.future.set_result(None)
+
+        self._status["total_records"] += records
+        self._status["total_batches"] += 1
+        self._status["last_batch_size"] = records
+        self._status["last_commit_sec"] = round(time.perf_counter() - started_at, 6)
+
+    def status(self) -> dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "fsync": self.fsync,
+            "pending": self._queue.qsize(),
+            "max_queue": self._queue.maxsize,
+            "max_batch": self._max_batch,
+            "running": bool(self._thread and self._thread.is_alive()),
+            **self._status,
+        }
+
+
+_writer: RecordWriter | None = None
+_writer_lock = threading.Lock()
+
+
+def _writer_from_config() -> RecordWriter:
+    config = load_config() or {}
+    durability_cfg = config.get("durability", {}) or {}
+    mode = (
+        os.getenv("KRIONIS_DURABILITY_MODE")
+        or durability_cfg.get("mode")
+        or DEFAULT_DURABILITY_MODE
+    )
+    return RecordWriter(
+        mode=str(mode).strip().lower(),
+        max_queue=int(durability_cfg.get("max_queue", DEFAULT_MAX_QUEUE)),
+        max_batch=int(durability_cfg.get("max_batch", DEFAULT_MAX_BATCH)),
+        enqueue_timeout_sec=float(
+            durability_cfg.get("enqueue_timeout_sec", DEFAULT_ENQUEUE_TIMEOUT_SEC)
+        ),
+        fsync=bool(durability_cfg.get("fsync", True)),
+    )
+
+
+def get_record_writer() -> RecordWriter:
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = _writer_from_config()
+        return _writer
+
+
+def submit_record(sink: str, item: Any) -> None:
+    get_record_writer().submit(sink, item)
+
+
+def flush_record_writer(timeout: float | None = None) -> bool:
+    with _writer_lock:
+        writer = _writer
+    return writer.flush(timeout=timeout) if writer is not None else True
+
+
+def shutdown_record_writer(timeout: float | None = 30.0) -> None:
+    """Commit everything still queued and stop the writer thread."""
+    global _writer
+    with _writer_lock:
+        writer, _writer = _writer, None
+    if writer is not None:
+        writer.close(timeout=timeout)
+
+
+def get_record_writer_status() -> dict[str, Any]:
+    with _writer_lock:
+        writer = _writer
+    if writer is None:
+        return {"running": False, "pending": 0}
+    return writer.status()
+
+
+atexit.register(shutdown_record_writer)
@@ -0,0 +1,71 @@
+"""
+Single-flight execution for identical in-flight calls.
+
+The first caller for a key runs the function; callers that arrive with the
+same key while it is still running wait for that result instead of repeating
+the work. Nothing is cached once the call finishes.
+"""
+
+from __future__ import annotations
+
+import threading
+from typing import Any, Callable, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class _Call:
+    __slots__ = ("done", "result", "error", "waiters")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException | None = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._calls: dict[Hashable, _Call] = {}
+        self._leaders = 0
+        self._coalesced = 0
+
+    def do(self, key: Hashable, fn: Callable[[], T]) -> tuple[T, bool]:
+        """Return ``(result, shared)``; ``shared`` is true for coalesced callers."""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self._coalesced += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self._leaders += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+        return call.result, False
+
+    def status(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "in_flight": len(self._calls),
+                "executions": self._leaders,
+                "coalesced": self._coalesced,
+            }
@@ -1,10 +1,17 @@
 from __future__ import annotations
 
+import json
+import threading
 from typing import Any
 
-from rag_llm_api_pipeline.config_loader import load_config
+from rag_llm_api_pipeline.config_loader import load_cached_config
 from rag_llm_api_pipeline.db import regulation_pool_store
 
+# Merged static-asset and regulation-pool view, keyed by the asset-related
+# config sections and the pool table revision.
+_registry_lock = threading.Lock()
+_registry: tuple[tuple[Any, ...], dict[str, dict[str, Any]]] | None = None
+
 
 def _normalize_asset(item: dict[str, Any]) -> dict[str, Any]:
     payload = dict(item)
@@ -40,8 +47,16 @@ def _static_pool_to_asset(pool: dict[str, Any]) -> dict[str, Any]:
     }
 
 
-def get_assets(config: dict[str, Any] | None = None) -> list[dict[str, Any]]:
-    cfg = config or load_config() or {}
+def _registry_key(cfg: dict[str, Any]) -> tuple[Any, ...]:
+    static = json.dumps(
+        [cfg.get("assets"), (cfg.get("compliance") or {}).get("regulation_pools")],
+        sort_keys=True,
+        default=str,
+    )
+    return (static, regulation_pool_store.get_revision())
+
+
+def _build_registry(cfg: dict[str, Any]) -> dict[str, dict[str, Any]]:
     static_assets = [
         _normalize_asset(asset)
         for asset in cfg.get("assets", [])
@@ -56,21 +71,47 @@ def get_assets(config: dict[str, Any] | None = None) -> list[dict[str, Any]]:
     for pool in regulation_pool_store.list_pools():
         if pool.get("name"):
             merged[pool["name"]] = _pool_to_asset(pool)
-    return list(merged.values())
+    return merged
+
+
+def get_asset_registry(
+    config: dict[str, Any] | None = None,
+) -> dict[str, dict[str, Any]]:
+    """Return assets by name, rebuilt only when the config or pool table changes.
+
+    The mapping is shared; use `get_assets` or `find_asset` for copies.
+    """
+    global _registry
+    cfg = config or load_cached_config() or {}
+    key = _registry_key(cfg)
+    cached = _registry
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    with _registry_lock:
+        cached = _registry
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        merged = _build_registry(cfg)
+        # Keyed by the revision seen before the rebuild, so a pool saved while
+        # it ran forces another rebuild on the next lookup.
+        _registry = (key, merged)
+    return merged
+
+
+def get_assets(config: dict[str, Any] | None = None) -> list[dict[str, Any]]:
+    return [dict(asset) for asset in get_asset_registry(config).values()]
 
 
 def find_asset(
     system_name: str, config: dict[str, Any] | None = None
 ) -> dict[str, Any] | None:
-    for asset in get_assets(config):
-        if asset.get("name") == system_name:
-            return asset
-    return None
+    asset = get_asset_registry(config).get(system_name)
+    return dict(asset) if asset is not None else None
 
 
 def list_regulation_pools(config: dict[str, Any] | None = None) -> list[dict[str, Any]]:
-    pools = []
-    for asset in get_assets(config):
-        if asset.get("is_regulation_pool"):
-            pools.append(asset)
-    return pools
+    return [
+        dict(asset)
+        for asset in get_asset_registry(config).values()
+        if asset.get("is_regulation_pool")
+    ]
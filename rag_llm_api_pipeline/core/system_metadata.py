@@ -1,13 +1,23 @@
 from __future__ import annotations
 
+import copy
+import hashlib
+import json
+import threading
 from typing import Any
 
 from rag_llm_api_pipeline import __version__
-from rag_llm_api_pipeline.config_loader import load_config
+from rag_llm_api_pipeline.config_loader import (
+    ConfigGeneration,
+    get_config_generation,
+    load_cached_config,
+)
 
+_snapshot_lock = threading.Lock()
+_snapshot: tuple[ConfigGeneration, str, dict[str, Any]] | None = None
 
-def get_system_metadata() -> dict[str, Any]:
-    config = load_config() or {}
+
+def _build_system_metadata(config: dict[str, Any]) -> dict[str, Any]:
     metadata = config.get("system_metadata", {})
     llm_cfg = config.get("llm", {})
     model_cfg = config.get("models", {})
@@ -32,3 +42,29 @@ def get_system_metadata() -> dict[str, Any]:
         "model_version": model_cfg.get("llm_model", "model-version-placeholder"),
         "prompt_version": llm_cfg.get("prompt_version", "prompt-version-placeholder"),
     }
+
+
+def metadata_fingerprint(metadata: dict[str, Any]) -> str:
+    encoded = json.dumps(metadata, ensure_ascii=True, sort_keys=True).encode("ascii")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def get_system_metadata_snapshot() -> tuple[str, dict[str, Any]]:
+    """Return ``(fingerprint, metadata)``, rebuilt only when the config changes.
+
+    The metadata dict is shared; callers must not mutate it.
+    """
+    global _snapshot
+    generation = get_config_generation()
+    snapshot = _snapshot
+    if snapshot is not None and snapshot[0] == generation:
+        return snapshot[1], snapshot[2]
+    with _snapshot_lock:
+        metadata = _build_system_metadata(load_cached_config() or {})
+        fingerprint = metadata_fingerprint(metadata)
+        _snapshot = (generation, fingerprint, metadata)
+    return fingerprint, metadata
+
+
+def get_system_metadata() -> dict[str, Any]:
+    return copy.deepcopy(get_system_metadata_snapshot()[1])
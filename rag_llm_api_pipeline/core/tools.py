@@ -4,8 +4,10 @@ import time
 from typing import Any
 
 from rag_llm_api_pipeline.core.interfaces import (
+    Compressor,
     GenerationResult,
     Generator,
+    Reranker,
     RetrievalResult,
     Retriever,
     Tool,
@@ -20,14 +22,28 @@ class LegacyRetrieverAdapter(Retriever):
         system_name: str,
         question: str,
         model_selection: dict[str, Any] | None = None,
+        top_k: int | None = None,
+        filters: dict[str, Any] | None = None,
+        systems: list[str] | None = None,
     ) -> RetrievalResult:
-        from rag_llm_api_pipeline.retriever import _retrieve_chunks
-
-        chunks, context, chunks_meta, timings = _retrieve_chunks(
-            system_name,
-            question,
-            model_selection=model_selection,
-        )
+        from rag_llm_api_pipeline.retriever import _retrieve_chunks, federated_retrieve
+
+        if systems and len(systems) > 1:
+            chunks, context, chunks_meta, timings = federated_retrieve(
+                systems,
+                question,
+                model_selection=model_selection,
+                top_k=top_k,
+                filters=filters,
+            )
+        else:
+            chunks, context, chunks_meta, timings = _retrieve_chunks(
+                system_name,
+                question,
+                model_selection=model_selection,
+                top_k=top_k,
+                filters=filters,
+            )
         return RetrievalResult(
             question=question,
             chunks=list(chunks),
@@ -37,6 +53,62 @@ class LegacyRetrieverAdapter(Retriever):
         )
 
 
+class CrossEncoderReranker(Reranker):
+    """Precision stage over a larger retrieved candidate set."""
+
+    def rerank(
+        self, retrieval: RetrievalResult, top_k: int | None = None
+    ) -> RetrievalResult:
+        from rag_llm_api_pipeline.reranker import rerank
+
+        chunks, chunks_meta, timings = rerank(
+            retrieval.question,
+            retrieval.chunks,
+            retrieval.chunks_meta,
+            top_k=top_k,
+        )
+        return RetrievalResult(
+            question=retrieval.question,
+            chunks=chunks,
+            context="\n".join(chunks),
+            chunks_meta=chunks_meta,
+            timings={**retrieval.timings, **timings},
+        )
+
+
+class EmbeddingContextCompressor(Compressor):
+    """Keep only the question-relevant sentences of the retrieved chunks."""
+
+    def __init__(self, budget_tokens: int | None = None) -> None:
+        self.budget_tokens = budget_tokens
+
+    def compress(
+        self,
+        retrieval: RetrievalResult,
+        model_selection: dict[str, Any] | None = None,
+    ) -> RetrievalResult:
+        from rag_llm_api_pipeline.compressor import compress_chunks
+
+        chunks, survivors, stats = compress_chunks(
+            retrieval.question,
+            retrieval.chunks,
+            budget_tokens=self.budget_tokens,
+            model_selection=model_selection,
+        )
+        chunks_meta = [
+            retrieval.chunks_meta[i]
+            for i in survivors
+            if i < len(retrieval.chunks_meta)
+        ]
+        return RetrievalResult(
+            question=retrieval.question,
+            chunks=chunks,
+            context="\n".join(chunks),
+            chunks_meta=chunks_meta,
+            timings={**retrieval.timings, "compression": stats},
+        )
+
+
 class LegacyGeneratorAdapter(Generator):
     """Adapter around the existing generation code path."""
 
@@ -60,21 +132,49 @@ class DocumentSearchTool(Tool):
         self,
         retriever: Retriever | None = None,
         generator: Generator | None = None,
+        reranker: Reranker | None = None,
+        compressor: Compressor | None = None,
     ) -> None:
+        from rag_llm_api_pipeline.compressor import get_compression_settings
+        from rag_llm_api_pipeline.reranker import get_rerank_settings
+
         self.retriever = retriever or LegacyRetrieverAdapter()
         self.generator = generator or LegacyGeneratorAdapter()
+        self.rerank_settings = get_rerank_settings()
+        if reranker is None and self.rerank_settings["enabled"]:
+            reranker = CrossEncoderReranker()
+        self.reranker = reranker
+        if compressor is None and get_compression_settings()["enabled"]:
+            compressor = EmbeddingContextCompressor()
+        self.compressor = compressor
 
     def run(self, **kwargs: Any) -> dict[str, Any]:
         system_name = str(kwargs["system_name"])
         question = str(kwargs["question"])
         model_selection = kwargs.get("model_selection")
+        options: dict[str, Any] = {}
+        if kwargs.get("filters"):
+            options["filters"] = kwargs["filters"]
+        systems = list(dict.fromkeys([system_name, *(kwargs.get("systems") or [])]))
+        if len(systems) > 1:
+            options["systems"] = systems
 
         started_at = time.perf_counter()
         retrieval = self.retriever.retrieve(
             system_name,
             question,
             model_selection=model_selection,
+            top_k=self.rerank_settings["candidates"] if self.reranker else None,
+            **options,
         )
+        if self.reranker is not None:
+            retrieval = self.reranker.rerank(
+                retrieval, top_k=self.rerank_settings["top_k"]
+            )
+        if self.compressor is not None:
+            retrieval = self.compressor.compress(
+                retrieval, model_selection=model_selection
+            )
         generation = self.generator.generate(
             question,
             retrieval.context,
@@ -0,0 +1,203 @@
+from __future__ import annotations
+
+import os
+import sqlite3
+from typing import Any
+
+INDEX_SCHEMA_VERSION = 2
+INDEX_SUFFIX = ".index.sqlite3"
+
+_initialized: set[str] = set()
+
+
+def get_db_path(log_path: str) -> str:
+    return f"{log_path}{INDEX_SUFFIX}"
+
+
+def _connect(log_path: str) -> sqlite3.Connection:
+    path = get_db_path(log_path)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def init_db(log_path: str) -> None:
+    path = get_db_path(log_path)
+    if path in _initialized and os.path.exists(path):
+        return
+    with _connect(log_path) as conn:
+        version = int(conn.execute("PRAGMA user_version").fetchone()[0])
+        if version != INDEX_SCHEMA_VERSION:
+            # The index is a derived sidecar; the JSONL segments are the source
+            # of truth, so an outdated layout is dropped and rebuilt on demand.
+            conn.execute("DROP TABLE IF EXISTS audit_index")
+            conn.execute("DROP TABLE IF EXISTS audit_index_segments")
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS audit_index (
+                segment INTEGER NOT NULL,
+                byte_offset INTEGER NOT NULL,
+                byte_length INTEGER NOT NULL,
+                event_type TEXT,
+                trace_id TEXT,
+                review_id TEXT,
+                recorded_at TEXT,
+                PRIMARY KEY (segment, byte_offset)
+            )
+            """
+        )
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS audit_index_segments (
+                segment INTEGER PRIMARY KEY,
+                sealed_at TEXT NOT NULL
+            )
+            """
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_audit_index_trace ON audit_index (trace_id)"
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_audit_index_review "
+            "ON audit_index (review_id)"
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_audit_index_event_type "
+            "ON audit_index (event_type, recorded_at)"
+        )
+        conn.execute(f"PRAGMA user_version = {INDEX_SCHEMA_VERSION}")
+        conn.commit()
+    _initialized.add(path)
+
+
+def add_entries(log_path: str, segment: int, entries: list[dict[str, Any]]) -> int:
+    if not entries:
+        return 0
+    init_db(log_path)
+    with _connect(log_path) as conn:
+        conn.executemany(
+            """
+            INSERT OR REPLACE INTO audit_index (
+                segment,
+                byte_offset,
+                byte_length,
+                event_type,
+                trace_id,
+                review_id,
+                recorded_at
+            )
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            """,
+            [
+                (
+                    int(segment),
+                    int(entry["byte_offset"]),
+                    int(entry["byte_length"]),
+                    entry.get("event_type"),
+                    entry.get("trace_id"),
+                    entry.get("review_id"),
+                    entry.get("recorded_at"),
+                )
+                for entry in entries
+            ],
+        )
+        conn.commit()
+    return len(entries)
+
+
+def indexed_through(log_path: str, segment: int) -> int:
+    """Return the byte position just past the last indexed line of a segment."""
+    init_db(log_path)
+    with _connect(log_path) as conn:
+        row = conn.execute(
+            """
+            SELECT MAX(byte_offset + byte_length) AS end_offset
+            FROM audit_index
+            WHERE segment = ?
+            """,
+            (int(segment),),
+        ).fetchone()
+    return int(row["end_offset"] or 0) if row else 0
+
+
+def sealed_segments(log_path: str) -> set[int]:
+    init_db(log_path)
+    with _connect(log_path) as conn:
+        rows = conn.execute("SELECT segment FROM audit_index_segments").fetchall()
+    return {int(row["segment"]) for row in rows}
+
+
+def mark_sealed(log_path: str, segment: int, sealed_at: str) -> None:
+    init_db(log_path)
+    with _connect(log_path) as conn:
+        conn.execute(
+            """
+            INSERT OR REPLACE INTO audit_index_segments (segment, sealed_at)
+            VALUES (?, ?)
+            """,
+            (int(segment), sealed_at),
+        )
+        conn.commit()
+
+
+def lookup(
+    log_path: str,
+    *,
+    trace_id: str | None = None,
+    review_id: str | None = None,
+    event_type: str | None = None,
+    exclude_event_type: str | None = None,
+    segment: int | None = None,
+    since: str | None = None,
+    until: str | None = None,
+    limit: int | None = None,
+    newest_first: bool = False,
+) -> list[tuple[int, int, int]]:
+    init_db(log_path)
+    clauses: list[str] = []
+    params: list[Any] = []
+    for column, value in (
+        ("trace_id", trace_id),
+        ("review_id", review_id),
+        ("event_type", event_type),
+        ("segment", segment),
+    ):
+        if value is not None:
+            clauses.append(f"{column} = ?")
+            params.append(value)
+    if exclude_event_type is not None:
+        clauses.append("event_type IS NOT ?")
+        params.append(exclude_event_type)
+    if since is not None:
+        clauses.append("recorded_at >= ?")
+        params.append(since)
+    if until is not None:
+        clauses.append("recorded_at <= ?")
+        params.append(until)
+
+    query = "SELECT segment, byte_offset, byte_length FROM audit_index"
+    if clauses:
+        query += " WHERE " + " AND ".join(clauses)
+    order = "DESC" if newest_first else "ASC"
+    query += f" ORDER BY segment {order}, byte_offset {order}"
+    if limit is not None:
+        query += " LIMIT ?"
+        params.append(max(0, int(limit)))
+
+    with _connect(log_path) as conn:
+        rows = conn.execute(query, tuple(params)).fetchall()
+    return [
+        (int(row["segment"]), int(row["byte_offset"]), int(row["byte_length"]))
+        for row in rows
+    ]
+
+
+def reset_segment(log_path: str, segment: int) -> None:
+    init_db(log_path)
+    with _connect(log_path) as conn:
+        conn.execute("DELETE FROM audit_index WHERE segment = ?", (int(segment),))
+        conn.execute(
+            "DELETE FROM audit_index_segments WHERE segment = ?", (int(segment),)
+        )
+        conn.commit()
@@ -3,12 +3,25 @@ from __future__ import annotations
 import json
 import os
 import sqlite3
-from typing import Any
+from typing import Any, Callable
 
 from rag_llm_api_pipeline.config_loader import load_config
 
 DEFAULT_METADATA_DB_PATH = os.path.join("data", "feedback", "result_metadata.sqlite3")
 
+_read_barriers: list[Callable[[], Any]] = []
+
+
+def register_read_barrier(barrier: Callable[[], Any]) -> None:
+    """Run ``barrier`` before every read, e.g. to flush queued writes."""
+    if barrier not in _read_barriers:
+        _read_barriers.append(barrier)
+
+
+def _before_read() -> None:
+    for barrier in _read_barriers:
+        barrier()
+
 
 def get_db_path() -> str:
     config = load_config() or {}
@@ -18,16 +31,16 @@ def get_db_path() -> str:
     )
 
 
-def _connect() -> sqlite3.Connection:
-    path = get_db_path()
+def _connect(path: str | None = None) -> sqlite3.Connection:
+    path = path or get_db_path()
     os.makedirs(os.path.dirname(path), exist_ok=True)
     conn = sqlite3.connect(path)
     conn.row_factory = sqlite3.Row
     return conn
 
 
-def init_db() -> None:
-    with _connect() as conn:
+def init_db(path: str | None = None) -> None:
+    with _connect(path) as conn:
         conn.execute(
             """
             CREATE TABLE IF NOT EXISTS result_records (
@@ -61,10 +74,32 @@ def save_record(
     user_id: str | None = None,
     reviewer_id: str | None = None,
 ) -> dict[str, Any]:
-    init_db()
-    encoded = json.dumps(payload, ensure_ascii=True, sort_keys=True)
-    with _connect() as conn:
-        conn.execute(
+    save_records(
+        [
+            {
+                "event_type": event_type,
+                "created_at": created_at,
+                "payload": payload,
+                "trace_id": trace_id,
+                "review_id": review_id,
+                "status": status,
+                "rating": rating,
+                "system_id": system_id,
+                "user_id": user_id,
+                "reviewer_id": reviewer_id,
+            }
+        ]
+    )
+    return payload
+
+
+def save_records(records: list[dict[str, Any]], db_path: str | None = None) -> int:
+    """Insert several result records in one transaction."""
+    if not records:
+        return 0
+    init_db(db_path)
+    with _connect(db_path) as conn:
+        conn.executemany(
             """
             INSERT INTO result_records (
                 event_type,
@@ -80,24 +115,28 @@ def save_record(
             )
             VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             """,
-            (
-                event_type,
-                trace_id,
-                review_id,
-                status,
-                rating,
-                system_id,
-                user_id,
-                reviewer_id,
-                created_at,
-                encoded,
-            ),
+            [
+                (
+                    record["event_type"],
+                    record.get("trace_id"),
+                    record.get("review_id"),
+                    record.get("status"),
+                    record.get("rating"),
+                    record.get("system_id"),
+                    record.get("user_id"),
+                    record.get("reviewer_id"),
+                    record["created_at"],
+                    json.dumps(record["payload"], ensure_ascii=True, sort_keys=True),
+                )
+                for record in records
+            ],
         )
         conn.commit()
-    return payload
+    return len(records)
 
 
 def list_records(limit: int = 50) -> list[dict[str, Any]]:
+    _before_read()
     init_db()
     safe_limit = max(1, min(limit, 250))
     with _connect() as conn:
@@ -142,6 +181,7 @@ def list_records(limit: int = 50) -> list[dict[str, Any]]:
 
 
 def get_summary() -> dict[str, int]:
+    _before_read()
     init_db()
     summary = {
         "quality_good": 0,
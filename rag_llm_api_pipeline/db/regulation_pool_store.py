@@ -5,15 +5,19 @@ import os
 import sqlite3
 from typing import Any
 
-from rag_llm_api_pipeline.config_loader import load_config
+from rag_llm_api_pipeline.config_loader import load_cached_config
 
 DEFAULT_REGULATION_POOL_DB_PATH = os.path.join(
     "data", "compliance", "regulation_pools.sqlite3"
 )
 
+# Bumped on every write from this process; together with the database file's
+# mtime and size it tells caches when the pool table may have changed.
+_local_revision = 0
+
 
 def get_db_path() -> str:
-    config = load_config() or {}
+    config = load_cached_config() or {}
     compliance_cfg = config.get("compliance", {})
     return os.getenv("KRIONIS_REGULATION_POOL_DB_PATH") or compliance_cfg.get(
         "pool_sqlite_path", DEFAULT_REGULATION_POOL_DB_PATH
@@ -63,9 +67,19 @@ def save_pool(item: dict[str, Any]) -> dict[str, Any]:
             (item["name"], created_at, updated_at, encoded),
         )
         conn.commit()
+    global _local_revision
+    _local_revision += 1
     return item
 
 
+def get_revision() -> tuple[str, int, int, int]:
+    path = get_db_path()
+    if not os.path.exists(path):
+        init_db()
+    stat = os.stat(path)
+    return (path, stat.st_mtime_ns, stat.st_size, _local_revision)
+
+
 def get_pool(name: str) -> dict[str, Any] | None:
     init_db()
     with _connect() as conn:
@@ -0,0 +1,154 @@
+"""
+Near-duplicate chunk elimination for index builds.
+
+Each chunk becomes a set of word shingles, summarized by a MinHash signature.
+Signatures are split into LSH bands; chunks sharing any band bucket are
+candidates. Groups are merged only when every member of the absorbed group
+reaches the threshold against the surviving group's representative (its
+first chunk), so similarity never chains A~B~C into a group where A and C
+differ. Every group is indexed once, through its representative; its
+metadata row lists every member's row, so filters on any member's file,
+type or page still find it.
+"""
+
+from __future__ import annotations
+
+import re
+import zlib
+from collections import defaultdict
+from typing import Any
+
+import numpy as np
+
+_WORD = re.compile(r"\w+")
+_PRIME = (1 << 31) - 1
+
+
+def shingles(text: str, size: int = 3) -> np.ndarray:
+    """CRC32 hashes of the distinct word ``size``-grams of ``text``."""
+    words = _WORD.findall((text or "").lower())
+    if not words:
+        return np.empty(0, dtype=np.uint64)
+    if len(words) <= size:
+        grams = {" ".join(words)}
+    else:
+        grams = {" ".join(words[i : i + size]) for i in range(len(words) - size + 1)}
+    return np.fromiter(
+        (zlib.crc32(gram.encode("utf-8")) for gram in grams),
+        dtype=np.uint64,
+        count=len(grams),
+    )
+
+
+class MinHasher:
+    def __init__(self, num_perm: int = 64, seed: int = 1) -> None:
+        rng = np.random.default_rng(seed)
+        self.a = rng.integers(1, _PRIME, size=num_perm, dtype=np.uint64)
+        self.b = rng.integers(0, _PRIME, size=num_perm, dtype=np.uint64)
+
+    def signature(self, hashes: np.ndarray) -> np.ndarray:
+        # (a * x + b) mod p stays below 2**63 for 32-bit x and 31-bit a, b.
+        return ((self.a[:, None] * hashes[None, :] + self.b[:, None]) % _PRIME).min(
+            axis=1
+        )
+
+
+def near_duplicate_groups(
+    texts: list[str],
+    *,
+    threshold: float = 0.8,
+    num_perm: int = 64,
+    bands: int = 16,
+    shingle_size: int = 3,
+) -> list[int]:
+    """Representative chunk index for every chunk (itself when unique)."""
+    if num_perm % bands:
+        raise ValueError("dedup num_perm must be a multiple of bands.")
+    rows_per_band = num_perm // bands
+    hasher = MinHasher(num_perm)
+    signatures: dict[int, np.ndarray] = {}
+    buckets: dict[tuple[int, bytes], list[int]] = defaultdict(list)
+    for i, text in enumerate(texts):
+        hashes = shingles(text, shingle_size)
+        if not len(hashes):
+            continue
+        signature = hasher.signature(hashes)
+        signatures[i] = signature
+        for band in range(bands):
+            part = signature[band * rows_per_band : (band + 1) * rows_per_band]
+            buckets[(band, part.tobytes())].append(i)
+
+    def _similar(a: int, b: int) -> bool:
+        return float(np.mean(signatures[a] == signatures[b])) >= threshold
+
+    representative = list(range(len(texts)))
+    groups: dict[int, list[int]] = {}
+    checked: set[tuple[int, int]] = set()
+    for members in buckets.values():
+        first = members[0]
+        for other in members[1:]:
+            low, high = sorted((representative[first], representative[other]))
+            if low == high or (low, high) in checked:
+                continue
+            checked.add((low, high))
+            absorbed = groups.get(high, [high])
+            if all(_similar(low, member) for member in absorbed):
+                groups.setdefault(low, [low]).extend(absorbed)
+                groups.pop(high, None)
+                for member in absorbed:
+                    representative[member] = low
+    return representative
+
+
+def dedupe_chunks(
+    texts: list[str],
+    metas: list[dict[str, Any]],
+    rows: list[dict[str, Any]],
+    *,
+    threshold: float = 0.8,
+    num_perm: int = 64,
+    bands: int = 16,
+    shingle_size: int = 3,
+) -> tuple[list[str], list[dict[str, Any]], list[dict[str, Any]], dict[str, Any]]:
+    """Collapse near-duplicate chunks; a kept chunk's meta lists the
+    ``sources`` (file and page) of every chunk merged into it, and its row
+    carries the merged chunks' rows under ``merged``."""
+    representative = near_duplicate_groups(
+        texts,
+        threshold=threshold,
+        num_perm=num_perm,
+        bands=bands,
+        shingle_size=shingle_size,
+    )
+    members: dict[int, list[int]] = defaultdict(list)
+    for i, rep in enumerate(representative):
+        members[rep].append(i)
+
+    kept_texts, kept_metas, kept_rows = [], [], []
+    for rep in sorted(members):
+        group = members[rep]
+        meta = dict(metas[rep])
+        row = rows[rep]
+        if len(group) > 1:
+            meta["sources"] = [
+                {k: rows[i][k] for k in ("file", "page") if rows[i].get(k)}
+                for i in group
+            ]
+            row = {**row, "merged": [rows[i] for i in group[1:]]}
+        kept_texts.append(texts[rep])
+        kept_metas.append(meta)
+        kept_rows.append(row)
+
+    removed = len(texts) - len(kept_texts)
+    removed_chars = sum(
+        len(texts[i]) for i, rep in enumerate(representative) if i != rep
+    )
+    stats = {
+        "chunks_before": len(texts),
+        "chunks_after": len(kept_texts),
+        "removed": removed,
+        "dedup_ratio": round(removed / len(texts), 4) if texts else 0.0,
+        "duplicate_groups": sum(1 for group in members.values() if len(group) > 1),
+        "removed_chars": removed_chars,
+    }
+    return kept_texts, kept_metas, kept_rows, stats
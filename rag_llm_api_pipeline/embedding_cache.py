@@ -0,0 +1,239 @@
+"""
+Persistent embedding cache keyed by chunk text hash.
+
+One cache per (embedding model, normalization) lives in its own directory:
+``vectors.f32`` holds the vectors as raw float32 rows read through a memory
+map, and ``keys.bin`` holds the 16-byte BLAKE2b hash of each row's text in the
+same order. Both files are append-only; vectors are written before their keys.
+Appends hold an exclusive lock on ``lock`` and first cut both files back to
+the rows they share, so a torn append from a crashed writer is discarded
+rather than shifting later rows, and catch up on rows other processes (a CLI
+build next to the server's index worker) appended in the meantime.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, Sequence
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None  # type: ignore[assignment]
+    import msvcrt
+
+_KEY_BYTES = 16
+_FORMAT_VERSION = 1
+
+
+def text_key(text: str) -> bytes:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=_KEY_BYTES).digest()
+
+
+@contextmanager
+def _exclusive(path: str) -> Iterator[None]:
+    with open(path, "a+b") as handle:
+        if fcntl is not None:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+        else:
+            handle.seek(0)
+            msvcrt.locking(handle.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+            else:
+                handle.seek(0)
+                msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class EmbeddingCache:
+    def __init__(self, root: str, model: str, normalized: bool) -> None:
+        slug = re.sub(r"[^A-Za-z0-9._-]+", "_", model).strip("_") or "model"
+        self.path = os.path.join(root, f"{slug}-{'norm' if normalized else 'raw'}")
+        self.model = model
+        self.normalized = normalized
+        self.dim = 0
+        self._count = 0
+        self._rows: dict[bytes, int] = {}
+        self._vectors: np.ndarray | None = None
+        self._lock = threading.Lock()
+        self._view_lock = threading.Lock()
+        if os.path.isdir(self.path):
+            with self._locked():
+                self._sync()
+
+    @property
+    def _vectors_path(self) -> str:
+        return os.path.join(self.path, "vectors.f32")
+
+    @property
+    def _keys_path(self) -> str:
+        return os.path.join(self.path, "keys.bin")
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        os.makedirs(self.path, exist_ok=True)
+        with self._lock, _exclusive(os.path.join(self.path, "lock")):
+            yield
+
+    def _sync(self) -> None:
+        """Bring the in-memory rows up to date with the files; the caller
+        holds the file lock."""
+        try:
+            with open(os.path.join(self.path, "meta.json"), encoding="utf-8") as handle:
+                meta = json.load(handle)
+        except FileNotFoundError:
+            meta = {}
+        if meta.get("version") != _FORMAT_VERSION or meta.get("model") != self.model:
+            self.dim = 0
+            self._publish(0, {})
+            return
+        if int(meta["dim"]) != self.dim:
+            self.dim = int(meta["dim"])
+            self._publish(0, {})
+        row_bytes = 4 * self.dim
+        rows = min(
+            os.path.getsize(self._keys_path) // _KEY_BYTES,
+            os.path.getsize(self._vectors_path) // row_bytes,
+        )
+        # Drop the tail of an interrupted append so the next row lands where
+        # its key says it does.
+        for path, size in (
+            (self._keys_path, rows * _KEY_BYTES),
+            (self._vectors_path, rows * row_bytes),
+        ):
+            if os.path.getsize(path) != size:
+                os.truncate(path, size)
+        # Rows are only ever appended, so new keys go into the live dict
+        # rather than a copy of it; get() treats a row beyond the vector view
+        # it holds as a miss. Only a shrunken file starts a fresh dict.
+        start, known = (self._count, self._rows) if rows >= self._count else (0, {})
+        if rows > start:
+            with open(self._keys_path, "rb") as handle:
+                handle.seek(start * _KEY_BYTES)
+                tail = handle.read((rows - start) * _KEY_BYTES)
+            for i in range(rows - start):
+                known.setdefault(tail[i * _KEY_BYTES : (i + 1) * _KEY_BYTES], start + i)
+        self._publish(rows, known)
+
+    def _publish(self, count: int, rows: dict[bytes, int]) -> None:
+        vectors = (
+            np.memmap(
+                self._vectors_path, dtype="float32", mode="r", shape=(count, self.dim)
+            )
+            if count
+            else None
+        )
+        with self._view_lock:
+            self._count, self._rows, self._vectors = count, rows, vectors
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def get(self, keys: Sequence[bytes]) -> list[np.ndarray | None]:
+        with self._view_lock:
+            rows, vectors = self._rows, self._vectors
+        out: list[np.ndarray | None] = []
+        for key in keys:
+            row = rows.get(key)
+            if row is None or vectors is None or row >= len(vectors):
+                out.append(None)
+            else:
+                out.append(vectors[row])
+        return out
+
+    def put(self, keys: Sequence[bytes], vectors: np.ndarray) -> None:
+        vectors = np.ascontiguousarray(vectors, dtype="float32")
+        if not len(keys):
+            return
+        with self._locked():
+            self._sync()
+            if not self.dim:
+                self.dim = int(vectors.shape[1])
+                for path in (self._vectors_path, self._keys_path):
+                    open(path, "wb").close()
+                with open(
+                    os.path.join(self.path, "meta.json"), "w", encoding="utf-8"
+                ) as handle:
+                    json.dump(
+                        {
+                            "version": _FORMAT_VERSION,
+                            "model": self.model,
+                            "normalized": self.normalized,
+                            "dim": self.dim,
+                        },
+                        handle,
+                    )
+            new: dict[bytes, np.ndarray] = {}
+            for key, vector in zip(keys, vectors):
+                if key not in self._rows:
+                    new.setdefault(key, vector)
+            if not new:
+                return
+            with open(self._vectors_path, "ab") as handle:
+                handle.write(np.stack(list(new.values())).tobytes())
+            with open(self._keys_path, "ab") as handle:
+                handle.write(b"".join(new))
+            self._sync()
+
+
+_OPEN: dict[tuple[str, str, bool], EmbeddingCache] = {}
+_OPEN_LOCK = threading.Lock()
+
+
+def open_cache(root: str, model: str, normalized: bool) -> EmbeddingCache:
+    """The process-wide cache instance for one model and normalization."""
+    key = (os.path.abspath(root), model, normalized)
+    with _OPEN_LOCK:
+        cache = _OPEN.get(key)
+        if cache is None:
+            cache = _OPEN[key] = EmbeddingCache(key[0], model, normalized)
+        return cache
+
+
+def encode_with_cache(
+    encode: Callable[[list[str]], np.ndarray],
+    texts: Sequence[str],
+    cache: EmbeddingCache | None,
+    *,
+    batch_size: int = 32,
+) -> tuple[np.ndarray, dict[str, Any]]:
+    """Vectors for ``texts``, encoding only texts neither cached nor seen
+    earlier in ``texts``. ``encode`` must return final (normalized) vectors."""
+    keys = [text_key(text) for text in texts]
+    cached = cache.get(keys) if cache is not None else [None] * len(texts)
+    pending: dict[bytes, str] = {}
+    for key, text, vector in zip(keys, texts, cached):
+        if vector is None and key not in pending:
+            pending[key] = text
+    fresh: dict[bytes, np.ndarray] = {}
+    pending_keys = list(pending)
+    for offset in range(0, len(pending_keys), batch_size):
+        batch = pending_keys[offset : offset + batch_size]
+        vectors = np.asarray(encode([pending[k] for k in batch]), dtype="float32")
+        fresh.update(zip(batch, vectors))
+        if cache is not None:
+            cache.put(batch, vectors)
+    embeddings = np.stack(
+        [
+            vector if vector is not None else fresh[key]
+            for key, vector in zip(keys, cached)
+        ]
+    ).astype("float32", copy=False)
+    hits = sum(vector is not None for vector in cached)
+    return embeddings, {
+        "chunks": len(texts),
+        "cache_hits": hits,
+        "duplicates_in_build": len(texts) - hits - len(pending),
+        "encoded": len(pending),
+        "hit_rate": round(hits / len(texts), 4) if texts else 0.0,
+    }
@@ -0,0 +1,193 @@
+"""
+Versioned index builds published through an atomic pointer file.
+
+Each build writes its artifacts into ``<index_dir>/<base>.versions/<build_id>/``
+and is published by replacing ``<base>.current`` (a small JSON file naming the
+build) with ``os.replace``. Readers resolve the pointer once per query and then
+only read the immutable build directory, so a rebuild never mixes a new FAISS
+file with old texts. The previous builds are kept (``keep``) so readers that
+resolved the old pointer can finish. Pruning also skips builds that are still
+being written (they carry a ``.building`` marker until published) and builds
+retired less than ``grace_sec`` ago, so two quick rebuilds cannot delete a
+build a reader has resolved but not loaded yet.
+
+Indexes built before versioning live directly in ``index_dir`` and are used
+when no pointer exists.
+"""
+
+from __future__ import annotations
+
+import datetime as dt
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from typing import Any
+
+_POINTERS: dict[str, tuple[tuple[int, int, int], dict[str, Any]]] = {}
+_POINTER_LOCK = threading.Lock()
+
+BUILDING_MARKER = ".building"
+DEFAULT_KEEP_VERSIONS = 2
+DEFAULT_GRACE_SEC = 120.0
+
+
+def new_build_id() -> str:
+    now = dt.datetime.now(dt.timezone.utc)
+    return f"{now:%Y%m%dT%H%M%S%fZ}-{uuid.uuid4().hex[:8]}"
+
+
+def pointer_path(index_dir: str, base: str) -> str:
+    return os.path.join(index_dir, f"{base}.current")
+
+
+def versions_dir(index_dir: str, base: str) -> str:
+    return os.path.join(index_dir, f"{base}.versions")
+
+
+def version_dir(index_dir: str, base: str, build_id: str) -> str:
+    return os.path.join(versions_dir(index_dir, base), build_id)
+
+
+def artifact_paths(index_dir: str, base: str, build_id: str | None) -> dict[str, str]:
+    """Artifact files of ``build_id``, or of the unversioned flat layout in
+    ``index_dir`` when there is no build id."""
+    root = version_dir(index_dir, base, build_id) if build_id else index_dir
+    return {
+        "faiss": os.path.join(root, f"{base}.faiss"),
+        "texts": os.path.join(root, f"{base}_texts.pkl"),
+        "meta": os.path.join(root, f"{base}_meta.pkl"),
+        "normflag": os.path.join(root, f"{base}.normflag"),
+        "bm25": os.path.join(root, f"{base}_bm25.pkl"),
+        "columns": os.path.join(root, f"{base}_columns.pkl"),
+        "shards": os.path.join(root, f"{base}.shards.json"),
+    }
+
+
+def publish_settings(retriever_cfg: dict[str, Any]) -> tuple[int, float]:
+    """``(keep_versions, grace_sec)`` from ``retriever.publish``."""
+    publish_cfg = retriever_cfg.get("publish", {}) or {}
+    keep = int(publish_cfg.get("keep_versions", DEFAULT_KEEP_VERSIONS))
+    _check_keep(keep)
+    return keep, float(publish_cfg.get("grace_sec", DEFAULT_GRACE_SEC))
+
+
+def _check_keep(keep: int) -> None:
+    if keep < 2:
+        raise ValueError(
+            f"keep_versions must be at least 2 (got {keep}): the previous build "
+            "has to outlive readers that resolved it before the swap."
+        )
+
+
+def begin_build(index_dir: str, base: str, build_id: str) -> str:
+    """Create the directory of an unpublished build, marked so that prune
+    leaves it alone until it is published."""
+    path = version_dir(index_dir, base, build_id)
+    os.makedirs(path)
+    with open(os.path.join(path, BUILDING_MARKER), "w", encoding="utf-8"):
+        pass
+    return path
+
+
+def read_pointer(index_dir: str, base: str) -> dict[str, Any] | None:
+    """The published build record, or None for unversioned indexes. Parsed
+    once per pointer change; later calls cost one ``stat``."""
+    path = pointer_path(index_dir, base)
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    # os.replace gives every publish a new inode.
+    stamp = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+    with _POINTER_LOCK:
+        cached = _POINTERS.get(path)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+    with open(path, encoding="utf-8") as handle:
+        record = json.load(handle)
+    with _POINTER_LOCK:
+        _POINTERS[path] = (stamp, record)
+    return record
+
+
+def publish(
+    index_dir: str,
+    base: str,
+    build_id: str,
+    record: dict[str, Any],
+    keep: int = DEFAULT_KEEP_VERSIONS,
+    grace_sec: float = DEFAULT_GRACE_SEC,
+) -> dict[str, Any]:
+    """Point ``base`` at ``build_id`` atomically and prune all but the newest
+    ``keep`` builds (the new one included)."""
+    _check_keep(keep)
+    previous = read_pointer(index_dir, base)
+    record = {
+        **record,
+        "build_id": build_id,
+        "published_at": dt.datetime.now(dt.timezone.utc).isoformat(),
+        "previous_build_id": previous.get("build_id") if previous else None,
+    }
+    path = pointer_path(index_dir, base)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as handle:
+        json.dump(record, handle, indent=2)
+        handle.flush()
+        os.fsync(handle.fileno())
+    marker = os.path.join(version_dir(index_dir, base, build_id), BUILDING_MARKER)
+    if os.path.exists(marker):
+        os.remove(marker)
+    os.replace(tmp_path, path)
+    if previous and previous.get("build_id"):
+        # The retired build's mtime starts its grace period.
+        retired = version_dir(index_dir, base, str(previous["build_id"]))
+        if os.path.isdir(retired):
+            os.utime(retired)
+    prune(index_dir, base, keep=keep, grace_sec=grace_sec)
+    return record
+
+
+def list_builds(index_dir: str, base: str) -> list[str]:
+    """Build ids on disk, oldest first (ids sort by build time)."""
+    root = versions_dir(index_dir, base)
+    if not os.path.isdir(root):
+        return []
+    return sorted(
+        name for name in os.listdir(root) if os.path.isdir(os.path.join(root, name))
+    )
+
+
+def prune(
+    index_dir: str,
+    base: str,
+    keep: int = DEFAULT_KEEP_VERSIONS,
+    grace_sec: float = DEFAULT_GRACE_SEC,
+) -> list[str]:
+    """Remove all but the published build and the newest ``keep - 1`` others,
+    skipping unpublished builds and builds retired within ``grace_sec``."""
+    _check_keep(keep)
+    current = read_pointer(index_dir, base)
+    current_id = current.get("build_id") if current else None
+    builds = [
+        b
+        for b in list_builds(index_dir, base)
+        if b != current_id
+        and not os.path.exists(
+            os.path.join(version_dir(index_dir, base, b), BUILDING_MARKER)
+        )
+    ]
+    cutoff = time.time() - grace_sec
+    removed = []
+    for build_id in builds[: max(0, len(builds) - (keep - 1))]:
+        path = version_dir(index_dir, base, build_id)
+        try:
+            if os.stat(path).st_mtime > cutoff:
+                continue
+        except FileNotFoundError:
+            continue
+        shutil.rmtree(path, ignore_errors=True)
+        removed.append(build_id)
+    return removed
@@ -0,0 +1,102 @@
+"""
+BM25 inverted index over the same chunk ids as the FAISS index.
+
+Dense embeddings match part numbers, alarm codes and parameter names poorly;
+exact-term scoring catches them. Postings are kept as flat typed arrays
+(chunk ids and term frequencies per term) so the index pickles compactly.
+"""
+
+from __future__ import annotations
+
+import heapq
+import math
+import re
+from array import array
+from collections import Counter
+from typing import Iterable, Sequence
+
+# Words plus compound codes such as "P-101", "E42.3" or "valve_2b".
+_TOKEN = re.compile(r"[a-z0-9]+(?:[-_./][a-z0-9]+)*")
+_SPLIT = re.compile(r"[-_./]")
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercased terms; compound codes also yield their parts, so "P-101"
+    matches both "p-101" and "101"."""
+    terms: list[str] = []
+    for token in _TOKEN.findall((text or "").lower()):
+        terms.append(token)
+        if _SPLIT.search(token):
+            terms.extend(part for part in _SPLIT.split(token) if part)
+    return terms
+
+
+class BM25Index:
+    __slots__ = ("k1", "b", "terms", "doc_ids", "freqs", "doc_len", "avgdl")
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75) -> None:
+        self.k1 = k1
+        self.b = b
+        self.terms: dict[str, int] = {}  # term -> posting list slot
+        self.doc_ids: list[array] = []
+        self.freqs: list[array] = []
+        self.doc_len = array("I")
+        self.avgdl = 0.0
+
+    @classmethod
+    def build(
+        cls, texts: Iterable[str], k1: float = 1.2, b: float = 0.75
+    ) -> "BM25Index":
+        index = cls(k1, b)
+        for doc_id, text in enumerate(texts):
+            counts = Counter(tokenize(text))
+            index.doc_len.append(sum(counts.values()))
+            for term, tf in counts.items():
+                slot = index.terms.get(term)
+                if slot is None:
+                    slot = index.terms[term] = len(index.doc_ids)
+                    index.doc_ids.append(array("I"))
+                    index.freqs.append(array("I"))
+                index.doc_ids[slot].append(doc_id)
+                index.freqs[slot].append(tf)
+        if index.doc_len:
+            index.avgdl = sum(index.doc_len) / len(index.doc_len)
+        return index
+
+    def __len__(self) -> int:
+        return len(self.doc_len)
+
+    def search(
+        self, query: str, top_k: int, allowed: Sequence[bool] | None = None
+    ) -> list[tuple[int, float]]:
+        """Best ``top_k`` (chunk id, score) pairs; ``allowed`` masks chunk ids."""
+        n = len(self.doc_len)
+        if not n or top_k <= 0:
+            return []
+        scores: dict[int, float] = {}
+        k1, b, avgdl = self.k1, self.b, self.avgdl or 1.0
+        for term in set(tokenize(query)):
+            slot = self.terms.get(term)
+            if slot is None:
+                continue
+            ids, tfs = self.doc_ids[slot], self.freqs[slot]
+            idf = math.log(1.0 + (n - len(ids) + 0.5) / (len(ids) + 0.5))
+            for doc_id, tf in zip(ids, tfs):
+                if allowed is not None and not allowed[doc_id]:
+                    continue
+                norm = k1 * (1.0 - b + b * self.doc_len[doc_id] / avgdl)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (k1 + 1) / (
+                    tf + norm
+                )
+        return heapq.nlargest(top_k, scores.items(), key=lambda item: item[1])
+
+
+def reciprocal_rank_fusion(
+    rankings: Sequence[Sequence[int]], k: int = 60
+) -> list[tuple[int, float]]:
+    """Fuse ranked id lists by sum of 1 / (k + rank), best first."""
+    fused: dict[int, float] = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            fused[doc_id] = fused.get(doc_id, 0.0) + 1.0 / (k + rank)
+    return sorted(fused.items(), key=lambda item: item[1], reverse=True)
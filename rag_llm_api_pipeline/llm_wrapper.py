@@ -164,19 +164,42 @@ def _build_gen_kwargs(llm_cfg: dict[str, Any], tokenizer: Any) -> dict[str, Any]
     return gen_kwargs
 
 
+def _stop_texts(stop_strings: list[str] | None) -> list[str]:
+    # Matched case-insensitively against stripped text, so whitespace-only
+    # stop strings never match.
+    return [
+        value.strip().lower()
+        for value in (stop_strings or [])
+        if value and value.strip()
+    ]
+
+
+def _cut_at_stop(text: str, stop_texts: list[str]) -> str:
+    """``text`` up to and including its earliest stop string, which is where
+    generation of this sequence alone would have stopped."""
+    lowered = text.lower()
+    ends = [
+        found + len(stop) for stop in stop_texts if (found := lowered.find(stop)) >= 0
+    ]
+    return text[: min(ends)] if ends else text
+
+
 def _stop_on_sequences_class():
     transformers = _transformers()
     base = transformers["StoppingCriteria"]
 
     class _StopOnSequences(base):
+        """Marks each sequence done once its text first ends in a stop string.
+
+        Returns one flag per row, so ``generate`` pads finished rows with the
+        pad token and the batch ends as soon as every row is done."""
+
         def __init__(self, stop_strings: list[str], tokenizer: Any):
-            self._stop_texts = [
-                value.strip().lower()
-                for value in (stop_strings or [])
-                if value and value.strip()
-            ]
+            self._stop_texts = _stop_texts(stop_strings)
             self._tok = tokenizer
             self._max_len = 0
+            self._done = None
+            self._length = 0
             if self._stop_texts:
                 self._stop_ids = [
                     tokenizer.encode(value, add_special_tokens=False)
@@ -185,17 +208,29 @@ def _stop_on_sequences_class():
                 self._max_len = max((len(value) for value in self._stop_ids), default=0)
 
         def __call__(self, input_ids, scores, **kwargs):
+            torch = _torch()
+            rows, length = int(input_ids.shape[0]), int(input_ids.shape[-1])
+            if (
+                self._done is None
+                or self._done.shape[0] != rows
+                or length != self._length + 1
+            ):
+                # The pipeline reuses the criterion for each of its batches;
+                # every generate() call starts from a fresh mask.
+                self._done = torch.zeros(
+                    rows, dtype=torch.bool, device=input_ids.device
+                )
+            self._length = length
             if self._max_len == 0:
-                return False
-            for seq in input_ids:
-                tail_ids = seq[-self._max_len :].tolist()
+                return self._done.clone()
+            for row in torch.nonzero(~self._done).flatten().tolist():
+                tail_ids = input_ids[row, -self._max_len :].tolist()
                 tail_text = (
                     self._tok.decode(tail_ids, skip_special_tokens=True).strip().lower()
                 )
-                for stop_text in self._stop_texts:
-                    if tail_text.endswith(stop_text):
-                        return True
-            return False
+                if any(tail_text.endswith(stop) for stop in self._stop_texts):
+                    self._done[row] = True
+            return self._done.clone()
 
     return _StopOnSequences
 
@@ -243,6 +278,8 @@ def _load_runtime(model_selection: dict[str, Any] | None = None) -> dict[str, An
     )
     if tokenizer.pad_token_id is None and tokenizer.eos_token_id is not None:
         tokenizer.pad_token_id = tokenizer.eos_token_id
+    # Decoder-only models must be left-padded for batched generation.
+    tokenizer.padding_side = "left"
 
     model = transformers["AutoModelForCausalLM"].from_pretrained(
         model_name,
@@ -277,6 +314,17 @@ def _load_runtime(model_selection: dict[str, Any] | None = None) -> dict[str, An
 
 
 def ask_llm(question: str, context: str, model_selection: dict[str, Any] | None = None):
+    return ask_llm_batch([(question, context)], model_selection=model_selection)[0]
+
+
+def ask_llm_batch(
+    requests: list[tuple[str, str]],
+    model_selection: dict[str, Any] | None = None,
+) -> list[tuple[str, dict[str, Any]]]:
+    """Generate answers for several ``(question, context)`` pairs in one
+    padded pipeline call; returns ``(text, stats)`` per request."""
+    if not requests:
+        return []
     state = _load_runtime(model_selection=model_selection)
     llm_cfg = state["llm_cfg"]
     tokenizer = state["tokenizer"]
@@ -289,33 +337,47 @@ def ask_llm(question: str, context: str, model_selection: dict[str, Any] | None
             "Question: {question}\n\nContext:\n{context}\n\nAnswer:"
         ),
     )
-    prompt = _truncate_rag_prompt(
-        tokenizer=tokenizer,
-        question=question,
-        context=context,
-        template=template,
-        max_len=_model_max_input(tokenizer, llm_cfg),
-    )
+    max_len = _model_max_input(tokenizer, llm_cfg)
+    prompts = [
+        _truncate_rag_prompt(
+            tokenizer=tokenizer,
+            question=question,
+            context=context,
+            template=template,
+            max_len=max_len,
+        )
+        for question, context in requests
+    ]
     gen_kwargs = _build_gen_kwargs(llm_cfg, tokenizer)
     gen_kwargs = _maybe_add_stopping_criteria(gen_kwargs, llm_cfg, tokenizer)
+    batch_size = max(1, min(len(prompts), int(llm_cfg.get("max_batch_size", 8))))
 
     started_at = time.perf_counter()
-    out = state["pipeline"](prompt, **gen_kwargs)
+    outputs = state["pipeline"](prompts, batch_size=batch_size, **gen_kwargs)
     finished_at = time.perf_counter()
-    text = (out[0]["generated_text"] if out else "").strip()
-    gen_tokens = len(tokenizer.encode(text)) if text else 0
     gen_time = max(finished_at - started_at, 1e-9)
-    stats = {
-        "gen_time_sec": round(gen_time, 4),
-        "gen_tokens": gen_tokens,
-        "tokens_per_sec": round(gen_tokens / gen_time, 3),
-        "runtime_profile": runtime.get("runtime_profile"),
-        "inference_model": runtime.get("inference_model"),
-        "embedding_model": runtime.get("embedding_model"),
-        "device": state["device"],
-        "quantization_backend": state["quantization_backend"],
-    }
-    return text, stats
+    stop_texts = _stop_texts(llm_cfg.get("stop_sequences"))
+
+    results: list[tuple[str, dict[str, Any]]] = []
+    for out in outputs:
+        # A list input yields one list of candidates per prompt.
+        first = out[0] if isinstance(out, list) and out else out
+        text = first.get("generated_text", "") if first else ""
+        text = _cut_at_stop(text, stop_texts).strip()
+        gen_tokens = len(tokenizer.encode(text)) if text else 0
+        stats = {
+            "gen_time_sec": round(gen_time, 4),
+            "gen_tokens": gen_tokens,
+            "tokens_per_sec": round(gen_tokens / gen_time, 3),
+            "batch_size": len(prompts),
+            "runtime_profile": runtime.get("runtime_profile"),
+            "inference_model": runtime.get("inference_model"),
+            "embedding_model": runtime.get("embedding_model"),
+            "device": state["device"],
+            "quantization_backend": state["quantization_backend"],
+        }
+        results.append((text, stats))
+    return results
 
 
 class LLMWrapper:
@@ -4,6 +4,9 @@
 # does not fail in minimal environments (e.g., CI import sanity checks).
 import os
 
+# Bump when extraction output changes so cached parses are not reused.
+LOADER_VERSION = "1"
+
 SUPPORTED_TEXT = [".txt"]
 SUPPORTED_PDF = [".pdf"]
 SUPPORTED_IMG = [".jpg", ".jpeg", ".png"]
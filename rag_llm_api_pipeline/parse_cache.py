@@ -0,0 +1,88 @@
+"""
+Content-addressed cache of parsed documents.
+
+PDF extraction, OCR and transcription depend only on the file bytes, the
+loader version and the OCR language, never on the embedding model. Their
+output is stored once under a hash of those three and reused by every index
+variant build and by compliance document assessment.
+"""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import os
+from typing import Any
+
+from rag_llm_api_pipeline import loader
+from rag_llm_api_pipeline.config_loader import load_cached_config
+
+_READ_CHUNK = 1 << 20
+
+
+def file_digest(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for block in iter(lambda: handle.read(_READ_CHUNK), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def cache_key(digest: str, ocr_lang: str) -> str:
+    raw = f"{digest}:{loader.LOADER_VERSION}:{ocr_lang}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _entry_path(cache_dir: str, key: str) -> str:
+    return os.path.join(cache_dir, key[:2], f"{key}.json.gz")
+
+
+def get_loader_settings(config: dict[str, Any] | None = None) -> dict[str, Any]:
+    cfg = config if config is not None else load_cached_config() or {}
+    loader_cfg = cfg.get("loader", {}) or {}
+    return {
+        "ocr_lang": str(loader_cfg.get("ocr_lang") or "eng"),
+        "enabled": bool(loader_cfg.get("parse_cache_enabled", True)),
+        "cache_dir": str(loader_cfg.get("parse_cache_dir") or "data/parse_cache"),
+    }
+
+
+def load_docs_cached(
+    path: str, config: dict[str, Any] | None = None
+) -> tuple[list[str], bool]:
+    """``loader.load_docs`` through the parse cache; returns (parts, cache hit).
+
+    Empty results are not cached: loaders return nothing when an optional
+    extraction dependency is missing, and installing it should take effect."""
+    settings = get_loader_settings(config)
+    path = os.path.abspath(path)
+    if not settings["enabled"]:
+        return loader.load_docs(path, ocr_lang=settings["ocr_lang"]), False
+
+    key = cache_key(file_digest(path), settings["ocr_lang"])
+    entry_path = _entry_path(settings["cache_dir"], key)
+    try:
+        with gzip.open(entry_path, "rt", encoding="utf-8") as handle:
+            return list(json.load(handle)["parts"]), True
+    except FileNotFoundError:
+        pass
+    except (OSError, ValueError, KeyError) as exc:
+        print(f"[WARN] Ignoring unreadable parse cache entry {entry_path}: {exc}")
+
+    parts = loader.load_docs(path, ocr_lang=settings["ocr_lang"])
+    if parts:
+        os.makedirs(os.path.dirname(entry_path), exist_ok=True)
+        tmp_path = f"{entry_path}.{os.getpid()}.tmp"
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as handle:
+            json.dump(
+                {
+                    "loader_version": loader.LOADER_VERSION,
+                    "ocr_lang": settings["ocr_lang"],
+                    "source": os.path.basename(path),
+                    "parts": parts,
+                },
+                handle,
+            )
+        os.replace(tmp_path, entry_path)
+    return parts, False
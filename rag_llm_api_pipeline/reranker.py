@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Sequence
+
+from rag_llm_api_pipeline.config_loader import load_cached_config
+
+DEFAULT_RERANK_MODEL = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+
+_CROSS_ENCODERS: dict[str, Any] = {}
+_MODEL_LOCK = threading.Lock()
+
+# (model, pair digest) -> score, least recently used first.
+_SCORE_CACHE: OrderedDict[tuple[str, bytes], float] = OrderedDict()
+_CACHE_LOCK = threading.Lock()
+_cache_stats = {"hits": 0, "misses": 0}
+
+
+def get_rerank_settings(config: dict[str, Any] | None = None) -> dict[str, Any]:
+    config = config if config is not None else load_cached_config()
+    retriever_cfg = (config or {}).get("retriever", {}) or {}
+    raw = retriever_cfg.get("rerank", {}) or {}
+    top_k = int(raw.get("top_k", retriever_cfg.get("top_k", 5)))
+    return {
+        "enabled": bool(raw.get("enabled", False)),
+        "model": str(raw.get("model") or DEFAULT_RERANK_MODEL),
+        "candidates": max(int(raw.get("candidates", 30)), top_k),
+        "top_k": top_k,
+        "batch_size": int(raw.get("batch_size", 32)),
+        "cache_size": int(raw.get("cache_size", 20000)),
+    }
+
+
+def _cross_encoder(model_name: str):
+    from sentence_transformers import CrossEncoder
+
+    with _MODEL_LOCK:
+        model = _CROSS_ENCODERS.get(model_name)
+        if model is None:
+            model = CrossEncoder(model_name)
+            _CROSS_ENCODERS[model_name] = model
+    return model
+
+
+def _pair_key(model_name: str, query: str, text: str) -> tuple[str, bytes]:
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(query.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(text.encode("utf-8"))
+    return model_name, digest.digest()
+
+
+def score_pairs(
+    pairs: Sequence[tuple[str, str]],
+    *,
+    model_name: str | None = None,
+    batch_size: int | None = None,
+) -> tuple[list[float], int]:
+    """Cross-encoder scores for (query, text) pairs and the number of cache hits.
+
+    Cached pairs are answered from the LRU; the rest go to the model in one
+    ``predict`` call, which batches them by ``batch_size``."""
+    settings = get_rerank_settings()
+    model_name = model_name or settings["model"]
+    keys = [_pair_key(model_name, str(q), str(t)) for q, t in pairs]
+    scores: list[float | None] = [None] * len(keys)
+    with _CACHE_LOCK:
+        for i, key in enumerate(keys):
+            cached = _SCORE_CACHE.get(key)
+            if cached is not None:
+                _SCORE_CACHE.move_to_end(key)
+                scores[i] = cached
+    missing = [i for i, score in enumerate(scores) if score is None]
+    hits = len(keys) - len(missing)
+
+    if missing:
+        model = _cross_encoder(model_name)
+        predicted = model.predict(
+            [(str(pairs[i][0]), str(pairs[i][1])) for i in missing],
+            batch_size=batch_size or settings["batch_size"],
+        )
+        with _CACHE_LOCK:
+            for i, value in zip(missing, predicted):
+                scores[i] = float(value)
+                _SCORE_CACHE[keys[i]] = float(value)
+            while len(_SCORE_CACHE) > settings["cache_size"]:
+                _SCORE_CACHE.popitem(last=False)
+    with _CACHE_LOCK:
+        _cache_stats["hits"] += hits
+        _cache_stats["misses"] += len(missing)
+    return [float(score or 0.0) for score in scores], hits
+
+
+def rerank(
+    question: str,
+    chunks: Sequence[str],
+    chunks_meta: Sequence[dict[str, Any]] | None = None,
+    *,
+    top_k: int | None = None,
+) -> tuple[list[str], list[dict[str, Any]], dict[str, Any]]:
+    """Reorder retrieved chunks by cross-encoder score and keep the top_k."""
+    settings = get_rerank_settings()
+    top_k = top_k or settings["top_k"]
+    metas = list(chunks_meta or [{} for _ in chunks])
+    started_at = time.perf_counter()
+    scores, hits = score_pairs([(question, chunk) for chunk in chunks])
+    order = sorted(range(len(chunks)), key=lambda i: scores[i], reverse=True)[:top_k]
+
+    ranked_chunks = [chunks[i] for i in order]
+    ranked_meta = []
+    for rank, i in enumerate(order, start=1):
+        item = dict(metas[i]) if i < len(metas) else {}
+        item["retrieval_rank"] = item.get("rank", i + 1)
+        item["rank"] = rank
+        item["rerank_score"] = round(scores[i], 6)
+        ranked_meta.append(item)
+    timings = {
+        "rerank_sec": round(time.perf_counter() - started_at, 4),
+        "rerank_model": settings["model"],
+        "rerank_candidates": len(chunks),
+        "rerank_cache_hits": hits,
+    }
+    return ranked_chunks, ranked_meta, timings
+
+
+def get_rerank_cache_status() -> dict[str, Any]:
+    with _CACHE_LOCK:
+        return {"entries": len(_SCORE_CACHE), **_cache_stats}
@@ -2,21 +2,70 @@ from __future__ import annotations
 
 import os
 import pickle
+import shutil
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from typing import Any
 
 import numpy as np
 
-from rag_llm_api_pipeline.config_loader import load_config
+from rag_llm_api_pipeline.chunk_meta import ChunkColumns, chunk_rows
+from rag_llm_api_pipeline.config_loader import load_cached_config, load_config
 from rag_llm_api_pipeline.core.model_selection import (
     embedding_index_slug,
     resolve_runtime_selection,
 )
 from rag_llm_api_pipeline.core.system_assets import find_asset
-from rag_llm_api_pipeline.loader import load_docs
+from rag_llm_api_pipeline.dedup import dedupe_chunks
+from rag_llm_api_pipeline.embedding_cache import encode_with_cache, open_cache
+from rag_llm_api_pipeline.index_versions import (
+    artifact_paths,
+    begin_build,
+    new_build_id,
+    pointer_path,
+    publish,
+    publish_settings,
+    read_pointer,
+)
+from rag_llm_api_pipeline.lexical import BM25Index, reciprocal_rank_fusion
+from rag_llm_api_pipeline.parse_cache import load_docs_cached
+from rag_llm_api_pipeline.shards import ShardedIndex, open_sharded_index, write_shards
+from rag_llm_api_pipeline.vector_storage import (
+    bytes_per_vector,
+    new_flat_index,
+    resolve_vector_storage,
+    storage_report,
+)
 
 _EMBEDDERS: dict[str, Any] = {}
 
+SEARCH_MODES = ("vector", "lexical", "hybrid")
+
+
+@dataclass
+class _LoadedIndex:
+    stamp: tuple
+    index: Any
+    texts: list[str]
+    metas: list[dict[str, Any]]
+    lexical: BM25Index | None = None
+    columns: ChunkColumns | None = None
+    build_id: str = ""
+    # Guards the lazily built BM25 postings and columns of this entry only.
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+
+# pointer path -> loaded artifacts of the published build; replaced when a new
+# build is published (or, for unversioned indexes, when files are rewritten).
+# _INDEX_LOCK only guards the dicts; loads run under the pointer's own lock, so
+# a cold load of one system never blocks queries against another.
+_INDEXES: dict[str, _LoadedIndex] = {}
+_LOAD_LOCKS: dict[str, threading.Lock] = {}
+_INDEX_LOCK = threading.Lock()
+_FEDERATION_POOL: tuple[int, ThreadPoolExecutor] | None = None
+
 
 def _faiss():
     import faiss
@@ -39,16 +88,23 @@ def _now() -> float:
 
 
 def _artifact_paths(
-    index_dir: str, system_name: str, runtime: dict[str, Any]
+    index_dir: str,
+    system_name: str,
+    runtime: dict[str, Any],
+    build_id: str | None = None,
 ) -> dict[str, str]:
+    """Artifact paths of ``build_id``, by default the published build; indexes
+    built before versioning resolve to flat files in ``index_dir``."""
     suffix = embedding_index_slug(runtime)
     base = f"{system_name}--{suffix}"
+    if build_id is None:
+        current = read_pointer(index_dir, base)
+        build_id = str(current["build_id"]) if current else ""
     return {
-        "faiss": os.path.join(index_dir, f"{base}.faiss"),
-        "texts": os.path.join(index_dir, f"{base}_texts.pkl"),
-        "meta": os.path.join(index_dir, f"{base}_meta.pkl"),
-        "normflag": os.path.join(index_dir, f"{base}.normflag"),
+        **artifact_paths(index_dir, base, build_id),
         "variant": suffix,
+        "build_id": build_id,
+        "pointer": pointer_path(index_dir, base),
     }
 
 
@@ -64,6 +120,24 @@ def _maybe_normalize(vectors: np.ndarray, normalize_embeddings: bool) -> np.ndar
     return vectors
 
 
+def embed_texts(
+    texts: list[str], model_selection: dict[str, Any] | None = None
+) -> np.ndarray:
+    """Encode texts in ``retriever.encode_batch_size`` batches with the runtime's
+    embedding model, normalized the same way the index was built."""
+    config = load_cached_config() or {}
+    retriever_cfg = config.get("retriever", {}) or {}
+    runtime = resolve_runtime_selection(config, overrides=model_selection)
+    embedder = _get_embedder(runtime)
+    vectors = embedder.encode(
+        list(texts), batch_size=int(retriever_cfg.get("encode_batch_size", 32))
+    )
+    return _maybe_normalize(
+        np.asarray(vectors, dtype="float32"),
+        bool(retriever_cfg.get("normalize_embeddings", False)),
+    )
+
+
 def build_index(
     system_name: str, model_selection: dict[str, Any] | None = None
 ) -> dict[str, Any]:
@@ -78,6 +152,8 @@ def build_index(
     system = find_asset(system_name, config)
     if not system:
         raise ValueError(f"System '{system_name}' not found in assets list.")
+    storage = resolve_vector_storage(config.get("retriever", {}) or {}, system_name)
+    keep_versions, grace_sec = publish_settings(config.get("retriever", {}) or {})
 
     data_dir = system.get("docs_dir") or config["settings"]["data_dir"]
     docs = system.get("docs", [])
@@ -93,17 +169,33 @@ def build_index(
     total_started_at = _now()
     texts: list[str] = []
     metas: list[dict[str, Any]] = []
+    rows: list[dict[str, Any]] = []
+    doc_metadata = system.get("doc_metadata") or {}
 
     for doc in docs:
         full_path = os.path.abspath(os.path.join(data_dir, doc))
         started_at = _now()
         try:
-            parts = load_docs(full_path)
+            parts, cached = load_docs_cached(full_path, config)
             texts.extend(parts)
             metas.extend([{"file": doc}] * len(parts))
+            rows.extend(
+                chunk_rows(
+                    doc,
+                    full_path,
+                    len(parts),
+                    pool=system_name,
+                    overrides=doc_metadata.get(doc),
+                )
+            )
             elapsed = _now() - started_at
             timings["load_parse"].append(
-                {"file": doc, "chunks": len(parts), "sec": round(elapsed, 4)}
+                {
+                    "file": doc,
+                    "chunks": len(parts),
+                    "sec": round(elapsed, 4),
+                    "cached": cached,
+                }
             )
         except Exception as exc:
             print(f"[WARN] Skipping '{doc}': {exc}")
@@ -115,40 +207,104 @@ def build_index(
         print("[ERROR] No text loaded from documents. Aborting index build.")
         return {"total_sec": 0.0, "error": "no_texts"}
 
+    dedup_report = None
+    dedup_cfg = config["retriever"].get("dedup", {}) or {}
+    if dedup_cfg.get("enabled", False):
+        dedup_started_at = _now()
+        texts, metas, rows, dedup_report = dedupe_chunks(
+            texts,
+            metas,
+            rows,
+            threshold=float(dedup_cfg.get("threshold", 0.8)),
+            num_perm=int(dedup_cfg.get("num_perm", 64)),
+            bands=int(dedup_cfg.get("bands", 16)),
+            shingle_size=int(dedup_cfg.get("shingle_size", 3)),
+        )
+        dedup_report["dedup_sec"] = round(_now() - dedup_started_at, 4)
+
     embedder = _get_embedder(runtime)
     batch_size = int(config["retriever"].get("encode_batch_size", 32))
 
     embed_started_at = _now()
-    batches = []
-    for offset in range(0, len(texts), batch_size):
-        emb = embedder.encode(texts[offset : offset + batch_size])
-        batches.append(emb)
-    embeddings = np.vstack(batches)
-    embeddings = _maybe_normalize(embeddings, normalize_embeddings)
+    cache = None
+    if config["retriever"].get("embedding_cache_enabled", True):
+        cache = open_cache(
+            config["retriever"].get("embedding_cache_dir") or "data/embedding_cache",
+            runtime["embedding_model"],
+            normalize_embeddings,
+        )
+    embeddings, embedding_cache = encode_with_cache(
+        lambda batch: _maybe_normalize(
+            np.asarray(embedder.encode(batch), dtype="float32"), normalize_embeddings
+        ),
+        texts,
+        cache,
+        batch_size=batch_size,
+    )
     embed_finished_at = _now()
+    if dedup_report is not None:
+        dedup_report["vector_bytes_saved"] = (
+            dedup_report["removed"] * embeddings.shape[1] * embeddings.itemsize
+        )
 
     write_started_at = _now()
-    faiss = _faiss()
-    index = faiss.IndexFlatL2(embeddings.shape[1])
-    index.add(embeddings)
-    artifacts = _artifact_paths(index_dir, system_name, runtime)
-    faiss.write_index(index, artifacts["faiss"])
-    with open(artifacts["texts"], "wb") as handle:
-        pickle.dump(texts, handle)
-    with open(artifacts["meta"], "wb") as handle:
-        pickle.dump(metas, handle)
-    with open(artifacts["normflag"], "w", encoding="utf-8") as handle:
-        handle.write("1" if normalize_embeddings else "0")
+    build_id = new_build_id()
+    artifacts = _artifact_paths(index_dir, system_name, runtime, build_id=build_id)
+    base = f"{system_name}--{artifacts['variant']}"
+    build_dir = begin_build(index_dir, base, build_id)
+    try:
+        manifest, lexical, bm25_sec = _write_build(
+            config, system_name, artifacts, embeddings, texts, metas, rows, storage
+        )
+        published = publish(
+            index_dir,
+            base,
+            build_id,
+            {
+                "system": system_name,
+                "embedding_model": runtime["embedding_model"],
+                "embedding_variant": artifacts["variant"],
+                "num_chunks": len(texts),
+                "normalize_embeddings": normalize_embeddings,
+                "vector_storage": storage,
+                "bytes_per_vector": bytes_per_vector(storage, embeddings.shape[1]),
+            },
+            keep=keep_versions,
+            grace_sec=grace_sec,
+        )
+    except BaseException:
+        shutil.rmtree(build_dir, ignore_errors=True)
+        raise
     write_finished_at = _now()
 
+    storage_options = config["retriever"].get("vector_storage")
+    vector_storage = storage_report(
+        _faiss(),
+        storage,
+        embeddings,
+        storage_options if isinstance(storage_options, dict) else None,
+    )
+    vector_storage["recall_sec"] = round(_now() - write_finished_at, 4)
+
     report = {
         "total_sec": round(_now() - total_started_at, 4),
         "load_parse": timings["load_parse"],
         "embed_sec": round(embed_finished_at - embed_started_at, 4),
+        "embedding_cache": embedding_cache,
+        "dedup": dedup_report,
         "num_chunks": len(texts),
-        "index_write_sec": round(write_finished_at - write_started_at, 4),
+        "parse_cache_hits": sum(
+            1 for item in timings["load_parse"] if item.get("cached")
+        ),
+        "index_write_sec": round(write_finished_at - write_started_at - bm25_sec, 4),
+        "bm25_build_sec": round(bm25_sec, 4),
+        "bm25_terms": len(lexical.terms),
+        "shards": manifest["files"] if manifest else None,
+        "vector_storage": vector_storage,
         "embedding_model": runtime["embedding_model"],
         "embedding_variant": artifacts["variant"],
+        "build_id": build_id,
+        "previous_build_id": published["previous_build_id"],
         "index_files": artifacts,
     }
     print(
@@ -158,37 +314,225 @@ def build_index(
     return report
 
 
-def _retrieve_chunks(
+def _write_build(
+    config: dict[str, Any],
     system_name: str,
-    question: str,
+    artifacts: dict[str, str],
+    embeddings: np.ndarray,
+    texts: list[str],
+    metas: list[dict[str, Any]],
+    rows: list[dict[str, Any]],
+    storage: str = "float32",
+) -> tuple[dict[str, Any] | None, BM25Index, float]:
+    """Write every artifact of one build into its (unpublished) directory."""
+    retriever_cfg = config["retriever"]
+    faiss = _faiss()
+    index = new_flat_index(faiss, storage, embeddings)
+    sharding_cfg = retriever_cfg.get("sharding", {}) or {}
+    shard_count = int(sharding_cfg.get("shards", 1) or 1)
+    manifest = None
+    if shard_count > 1:
+        manifest = write_shards(
+            faiss,
+            embeddings,
+            [meta["file"] for meta in metas],
+            shard_count,
+            artifacts["shards"],
+            system=system_name,
+            template=index,
+            storage=storage,
+        )
+    else:
+        index.add(embeddings)
+        faiss.write_index(index, artifacts["faiss"])
+    with open(artifacts["texts"], "wb") as handle:
+        pickle.dump(texts, handle)
+    with open(artifacts["meta"], "wb") as handle:
+        pickle.dump(metas, handle)
+    with open(artifacts["columns"], "wb") as handle:
+        pickle.dump(
+            ChunkColumns.from_rows(rows), handle, protocol=pickle.HIGHEST_PROTOCOL
+        )
+    with open(artifacts["normflag"], "w", encoding="utf-8") as handle:
+        handle.write("1" if retriever_cfg.get("normalize_embeddings") else "0")
+
+    bm25_started_at = _now()
+    bm25_cfg = retriever_cfg.get("bm25", {}) or {}
+    lexical = BM25Index.build(
+        texts, k1=float(bm25_cfg.get("k1", 1.2)), b=float(bm25_cfg.get("b", 0.75))
+    )
+    with open(artifacts["bm25"], "wb") as handle:
+        pickle.dump(lexical, handle, protocol=pickle.HIGHEST_PROTOCOL)
+    return manifest, lexical, _now() - bm25_started_at
+
+
+def _artifact_stamp(artifacts: dict[str, str]) -> tuple:
+    stamp: list[tuple[int, int] | None] = []
+    for key in ("faiss", "shards", "texts", "meta", "bm25", "columns"):
+        try:
+            stat = os.stat(artifacts[key])
+        except FileNotFoundError:
+            stamp.append(None)
+            continue
+        stamp.append((stat.st_mtime_ns, stat.st_size))
+    return tuple(stamp)
+
+
+def _load_index(artifacts: dict[str, str]) -> _LoadedIndex:
+    """Index, texts, metas and BM25 postings for one system/embedding variant,
+    kept in memory across queries and shared by every caller in the process."""
+    # Published builds are immutable, so their id is the whole stamp.
+    build_id = artifacts["build_id"]
+    stamp = ("build", build_id) if build_id else _artifact_stamp(artifacts)
+    pointer = artifacts["pointer"]
+    with _INDEX_LOCK:
+        cached = _INDEXES.get(pointer)
+        if cached is not None and cached.stamp == stamp:
+            return cached
+        load_lock = _LOAD_LOCKS.setdefault(pointer, threading.Lock())
+
+    with load_lock:
+        # Another caller may have loaded this build while we waited.
+        with _INDEX_LOCK:
+            cached = _INDEXES.get(pointer)
+        if cached is not None and cached.stamp == stamp:
+            return cached
+
+        if os.path.exists(artifacts["shards"]):
+            index = _open_shards(artifacts["shards"])
+        else:
+            index = _faiss().read_index(artifacts["faiss"])
+        with open(artifacts["texts"], "rb") as handle:
+            texts = pickle.load(handle)
+        metas = []
+        if os.path.exists(artifacts["meta"]):
+            with open(artifacts["meta"], "rb") as handle:
+                metas = pickle.load(handle)
+        lexical = None
+        if os.path.exists(artifacts["bm25"]):
+            with open(artifacts["bm25"], "rb") as handle:
+                lexical = pickle.load(handle)
+        columns = None
+        if os.path.exists(artifacts["columns"]):
+            with open(artifacts["columns"], "rb") as handle:
+                columns = pickle.load(handle)
+        loaded = _LoadedIndex(
+            stamp, index, texts, metas, lexical, columns, build_id=build_id
+        )
+        # Queries still holding the previous entry finish on it; it is freed
+        # (and its shard workers stopped) once the last of them drops it.
+        with _INDEX_LOCK:
+            _INDEXES[pointer] = loaded
+    return loaded
+
+
+def _open_shards(manifest_path: str) -> ShardedIndex:
+    retriever_cfg = (load_cached_config() or {}).get("retriever", {}) or {}
+    sharding_cfg = retriever_cfg.get("sharding", {}) or {}
+    system = os.path.basename(manifest_path).rsplit("--", 1)[0]
+    return open_sharded_index(
+        manifest_path,
+        endpoints=(sharding_cfg.get("endpoints") or {}).get(system),
+        local_workers=bool(sharding_cfg.get("local_workers", True)),
+        timeout=float(sharding_cfg.get("timeout_sec", 30)),
+    )
+
+
+def _lexical_index(loaded: _LoadedIndex, retriever_cfg: dict[str, Any]) -> BM25Index:
+    # Indexes built before BM25 existed get their postings built on first use.
+    if loaded.lexical is None:
+        bm25_cfg = retriever_cfg.get("bm25", {}) or {}
+        with loaded.lock:
+            if loaded.lexical is None:
+                loaded.lexical = BM25Index.build(
+                    loaded.texts,
+                    k1=float(bm25_cfg.get("k1", 1.2)),
+                    b=float(bm25_cfg.get("b", 0.75)),
+                )
+    return loaded.lexical
+
+
+def _chunk_columns(loaded: _LoadedIndex, system_name: str) -> ChunkColumns:
+    # Older indexes only recorded the file; derive what columns we can.
+    if loaded.columns is None:
+        with loaded.lock:
+            if loaded.columns is None:
+                loaded.columns = ChunkColumns.from_rows(
+                    {
+                        "file": (loaded.metas[i] if i < len(loaded.metas) else {}).get(
+                            "file"
+                        ),
+                        "pool": system_name,
+                    }
+                    for i in range(len(loaded.texts))
+                )
+    return loaded.columns
+
+
+def get_index_cache_status() -> dict[str, Any]:
+    with _INDEX_LOCK:
+        return {
+            "indexes": {
+                os.path.basename(path): {
+                    "vectors": int(entry.index.ntotal),
+                    "shards": len(entry.index.shards)
+                    if isinstance(entry.index, ShardedIndex)
+                    else 1,
+                    "bm25_terms": len(entry.lexical.terms) if entry.lexical else 0,
+                    "build_id": entry.build_id or None,
+                }
+                for path, entry in _INDEXES.items()
+            },
+            "embedders": sorted(_EMBEDDERS),
+        }
+
+
+def retrieve_batch(
+    system_name: str,
+    questions: list[str],
     model_selection: dict[str, Any] | None = None,
-):
-    config = load_config() or {}
+    top_k: int | list[int] | None = None,
+    mode: str | None = None,
+    filters: dict[str, Any] | None = None,
+    query_vectors: np.ndarray | None = None,
+) -> list[tuple[list[str], str, list[dict[str, Any]], dict[str, Any]]]:
+    """Retrieve for several questions against one system with a single encode
+    call and a single FAISS search; ``top_k`` may be given per question.
+
+    ``mode`` (default ``retriever.search_mode``) is "vector" (FAISS),
+    "lexical" (BM25) or "hybrid" (both, fused by reciprocal rank).
+
+    ``filters`` restricts every question to chunks whose metadata matches, e.g.
+    ``{"doc_type": "manual", "page": {"gte": 3}}``; see ``chunk_meta``.
+    Already encoded (and normalized) ``query_vectors`` skip the encode step."""
+    if not questions:
+        return []
+    config = load_cached_config() or {}
+    retriever_cfg = config.get("retriever", {}) or {}
+    mode = str(mode or retriever_cfg.get("search_mode") or "vector").lower()
+    if mode not in SEARCH_MODES:
+        raise ValueError(
+            f"Unknown search mode '{mode}'; expected one of {', '.join(SEARCH_MODES)}."
+        )
     runtime = resolve_runtime_selection(config, overrides=model_selection)
-    index_dir = config.get("retriever", {}).get("index_dir", "indices")
-    normalize_embeddings = bool(
-        config.get("retriever", {}).get("normalize_embeddings", False)
-    )
-    embedder = _get_embedder(runtime)
+    index_dir = retriever_cfg.get("index_dir", "indices")
+    normalize_embeddings = bool(retriever_cfg.get("normalize_embeddings", False))
     artifacts = _artifact_paths(index_dir, system_name, runtime)
 
-    if not os.path.exists(artifacts["faiss"]) or not os.path.exists(artifacts["texts"]):
+    if not (
+        os.path.exists(artifacts["faiss"]) or os.path.exists(artifacts["shards"])
+    ) or not os.path.exists(artifacts["texts"]):
         raise RuntimeError(
             "Missing index artifacts for system "
             f"'{system_name}' and embedding model '{runtime['embedding_model']}'. "
             "Run build_index or the rebuild-index API for this embedding profile first."
         )
 
-    faiss = _faiss()
-    index = faiss.read_index(artifacts["faiss"])
-    with open(artifacts["texts"], "rb") as handle:
-        texts = pickle.load(handle)
-
-    metas = []
-    if os.path.exists(artifacts["meta"]):
-        with open(artifacts["meta"], "rb") as handle:
-            metas = pickle.load(handle)
+    loaded = _load_index(artifacts)
+    texts = loaded.texts
+    columns = _chunk_columns(loaded, system_name)
 
+    stored_flag = None
     if os.path.exists(artifacts["normflag"]):
         with open(artifacts["normflag"], encoding="utf-8") as handle:
             stored_flag = handle.read().strip()
@@ -197,35 +541,303 @@ def _retrieve_chunks(
                 "[WARN] Normalization setting changed since index build. Rebuild the index."
             )
 
-    embed_query_started_at = _now()
-    query_vector = embedder.encode([question])
-    query_vector = _maybe_normalize(query_vector, normalize_embeddings)
-    embed_query_finished_at = _now()
+    if not isinstance(top_k, list):
+        top_k = [int(top_k or retriever_cfg.get("top_k", 5))] * len(questions)
+    hybrid_cfg = retriever_cfg.get("hybrid", {}) or {}
+    if mode == "hybrid":
+        # Each ranking goes deeper than top_k so fusion has candidates to promote.
+        depth = [max(k, int(hybrid_cfg.get("candidates", 50))) for k in top_k]
+    else:
+        depth = list(top_k)
+
+    timings: dict[str, Any] = {
+        "search_mode": mode,
+        "embed_query_sec": 0.0,
+        "faiss_search_sec": 0.0,
+    }
+    allowed, search_params = None, None
+    if filters:
+        filter_started_at = _now()
+        allowed, selector = columns.selector(filters, _faiss())
+        search_params = _faiss().SearchParameters(sel=selector)
+        timings["filter_sec"] = round(_now() - filter_started_at, 4)
+        timings["filter_matches"] = int(allowed.sum())
+    vector_hits: list[list[tuple[int, float]]] = [[] for _ in questions]
+    if mode != "lexical":
+        embed_query_started_at = _now()
+        if query_vectors is None:
+            query_vectors = _maybe_normalize(
+                np.asarray(
+                    _get_embedder(runtime).encode(
+                        list(questions),
+                        batch_size=int(retriever_cfg.get("encode_batch_size", 32)),
+                    ),
+                    dtype="float32",
+                ),
+                normalize_embeddings,
+            )
+        embed_query_finished_at = _now()
+
+        search_started_at = _now()
+        if isinstance(loaded.index, ShardedIndex):
+            distances, index_ids = loaded.index.search(
+                query_vectors, max(depth, default=0), allowed=allowed
+            )
+            timings["shards"] = len(loaded.index.shards)
+        else:
+            distances, index_ids = loaded.index.search(
+                query_vectors, max(depth, default=0), params=search_params
+            )
+        search_finished_at = _now()
+        timings["embed_query_sec"] = round(
+            embed_query_finished_at - embed_query_started_at, 4
+        )
+        timings["faiss_search_sec"] = round(search_finished_at - search_started_at, 4)
+        for row, k in enumerate(depth):
+            # FAISS pads with -1 when the index holds fewer than top_k vectors.
+            vector_hits[row] = [
+                (i, d)
+                for i, d in zip(
+                    index_ids[row].tolist()[:k], distances[row].tolist()[:k]
+                )
+                if i >= 0
+            ]
+
+    lexical_hits: list[list[tuple[int, float]]] = [[] for _ in questions]
+    if mode != "vector":
+        lexical = _lexical_index(loaded, retriever_cfg)
+        lexical_started_at = _now()
+        for row, question in enumerate(questions):
+            lexical_hits[row] = lexical.search(question, depth[row], allowed=allowed)
+        timings["lexical_search_sec"] = round(_now() - lexical_started_at, 4)
+
+    fused_hits: list[list[tuple[int, float]]] = []
+    if mode == "hybrid":
+        fusion_started_at = _now()
+        rrf_k = int(hybrid_cfg.get("rrf_k", 60))
+        for row, k in enumerate(top_k):
+            fused = reciprocal_rank_fusion(
+                [
+                    [i for i, _ in vector_hits[row]],
+                    [i for i, _ in lexical_hits[row]],
+                ],
+                k=rrf_k,
+            )
+            fused_hits.append(fused[:k])
+        timings["fusion_sec"] = round(_now() - fusion_started_at, 4)
+    else:
+        fused_hits = vector_hits if mode == "vector" else lexical_hits
+
+    timings.update(
+        {
+            "context_stitch_sec": 0.0,
+            "embedding_model": runtime["embedding_model"],
+            "embedding_variant": artifacts["variant"],
+            "index_normalized": None if stored_flag is None else stored_flag == "1",
+            "index_build_id": artifacts["build_id"] or None,
+            "query_batch_size": len(questions),
+        }
+    )
+    results = []
+    for row, hits in enumerate(fused_hits):
+        distance_of = dict(vector_hits[row])
+        bm25_of = dict(lexical_hits[row])
+        chunks = [texts[i] for i, _ in hits]
+        chunks_meta = []
+        for rank, (idx, score) in enumerate(hits, start=1):
+            item: dict[str, Any] = {
+                "rank": rank,
+                "index": idx,
+                "char_len": len(texts[idx]),
+            }
+            if idx in distance_of:
+                item["distance"] = round(float(distance_of[idx]), 6)
+            if idx in bm25_of:
+                item["bm25_score"] = round(float(bm25_of[idx]), 6)
+            if mode == "hybrid":
+                item["rrf_score"] = round(float(score), 6)
+            item.update(columns.row(idx))
+            sources = (loaded.metas[idx] if idx < len(loaded.metas) else {}).get(
+                "sources"
+            )
+            if sources:
+                # Near-duplicates collapsed into this chunk at build time.
+                item["sources"] = sources
+            item["embedding_model"] = runtime["embedding_model"]
+            chunks_meta.append(item)
+        results.append((chunks, "\n".join(chunks), chunks_meta, dict(timings)))
+    return results
 
-    top_k = int(config["retriever"].get("top_k", 5))
-    search_started_at = _now()
-    _, index_ids = index.search(query_vector, top_k)
-    search_finished_at = _now()
 
-    retrieved_idx = index_ids[0].tolist()
-    chunks = [texts[i] for i in retrieved_idx]
+def _retrieve_chunks(
+    system_name: str,
+    question: str,
+    model_selection: dict[str, Any] | None = None,
+    top_k: int | None = None,
+    mode: str | None = None,
+    filters: dict[str, Any] | None = None,
+):
+    return retrieve_batch(
+        system_name,
+        [question],
+        model_selection=model_selection,
+        top_k=top_k,
+        mode=mode,
+        filters=filters,
+    )[0]
+
+
+def _federation_pool(max_workers: int) -> ThreadPoolExecutor:
+    global _FEDERATION_POOL
+    with _INDEX_LOCK:
+        current = _FEDERATION_POOL
+        if current is not None and current[0] == max_workers:
+            return current[1]
+        pool = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="federated-search"
+        )
+        _FEDERATION_POOL = (max_workers, pool)
+    if current is not None:
+        current[1].shutdown(wait=False)
+    return pool
+
+
+def _normalized_scores(chunks_meta: list[dict[str, Any]], mode: str) -> list[float]:
+    """Min-max scale one source's hits into [0, 1] so sources with different
+    score ranges (embedding models, BM25 statistics) can be merged."""
+    if mode == "hybrid":
+        raw = [m.get("rrf_score", 0.0) for m in chunks_meta]
+    elif mode == "lexical":
+        raw = [m.get("bm25_score", 0.0) for m in chunks_meta]
+    else:
+        raw = [-m.get("distance", 0.0) for m in chunks_meta]
+    if not raw:
+        return []
+    low, high = min(raw), max(raw)
+    if high == low:
+        return [1.0] * len(raw)
+    return [(value - low) / (high - low) for value in raw]
+
+
+def _distance_scores(chunks_meta: list[dict[str, Any]]) -> list[float]:
+    """``1 / (1 + distance)``: comparable across sources that embed with the
+    same model into the same metric space."""
+    return [1.0 / (1.0 + max(0.0, m.get("distance", 0.0))) for m in chunks_meta]
+
+
+def federated_retrieve(
+    systems: list[str],
+    question: str,
+    model_selection: dict[str, Any] | None = None,
+    top_k: int | None = None,
+    mode: str | None = None,
+    filters: dict[str, Any] | None = None,
+):
+    """Search several systems' indexes concurrently and merge the hits.
+
+    Systems that resolve to the same embedding model share one query
+    embedding; each index is searched on the federation thread pool (FAISS
+    releases the GIL). Vector hits from sources that share the embedding model
+    and normalization are merged on their raw distances; otherwise (mixed
+    models, lexical or hybrid) each source's scores are normalized first.
+    Every chunk is tagged with its ``source_system``."""
+    config = load_cached_config() or {}
+    retriever_cfg = config.get("retriever", {}) or {}
+    federation_cfg = retriever_cfg.get("federation", {}) or {}
+    mode = str(mode or retriever_cfg.get("search_mode") or "vector").lower()
+    top_k = int(top_k or retriever_cfg.get("top_k", 5))
+    systems = list(dict.fromkeys(s for s in systems if s))
+    started_at = _now()
+
+    runtimes = {
+        system: resolve_runtime_selection(
+            config, system_name=system, overrides=model_selection
+        )
+        for system in systems
+    }
+    vectors_by_model: dict[str, np.ndarray] = {}
+    embed_started_at = _now()
+    if mode != "lexical":
+        for runtime in runtimes.values():
+            model = runtime["embedding_model"]
+            if model not in vectors_by_model:
+                vectors_by_model[model] = _maybe_normalize(
+                    np.asarray(
+                        _get_embedder(runtime).encode([question]), dtype="float32"
+                    ),
+                    bool(retriever_cfg.get("normalize_embeddings", False)),
+                )
+    embed_sec = round(_now() - embed_started_at, 4)
+
+    pool = _federation_pool(int(federation_cfg.get("max_workers", 4)))
+    futures = {
+        system: pool.submit(
+            retrieve_batch,
+            system,
+            [question],
+            model_selection=runtimes[system],
+            top_k=top_k,
+            mode=mode,
+            filters=filters,
+            query_vectors=vectors_by_model.get(runtimes[system]["embedding_model"]),
+        )
+        for system in systems
+    }
+
+    results: dict[str, tuple[list[str], list[dict[str, Any]]]] = {}
+    per_system: dict[str, Any] = {}
+    for system, future in futures.items():
+        try:
+            chunks, _, chunks_meta, timings = future.result()[0]
+        except Exception as exc:
+            if not federation_cfg.get("skip_failed_systems", True):
+                raise
+            per_system[system] = {"error": str(exc)}
+            continue
+        per_system[system] = timings
+        results[system] = (chunks, chunks_meta)
+    if not results:
+        raise RuntimeError(
+            "Federated search failed for every system: "
+            + "; ".join(f"{s}: {t['error']}" for s, t in per_system.items())
+        )
+
+    spaces = {
+        (runtimes[system]["embedding_model"], per_system[system]["index_normalized"])
+        for system in results
+    }
+    merge_on = "distance" if mode == "vector" and len(spaces) == 1 else "normalized"
+    merged: list[tuple[float, int, str, dict[str, Any]]] = []
+    for system, (chunks, chunks_meta) in results.items():
+        if merge_on == "distance":
+            scores = _distance_scores(chunks_meta)
+        else:
+            scores = _normalized_scores(chunks_meta, mode)
+        for chunk, meta, score in zip(chunks, chunks_meta, scores):
+            item = dict(meta)
+            item["source_system"] = system
+            item["source_rank"] = item.get("rank")
+            item["score"] = round(score, 6)
+            merged.append((score, item["source_rank"] or 0, chunk, item))
+
+    merged.sort(key=lambda hit: (-hit[0], hit[1]))
+    chunks = []
     chunks_meta = []
-    for rank, idx in enumerate(retrieved_idx, start=1):
-        item = {"rank": rank, "index": idx, "char_len": len(texts[idx])}
-        if metas and idx < len(metas) and "file" in metas[idx]:
-            item["file"] = metas[idx]["file"]
-        item["embedding_model"] = runtime["embedding_model"]
+    for rank, (_, _, chunk, item) in enumerate(merged[:top_k], start=1):
+        item["rank"] = rank
+        chunks.append(chunk)
         chunks_meta.append(item)
-
-    context = "\n".join(chunks)
     timings = {
-        "embed_query_sec": round(embed_query_finished_at - embed_query_started_at, 4),
-        "faiss_search_sec": round(search_finished_at - search_started_at, 4),
+        "search_mode": mode,
+        "federated": True,
+        "merged_on": merge_on,
+        "systems": per_system,
+        "embed_query_sec": embed_sec,
+        "shared_query_embeddings": len(vectors_by_model),
+        "federation_sec": round(_now() - started_at, 4),
         "context_stitch_sec": 0.0,
-        "embedding_model": runtime["embedding_model"],
-        "embedding_variant": artifacts["variant"],
     }
-    return chunks, context, chunks_meta, timings
+    return chunks, "\n".join(chunks), chunks_meta, timings
 
 
 def get_answer(
@@ -258,7 +870,9 @@ def list_indexed_data(
     runtime = resolve_runtime_selection(config, overrides=model_selection)
     index_dir = config.get("retriever", {}).get("index_dir", "indices")
     artifacts = _artifact_paths(index_dir, system_name, runtime)
-    if not os.path.exists(artifacts["texts"]) or not os.path.exists(artifacts["faiss"]):
+    if not os.path.exists(artifacts["texts"]) or not (
+        os.path.exists(artifacts["faiss"]) or os.path.exists(artifacts["shards"])
+    ):
         print(
             f"[INFO] No index found for '{system_name}' using '{runtime['embedding_model']}'."
         )
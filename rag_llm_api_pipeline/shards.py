@@ -0,0 +1,496 @@
+"""
+Sharded FAISS indexes and scatter-gather search.
+
+With ``retriever.sharding.shards`` above 1, ``build_index`` splits a system's
+vectors into shards by document hash (all chunks of a document land in the
+same shard) and writes a JSON manifest instead of one ``.faiss`` file. Each
+shard is an ``IndexIDMap2`` over the global chunk ids, so a shard's hits need
+no translation and the per-shard top-k lists merge into the exact global
+top-k.
+
+Shards are served over a small length-prefixed socket protocol, either by
+local worker processes or by ``python -m rag_llm_api_pipeline.shards`` on
+other hosts (``retriever.sharding.endpoints``).
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import socket
+import socketserver
+import struct
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Sequence
+
+import numpy as np
+
+MANIFEST_VERSION = 1
+_FRAME = struct.Struct(">II")  # header length, payload length
+_PAD_DISTANCE = float(np.finfo("float32").max)
+
+
+def file_digest(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for block in iter(lambda: handle.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def shard_of(document: str, count: int) -> int:
+    digest = hashlib.sha1(document.encode("utf-8"), usedforsecurity=False)
+    return int.from_bytes(digest.digest()[:8], "big") % count
+
+
+def write_shards(
+    faiss: Any,
+    embeddings: np.ndarray,
+    documents: Sequence[str],
+    count: int,
+    manifest_path: str,
+    *,
+    system: str,
+    template: Any = None,
+    storage: str = "float32",
+) -> dict[str, Any]:
+    """Write ``count`` shard indexes next to ``manifest_path`` and the manifest
+    itself; ``documents`` names the source document of every vector. Each
+    shard starts as a copy of the empty, trained ``template`` (default: a
+    float32 ``IndexFlatL2``), so quantized shards share one quantizer."""
+    base = manifest_path[: -len(".shards.json")]
+    _remove_shards(manifest_path)
+    assignment = np.fromiter(
+        (shard_of(doc, count) for doc in documents),
+        dtype=np.int64,
+        count=len(documents),
+    )
+    files = []
+    for shard in range(count):
+        ids = np.flatnonzero(assignment == shard).astype(np.int64)
+        base_index = (
+            faiss.clone_index(template)
+            if template is not None
+            else faiss.IndexFlatL2(embeddings.shape[1])
+        )
+        index = faiss.IndexIDMap2(base_index)
+        if len(ids):
+            index.add_with_ids(embeddings[ids], ids)
+        path = f"{base}.shard{shard}.faiss"
+        faiss.write_index(index, path)
+        files.append(
+            {
+                "path": os.path.basename(path),
+                "vectors": int(len(ids)),
+                "documents": len({documents[i] for i in ids.tolist()}),
+                "sha256": file_digest(path),
+            }
+        )
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "system": system,
+        "assignment": "sha1(document) % shards",
+        "shards": count,
+        "dim": int(embeddings.shape[1]),
+        "ntotal": int(embeddings.shape[0]),
+        "vector_storage": storage,
+        "files": files,
+    }
+    with open(manifest_path, "w", encoding="utf-8") as handle:
+        json.dump(manifest, handle, indent=2)
+    return manifest
+
+
+def load_manifest(manifest_path: str) -> dict[str, Any]:
+    with open(manifest_path, encoding="utf-8") as handle:
+        manifest = json.load(handle)
+    if manifest.get("version") != MANIFEST_VERSION:
+        raise ValueError(f"Unsupported shard manifest version in {manifest_path}.")
+    return manifest
+
+
+def shard_paths(manifest_path: str, manifest: dict[str, Any]) -> list[str]:
+    root = os.path.dirname(manifest_path)
+    return [os.path.join(root, item["path"]) for item in manifest["files"]]
+
+
+def _remove_shards(manifest_path: str) -> None:
+    if not os.path.exists(manifest_path):
+        return
+    try:
+        paths = shard_paths(manifest_path, load_manifest(manifest_path))
+    except (OSError, ValueError, KeyError):
+        paths = []
+    for path in [*paths, manifest_path]:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def merge_topk(
+    parts: Sequence[tuple[np.ndarray, np.ndarray]], k: int
+) -> tuple[np.ndarray, np.ndarray]:
+    """Merge per-shard ``(distances, ids)`` into the global top ``k`` per query.
+
+    Exact: every shard returns its own top ``k``, so the union holds the
+    global top ``k``. Ties break by chunk id; padding follows FAISS (-1)."""
+    distances = np.concatenate([d for d, _ in parts], axis=1)
+    ids = np.concatenate([i for _, i in parts], axis=1)
+    distances = np.where(ids < 0, np.inf, distances)
+    order = np.lexsort((ids, distances), axis=-1)[:, :k]
+    distances = np.take_along_axis(distances, order, axis=1)
+    ids = np.take_along_axis(ids, order, axis=1)
+    missing = ~np.isfinite(distances)
+    ids[missing] = -1
+    distances[missing] = _PAD_DISTANCE
+    return distances.astype("float32"), ids
+
+
+# ---- shards -----------------------------------------------------------------
+class LocalShard:
+    """One shard searched in this process."""
+
+    def __init__(self, path: str) -> None:
+        import faiss
+
+        self._faiss = faiss
+        self.path = path
+        self.index = faiss.read_index(path)
+        self._digest: str | None = None
+
+    def info(self, digest: bool = True) -> dict[str, Any]:
+        info: dict[str, Any] = {
+            "ntotal": int(self.index.ntotal),
+            "dim": int(self.index.d),
+        }
+        if digest:
+            if self._digest is None:
+                self._digest = file_digest(self.path)
+            info["sha256"] = self._digest
+        return info
+
+    def search(
+        self, queries: np.ndarray, k: int, bits: np.ndarray | None = None, size: int = 0
+    ) -> tuple[np.ndarray, np.ndarray]:
+        params = None
+        if bits is not None:
+            # ``bits`` must outlive the search; the selector only holds a pointer.
+            selector = self._faiss.IDSelectorBitmap(size, self._faiss.swig_ptr(bits))
+            params = self._faiss.SearchParameters(sel=selector)
+        return self.index.search(np.ascontiguousarray(queries), k, params=params)
+
+    def close(self) -> None:
+        pass
+
+
+def _send_frame(sock: socket.socket, header: dict[str, Any], payload: bytes = b""):
+    raw = json.dumps(header).encode("utf-8")
+    sock.sendall(_FRAME.pack(len(raw), len(payload)) + raw + payload)
+
+
+def _recv_exact(sock: socket.socket, size: int) -> bytes:
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    received = 0
+    while received < size:
+        got = sock.recv_into(view[received:])
+        if not got:
+            raise ConnectionError("shard connection closed")
+        received += got
+    return bytes(buffer)
+
+
+def _recv_frame(sock: socket.socket) -> tuple[dict[str, Any], bytes]:
+    header_len, payload_len = _FRAME.unpack(_recv_exact(sock, _FRAME.size))
+    header = json.loads(_recv_exact(sock, header_len))
+    return header, _recv_exact(sock, payload_len)
+
+
+class _ShardHandler(socketserver.BaseRequestHandler):
+    def handle(self) -> None:
+        shard: LocalShard = self.server.shard  # type: ignore[attr-defined]
+        while True:
+            try:
+                header, payload = _recv_frame(self.request)
+            except (ConnectionError, OSError):
+                return
+            try:
+                if header.get("op") == "info":
+                    _send_frame(
+                        self.request, shard.info(bool(header.get("digest", True)))
+                    )
+                    continue
+                n, dim, k = int(header["n"]), int(header["dim"]), int(header["k"])
+                queries = np.frombuffer(payload, dtype="float32", count=n * dim)
+                bits = None
+                if header.get("bits"):
+                    bits = np.frombuffer(
+                        payload, dtype=np.uint8, offset=n * dim * 4
+                    ).copy()
+                distances, ids = shard.search(
+                    queries.reshape(n, dim), k, bits, int(header.get("size", 0))
+                )
+            except Exception as exc:
+                _send_frame(self.request, {"error": str(exc)})
+                continue
+            _send_frame(
+                self.request,
+                {"n": n, "k": k},
+                np.ascontiguousarray(distances, dtype="float32").tobytes()
+                + np.ascontiguousarray(ids, dtype=np.int64).tobytes(),
+            )
+
+
+class ShardServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self, path: str, host: str = "127.0.0.1", port: int = 0) -> None:
+        self.shard = LocalShard(path)
+        super().__init__((host, port), _ShardHandler)
+
+    @property
+    def address(self) -> tuple[str, int]:
+        host, port = self.server_address[:2]
+        return str(host), int(port)
+
+
+class ShardClient:
+    """One persistent connection to a ``ShardServer``; reconnects once on error."""
+
+    def __init__(self, address: tuple[str, int], timeout: float = 30.0) -> None:
+        self.address = address
+        self.timeout = timeout
+        self._sock: socket.socket | None = None
+        self._lock = threading.Lock()
+
+    def _call(self, header: dict[str, Any], payload: bytes = b""):
+        with self._lock:
+            for attempt in (0, 1):
+                try:
+                    if self._sock is None:
+                        self._sock = socket.create_connection(
+                            self.address, timeout=self.timeout
+                        )
+                        self._sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                    _send_frame(self._sock, header, payload)
+                    reply, body = _recv_frame(self._sock)
+                    break
+                except OSError:
+                    self._close()
+                    if attempt:
+                        raise
+        if "error" in reply:
+            raise RuntimeError(f"shard {self.address}: {reply['error']}")
+        return reply, body
+
+    def info(self, digest: bool = True) -> dict[str, Any]:
+        return self._call({"op": "info", "digest": digest})[0]
+
+    def search(
+        self, queries: np.ndarray, k: int, bits: np.ndarray | None = None, size: int = 0
+    ) -> tuple[np.ndarray, np.ndarray]:
+        queries = np.ascontiguousarray(queries, dtype="float32")
+        n, dim = queries.shape
+        payload = queries.tobytes() + (bits.tobytes() if bits is not None else b"")
+        reply, body = self._call(
+            {
+                "op": "search",
+                "n": n,
+                "dim": dim,
+                "k": k,
+                "bits": bits is not None,
+                "size": size,
+            },
+            payload,
+        )
+        split = n * k * 4
+        distances = np.frombuffer(body[:split], dtype="float32").reshape(n, k)
+        ids = np.frombuffer(body[split:], dtype=np.int64).reshape(n, k)
+        return distances, ids
+
+    def _close(self) -> None:
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            finally:
+                self._sock = None
+
+    def close(self) -> None:
+        with self._lock:
+            self._close()
+
+
+def _serve_in_process(path: str, host: str, conn) -> None:
+    try:
+        server = ShardServer(path, host)
+    except Exception as exc:
+        conn.send(("error", str(exc)))
+        return
+    conn.send(("ok", server.address))
+    conn.close()
+    server.serve_forever()
+
+
+class LocalShardWorkers:
+    """One spawned process per shard, each serving it on a loopback socket."""
+
+    def __init__(
+        self, paths: Sequence[str], host: str = "127.0.0.1", timeout: float = 60.0
+    ) -> None:
+        context = multiprocessing.get_context("spawn")
+        self.processes = []
+        self.addresses: list[tuple[str, int]] = []
+        pending = []
+        for path in paths:
+            parent, child = context.Pipe(duplex=False)
+            process = context.Process(
+                target=_serve_in_process,
+                args=(path, host, child),
+                name=f"faiss-shard-{os.path.basename(path)}",
+                daemon=True,
+            )
+            process.start()
+            child.close()
+            self.processes.append(process)
+            pending.append((path, parent))
+        try:
+            for path, parent in pending:
+                if not parent.poll(timeout):
+                    raise RuntimeError(f"Shard worker for {path} did not start.")
+                status, value = parent.recv()
+                if status != "ok":
+                    raise RuntimeError(f"Shard worker for {path} failed: {value}")
+                self.addresses.append(tuple(value))
+        except BaseException:
+            self.close()
+            raise
+
+    def close(self) -> None:
+        for process in self.processes:
+            if process.is_alive():
+                process.terminate()
+        for process in self.processes:
+            process.join(timeout=5)
+        self.processes = []
+
+
+class ShardedIndex:
+    """Scatter a search to every shard in parallel and merge the results.
+
+    Exposes ``ntotal`` and ``d`` like a FAISS index; filters are passed as a
+    boolean mask over global chunk ids instead of FAISS search parameters."""
+
+    def __init__(
+        self,
+        manifest: dict[str, Any],
+        shards: Sequence[Any],
+        workers: LocalShardWorkers | None = None,
+    ) -> None:
+        self.manifest = manifest
+        self.shards = list(shards)
+        self.workers = workers
+        self.ntotal = int(manifest["ntotal"])
+        self.d = int(manifest["dim"])
+        self._pool = ThreadPoolExecutor(
+            max_workers=max(1, len(self.shards)), thread_name_prefix="faiss-shard"
+        )
+
+    def search(
+        self, queries: np.ndarray, k: int, allowed: np.ndarray | None = None
+    ) -> tuple[np.ndarray, np.ndarray]:
+        bits = None
+        if allowed is not None:
+            bits = np.packbits(allowed, bitorder="little")
+        size = len(allowed) if allowed is not None else 0
+        parts = list(
+            self._pool.map(
+                lambda shard: shard.search(queries, k, bits, size), self.shards
+            )
+        )
+        return merge_topk(parts, k)
+
+    def close(self) -> None:
+        for shard in self.shards:
+            shard.close()
+        if self.workers is not None:
+            self.workers.close()
+        self._pool.shutdown(wait=False)
+
+    def __del__(self) -> None:
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
+def _parse_endpoint(endpoint: str) -> tuple[str, int]:
+    host, _, port = str(endpoint).rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+
+def open_sharded_index(
+    manifest_path: str,
+    *,
+    endpoints: Sequence[str] | None = None,
+    local_workers: bool = True,
+    timeout: float = 30.0,
+) -> ShardedIndex:
+    """Connect to a manifest's shards: remote ``endpoints`` (in shard order),
+    spawned local worker processes, or in-process shards."""
+    manifest = load_manifest(manifest_path)
+    paths = shard_paths(manifest_path, manifest)
+    workers = None
+    shards: list[Any]
+    if endpoints:
+        if len(endpoints) != len(paths):
+            raise ValueError(
+                f"{len(endpoints)} shard endpoints configured for "
+                f"{len(paths)} shards of '{manifest['system']}'."
+            )
+        shards = [ShardClient(_parse_endpoint(e), timeout) for e in endpoints]
+    elif local_workers:
+        workers = LocalShardWorkers(paths)
+        shards = [ShardClient(address, timeout) for address in workers.addresses]
+    else:
+        shards = [LocalShard(path) for path in paths]
+    index = ShardedIndex(manifest, shards, workers)
+    try:
+        for shard, item in zip(shards, manifest["files"]):
+            # Remote servers keep serving the files they started with, so a
+            # rebuild with the same chunk count is only caught by the digest.
+            # Local shards are opened from the manifest's own files.
+            info = shard.info(digest=bool(endpoints))
+            stale = int(info["ntotal"]) != int(item["vectors"])
+            if item.get("sha256") and "sha256" in info:
+                stale = stale or info["sha256"] != item["sha256"]
+            if stale:
+                raise RuntimeError(
+                    f"Shard {item['path']} does not match the manifest; it was "
+                    "rebuilt (restart its server on the published build's files) "
+                    "or the endpoints are out of order."
+                )
+    except BaseException:
+        index.close()
+        raise
+    return index
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serve one FAISS shard")
+    parser.add_argument("path", help="Shard .faiss file")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=7100)
+    args = parser.parse_args()
+    server = ShardServer(args.path, args.host, args.port)
+    print(f"[INFO] Serving {args.path} on {server.address[0]}:{server.address[1]}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+Scalar-quantized vector storage for flat indexes.
+
+``float32`` keeps every vector exactly in an ``IndexFlatL2``. ``fp16`` and
+``sq8`` store each dimension in two bytes or one byte through FAISS's
+``IndexScalarQuantizer``; search stays exhaustive, but distances are computed
+on the decoded vectors. ``sq8`` learns a per-dimension range from the build's
+own vectors. The storage is chosen per system under ``retriever.vector_storage``.
+"""
+
+from __future__ import annotations
+
+from typing import Any
+
+import numpy as np
+
+VECTOR_STORAGES = ("float32", "fp16", "sq8")
+_BYTES_PER_DIM = {"float32": 4, "fp16": 2, "sq8": 1}
+
+
+def resolve_vector_storage(retriever_cfg: dict[str, Any], system_name: str) -> str:
+    storage_cfg = retriever_cfg.get("vector_storage") or {}
+    if isinstance(storage_cfg, str):
+        storage = storage_cfg
+    else:
+        systems = storage_cfg.get("systems") or {}
+        storage = systems.get(system_name) or storage_cfg.get("default") or "float32"
+    storage = str(storage).lower()
+    if storage not in VECTOR_STORAGES:
+        raise ValueError(
+            f"Unknown vector storage '{storage}'. "
+            f"Expected one of: {', '.join(VECTOR_STORAGES)}."
+        )
+    return storage
+
+
+def bytes_per_vector(storage: str, dim: int) -> int:
+    return _BYTES_PER_DIM[storage] * dim
+
+
+def new_flat_index(
+    faiss: Any,
+    storage: str,
+    embeddings: np.ndarray,
+    *,
+    train_size: int = 100_000,
+    seed: int = 0,
+) -> Any:
+    """An empty, trained flat index for ``storage``; ``sq8`` trains on up to
+    ``train_size`` rows of ``embeddings``."""
+    dim = int(embeddings.shape[1])
+    if storage == "float32":
+        return faiss.IndexFlatL2(dim)
+    qtype = (
+        faiss.ScalarQuantizer.QT_fp16
+        if storage == "fp16"
+        else faiss.ScalarQuantizer.QT_8bit
+    )
+    index = faiss.IndexScalarQuantizer(dim, qtype, faiss.METRIC_L2)
+    if not index.is_trained:
+        sample = embeddings
+        if len(embeddings) > train_size:
+            rows = np.random.default_rng(seed).choice(
+                len(embeddings), train_size, replace=False
+            )
+            sample = embeddings[np.sort(rows)]
+        index.train(np.ascontiguousarray(sample, dtype="float32"))
+    return index
+
+
+def recall_vs_float32(
+    faiss: Any,
+    storage: str,
+    embeddings: np.ndarray,
+    *,
+    k: int = 10,
+    queries: int = 100,
+    sample: int = 50_000,
+    seed: int = 0,
+) -> dict[str, Any] | None:
+    """Recall@k of ``storage`` against exact float32 search, using held-out
+    build vectors as queries over a sample of the rest."""
+    rng = np.random.default_rng(seed)
+    order = rng.permutation(len(embeddings))
+    num_queries = min(queries, len(embeddings) // 2)
+    base_rows = order[num_queries : num_queries + sample]
+    if not num_queries or not len(base_rows):
+        return None
+    query_vectors = np.ascontiguousarray(embeddings[order[:num_queries]])
+    base = np.ascontiguousarray(embeddings[np.sort(base_rows)])
+    k = min(k, len(base))
+
+    exact = faiss.IndexFlatL2(base.shape[1])
+    exact.add(base)
+    _, truth = exact.search(query_vectors, k)
+    quantized = new_flat_index(faiss, storage, base, seed=seed)
+    quantized.add(base)
+    _, found = quantized.search(query_vectors, k)
+
+    hits = sum(len(set(t) & set(f)) for t, f in zip(truth.tolist(), found.tolist()))
+    return {
+        "k": k,
+        "queries": num_queries,
+        "sample_vectors": len(base),
+        "recall": round(hits / (num_queries * k), 4),
+    }
+
+
+def storage_report(
+    faiss: Any,
+    storage: str,
+    embeddings: np.ndarray,
+    options: dict[str, Any] | None = None,
+) -> dict[str, Any]:
+    """Memory footprint of the stored vectors, plus the recall check against
+    float32 for quantized storage (``recall_check: false`` skips it)."""
+    options = options or {}
+    count, dim = (int(n) for n in embeddings.shape)
+    per_vector = bytes_per_vector(storage, dim)
+    report: dict[str, Any] = {
+        "storage": storage,
+        "dim": dim,
+        "bytes_per_vector": per_vector,
+        "memory_bytes": count * per_vector,
+        "float32_memory_bytes": count * bytes_per_vector("float32", dim),
+        "compression": round(bytes_per_vector("float32", dim) / per_vector, 2),
+        "recall_vs_float32": None,
+    }
+    if storage != "float32" and options.get("recall_check", True):
+        report["recall_vs_float32"] = recall_vs_float32(
+            faiss,
+            storage,
+            embeddings,
+            k=int(options.get("recall_k", 10)),
+            queries=int(options.get("recall_queries", 100)),
+            sample=int(options.get("recall_sample", 50_000)),
+        )
+    return report
@@ -1,16 +1,64 @@
 from __future__ import annotations
+import asyncio
+import time
 from typing import Any, Dict
 from ..base import Agent, AgentSpec
 from ..registry import register
+from ...api._state import batchers
+
+
+def _text(item: Any) -> str:
+    if isinstance(item, dict):
+        return str(item.get("text") or item.get("content") or "")
+    return str(item)
 
 
 class CompressorAgent(Agent):
     async def start(self) -> None: ...
     async def stop(self) -> None: ...
     async def step(self, state: Dict[str, Any]) -> Dict[str, Any]:
-        docs = state.get("retrieved", [])
-        # TODO: implement real compression/chunking
-        return {"compressed": docs}
+        from rag_llm_api_pipeline.compressor import (
+            chunk_sentences,
+            compress_sentences,
+            get_compression_settings,
+        )
+
+        docs = state.get("reranked") or state.get("retrieved") or []
+        query = state.get("query") or ""
+        if not docs or not query:
+            return {"compressed": docs}
+
+        settings = get_compression_settings()
+        config = self.spec.config or {}
+        budget = int(config.get("budget_tokens", settings["budget_tokens"]))
+        min_chars = int(
+            config.get("min_sentence_chars", settings["min_sentence_chars"])
+        )
+        chunks = [_text(doc) for doc in docs]
+        _, sentences = chunk_sentences(chunks, min_chars)
+        if not sentences:
+            return {"compressed": docs}
+
+        # Question and sentences go through the shared "embed" micro-batcher,
+        # so they are encoded together with other agents' texts.
+        started_at = time.perf_counter()
+        vectors = await asyncio.gather(
+            *(batchers.submit("embed", text) for text in [query, *sentences])
+        )
+        texts, survivors, stats = compress_sentences(
+            chunks,
+            vectors[1:],
+            vectors[0],
+            budget_tokens=budget,
+            min_sentence_chars=min_chars,
+        )
+        compressed = []
+        for text, i in zip(texts, survivors):
+            item = dict(docs[i]) if isinstance(docs[i], dict) else {}
+            item["text"] = text
+            compressed.append(item)
+        stats["compress_sec"] = round(time.perf_counter() - started_at, 4)
+        return {"compressed": compressed, "compression": stats}
 
 
 @register("compressor")
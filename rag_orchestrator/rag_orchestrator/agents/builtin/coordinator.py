@@ -2,14 +2,38 @@ from __future__ import annotations
 from typing import Any, Dict
 from ..base import Agent, AgentSpec
 from ..registry import register
+from ...runtime.workflow import Workflow, default_rag_workflow
 
 
 class CoordinatorAgent(Agent):
-    async def start(self) -> None: ...
-    async def stop(self) -> None: ...
+    """
+    Runs a workflow DAG of agents in one step. ``spec.config["workflow"]``
+    lists nodes as {"name", "agent", "after", "system", "config"}; without it
+    the default RAG workflow is used, with a parallel regulatory branch when
+    ``spec.config["regulatory_system"]`` is set.
+    """
+
+    def __init__(self, spec: AgentSpec):
+        super().__init__(spec)
+        config = spec.config or {}
+        if config.get("workflow"):
+            self.workflow = Workflow.from_config(config["workflow"])
+        else:
+            self.workflow = default_rag_workflow(config.get("regulatory_system"))
+        self.agents = self.workflow.build(spec)
+
+    async def start(self) -> None:
+        for agent in self.agents.values():
+            await agent.start()
+
+    async def stop(self) -> None:
+        for agent in self.agents.values():
+            await agent.stop()
+
     async def step(self, state: Dict[str, Any]) -> Dict[str, Any]:
-        # TODO: orchestrate sub-steps (quantization, batching strategy, presets)
-        return {"coordinated": True}
+        out, timings = await self.workflow.run(self.agents, state)
+        out["workflow"] = timings
+        return out
 
 
 @register("coordinator")
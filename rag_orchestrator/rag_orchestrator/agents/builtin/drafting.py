@@ -13,6 +13,16 @@ class DraftingAgent(Agent):
             state.get("prompt")
             or state.get("messages", [{"content": ""}])[-1]["content"]
         )
+        docs = (
+            state.get("compressed") or state.get("reranked") or state.get("retrieved")
+        )
+        if docs and state.get("query") and not state.get("prompt"):
+            # Inside a workflow: answer the query from the retrieved context.
+            context = "\n".join(
+                str(d.get("text") or "") if isinstance(d, dict) else str(d)
+                for d in docs
+            )
+            prompt = {"question": state["query"], "context": context}
         draft = await batchers.submit("generate", prompt)
         return {"draft": draft}
 
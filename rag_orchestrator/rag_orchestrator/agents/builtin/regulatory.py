@@ -4,6 +4,7 @@ from typing import Any, Dict
 
 from ..base import Agent, AgentSpec
 from ..registry import register
+from .retriever import as_items, retrieve
 
 
 class RegulatoryAgent(Agent):
@@ -15,19 +16,13 @@ class RegulatoryAgent(Agent):
     async def stop(self) -> None: ...
 
     async def step(self, state: Dict[str, Any]) -> Dict[str, Any]:
-        query = (
-            state.get("query")
-            or state.get("messages", [{"content": ""}])[-1]["content"]
-        )
+        result = await retrieve(self.spec, state)
         return {
             "regulatory_context": [
-                {
-                    "text": query,
-                    "score": 1.0,
-                    "agent_type": "regulatory",
-                    "system": self.spec.system,
-                }
-            ]
+                {**item, "agent_type": "regulatory", "system": self.spec.system}
+                for item in as_items(result)
+            ],
+            "regulatory_retrieval": result["timings"],
         }
 
 
@@ -1,16 +1,50 @@
 from __future__ import annotations
+import asyncio
+import time
 from typing import Any, Dict
 from ..base import Agent, AgentSpec
 from ..registry import register
+from ...api._state import batchers
+
+
+def _text(item: Any) -> str:
+    if isinstance(item, dict):
+        return str(item.get("text") or item.get("content") or "")
+    return str(item)
 
 
 class RerankerAgent(Agent):
     async def start(self) -> None: ...
     async def stop(self) -> None: ...
     async def step(self, state: Dict[str, Any]) -> Dict[str, Any]:
-        items = state.get("retrieved") or state.get("compressed") or []
-        # TODO: call cross-encoder to rerank
-        return {"reranked": items}
+        items = (state.get("retrieved") or []) + (
+            state.get("regulatory_context") or []
+        ) or (state.get("compressed") or [])
+        query = state.get("query") or ""
+        top_k = int((self.spec.config or {}).get("top_k", 5))
+        if not items or not query:
+            return {"reranked": items[:top_k]}
+
+        # One submit per pair; the "rerank" micro-batcher scores them together
+        # (and alongside pairs from concurrent queries) in cross-encoder batches.
+        started_at = time.perf_counter()
+        scores = await asyncio.gather(
+            *(batchers.submit("rerank", (query, _text(item))) for item in items)
+        )
+        order = sorted(range(len(items)), key=lambda i: scores[i], reverse=True)
+        reranked = []
+        for i in order[:top_k]:
+            item = dict(items[i]) if isinstance(items[i], dict) else {"text": items[i]}
+            item["rerank_score"] = float(scores[i])
+            reranked.append(item)
+        return {
+            "reranked": reranked,
+            "rerank": {
+                "candidates": len(items),
+                "top_k": top_k,
+                "rerank_sec": round(time.perf_counter() - started_at, 4),
+            },
+        }
 
 
 @register("reranker")
@@ -1,7 +1,57 @@
 from __future__ import annotations
-from typing import Any, Dict
+from typing import Any, Dict, List
 from ..base import Agent, AgentSpec
 from ..registry import register
+from ...api._state import batchers
+
+# spec.config keys that select the runtime (see resolve_runtime_selection);
+# everything else tunes an agent and stays out of the retrieve payload.
+_SELECTION_KEYS = (
+    "runtime_profile",
+    "model_profile",
+    "llm_model",
+    "inference_model",
+    "embedding_model",
+    "device",
+    "model_precision",
+    "quantization_backend",
+    "low_cpu_mem_usage",
+    "use_cpu",
+)
+
+
+async def retrieve(spec: AgentSpec, state: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Run the pipeline's FAISS retrieval through the shared "retrieve" batcher,
+    so concurrent agents are encoded and searched together, using the runtime
+    profile resolved into ``spec.config``.
+    """
+    query = (
+        state.get("query") or state.get("messages", [{"content": ""}])[-1]["content"]
+    )
+    system = spec.system or state.get("system")
+    if not query or not system:
+        return {"chunks": [], "chunks_meta": [], "timings": {}}
+    config = dict(spec.config or {})
+    payload = {
+        "system": system,
+        "question": query,
+        "top_k": int(config.get("top_k", 5)),
+        "filters": state.get("filters") or config.get("filters"),
+        "model_selection": {k: config[k] for k in _SELECTION_KEYS if k in config}
+        or None,
+    }
+    result = await batchers.submit("retrieve", payload)
+    if result.get("error"):
+        raise RuntimeError(f"Retrieval failed for system '{system}': {result['error']}")
+    return result
+
+
+def as_items(result: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return [
+        {"text": text, **meta}
+        for text, meta in zip(result["chunks"], result["chunks_meta"])
+    ]
 
 
 class RetrieverAgent(Agent):
@@ -11,12 +61,8 @@ class RetrieverAgent(Agent):
     async def start(self) -> None: ...
     async def stop(self) -> None: ...
     async def step(self, state: Dict[str, Any]) -> Dict[str, Any]:
-        query = (
-            state.get("query")
-            or state.get("messages", [{"content": ""}])[-1]["content"]
-        )
-        # TODO: call your pipeline's retrieval (FAISS/HNSW) via provider
-        return {"retrieved": [{"text": query, "score": 1.0}]}
+        result = await retrieve(self.spec, state)
+        return {"retrieved": as_items(result), "retrieval": result["timings"]}
 
 
 @register("retriever")
@@ -1,7 +1,9 @@
 import asyncio
 import os
 from rag_orchestrator.runtime.batcher_pool import BatcherPool
-from rag_orchestrator.batching.gatekeeper import Gatekeeper, TenantPolicy
+from rag_orchestrator.batching.fair_queue import FairShareScheduler
+from rag_orchestrator.batching.gatekeeper import Gatekeeper
+from rag_orchestrator.batching.single_flight import AsyncSingleFlight
 from .config_bridge import load_bridge_config, resolve_system_yaml
 from ._state_systems import ProviderPool
 from rag_orchestrator.runtime.manager import AgentManager
@@ -22,14 +24,19 @@ async def _forward_generate(payloads: list[str]) -> list[str]:
     return await prov.forward_batch(payloads)
 
 
-async def _forward_embed(payloads: list[str]) -> list[str]:
+async def _forward_embed(payloads: list[str]) -> list[list[float]]:
     prov = provider_pool.get(DEFAULT_SYSTEM)
-    vecs = await prov.embed(payloads)
-    return [str(v) for v in vecs]
+    return await prov.embed(payloads)
 
 
-async def _forward_rerank(payloads: list[str]) -> list[str]:
-    return payloads  # plug cross-encoder here
+async def _forward_retrieve(payloads: list[dict]) -> list[dict]:
+    prov = provider_pool.get(DEFAULT_SYSTEM)
+    return await prov.retrieve(payloads)
+
+
+async def _forward_rerank(payloads: list[tuple[str, str]]) -> list[float]:
+    prov = provider_pool.get(DEFAULT_SYSTEM)
+    return await prov.rerank(payloads)
 
 
 async def _forward_validate(payloads: list[str]) -> list[str]:
@@ -41,29 +48,86 @@ batchers.register(
     _forward_generate,
     max_batch=_cfg.batch.max_batch,
     max_latency_ms=_cfg.batch.max_latency_ms,
+    max_queue=_cfg.batch.max_queue,
+    adaptive=_cfg.batch.adaptive,
 )
 batchers.register(
     "embed",
     _forward_embed,
     max_batch=_cfg.batch.max_batch,
     max_latency_ms=_cfg.batch.max_latency_ms,
+    max_queue=_cfg.batch.max_queue,
+    adaptive=_cfg.batch.adaptive,
+)
+batchers.register(
+    "retrieve",
+    _forward_retrieve,
+    max_batch=_cfg.batch.max_batch,
+    max_latency_ms=_cfg.batch.max_latency_ms,
+    max_queue=_cfg.batch.max_queue,
+    adaptive=_cfg.batch.adaptive,
 )
 batchers.register(
     "rerank",
     _forward_rerank,
     max_batch=_cfg.batch.max_batch,
     max_latency_ms=_cfg.batch.max_latency_ms,
+    max_queue=_cfg.batch.max_queue,
+    adaptive=_cfg.batch.adaptive,
 )
 batchers.register(
     "validate",
     _forward_validate,
     max_batch=_cfg.batch.max_batch,
     max_latency_ms=_cfg.batch.max_latency_ms,
+    max_queue=_cfg.batch.max_queue,
+    adaptive=_cfg.batch.adaptive,
 )
 
 manager = AgentManager()
 manager.batchers = batchers._pool
-gate = Gatekeeper(lambda payload, to: batchers.submit("generate", payload, timeout=to))
+
+
+generate_flights = AsyncSingleFlight()
+
+
+async def _submit_generate(payload, *, timeout=None, meta=None):
+    if not isinstance(payload, str):
+        return await batchers.submit("generate", payload, timeout=timeout, meta=meta)
+    meta = dict(meta or {})
+
+    async def _run(shared_timeout, priority):
+        return await batchers.submit(
+            "generate",
+            payload,
+            timeout=shared_timeout,
+            meta={**meta, "priority": priority, "deadline_ms": None},
+        )
+
+    # Identical prompts already in the batcher share that generation when they
+    # are in the same priority class; each caller keeps its own deadline.
+    return await generate_flights.do_scheduled(
+        payload,
+        _run,
+        timeout=timeout,
+        deadline_ms=meta.get("deadline_ms"),
+        priority=meta.get("priority"),
+    )
+
+
+# Fair share across tenants sits between the gatekeeper and the shared batcher.
+fair_queue = (
+    FairShareScheduler(
+        _submit_generate,
+        max_inflight=_cfg.gate.max_inflight,
+        quantum=_cfg.gate.quantum,
+        default_weight=_cfg.gate.weight,
+        default_max_queue=_cfg.gate.max_queue,
+    )
+    if _cfg.gate.fair_queue
+    else None
+)
+gate = Gatekeeper(fair_queue.submit if fair_queue else _submit_generate)
 
 _started = False
 ensure_started_task = None
@@ -73,12 +137,13 @@ async def ensure_started():
     global _started
     if not _started:
         await batchers.start()
-        gate.set_policy(
-            "default",
-            TenantPolicy(
-                rps=_cfg.gate.rps, burst=_cfg.gate.burst, timeout_s=_cfg.gate.timeout_s
-            ),
-        )
+        policies = {"default": _cfg.gate.policy(), **_cfg.gate.tenants}
+        for tenant, policy in policies.items():
+            gate.set_policy(tenant, policy)
+            if fair_queue is not None:
+                fair_queue.set_tenant(
+                    tenant, weight=policy.weight, max_queue=policy.max_queue
+                )
         _started = True
 
 
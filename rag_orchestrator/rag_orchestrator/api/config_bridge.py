@@ -1,9 +1,12 @@
 from __future__ import annotations
-from dataclasses import dataclass
-from typing import Any
+from dataclasses import dataclass, field
+from typing import Any, Optional
 from pathlib import Path
 import yaml
 
+from rag_orchestrator.batching.adaptive import AdaptiveBatchPolicy
+from rag_orchestrator.batching.gatekeeper import TenantPolicy
+
 try:
     from rag_llm_api_pipeline.config_loader import get_config_path
 except ImportError:  # pragma: no cover - orchestrator can be imported independently
@@ -15,6 +18,8 @@ class OrchestratorBatchCfg:
     max_batch: int = 8
     max_latency_ms: int = 5
     max_queue: int = 1024
+    # None disables online tuning and keeps max_batch / max_latency_ms fixed.
+    adaptive: Optional[AdaptiveBatchPolicy] = field(default_factory=AdaptiveBatchPolicy)
 
 
 @dataclass
@@ -22,6 +27,22 @@ class OrchestratorGateCfg:
     rps: float = 20.0
     burst: int = 40
     timeout_s: float = 30.0
+    weight: float = 1.0
+    max_queue: int = 64
+    # Deficit-round-robin scheduler between the gatekeeper and the batchers.
+    fair_queue: bool = True
+    max_inflight: int = 16
+    quantum: float = 1.0
+    tenants: dict[str, TenantPolicy] = field(default_factory=dict)
+
+    def policy(self) -> TenantPolicy:
+        return TenantPolicy(
+            rps=self.rps,
+            burst=self.burst,
+            timeout_s=self.timeout_s,
+            weight=self.weight,
+            max_queue=self.max_queue,
+        )
 
 
 @dataclass
@@ -50,6 +71,31 @@ def resolve_system_yaml(
     return str(repo_default)
 
 
+def _adaptive_policy(raw: Any) -> Optional[AdaptiveBatchPolicy]:
+    raw = raw if isinstance(raw, dict) else {}
+    if not raw.get("enabled", True):
+        return None
+    defaults = AdaptiveBatchPolicy()
+    return AdaptiveBatchPolicy(
+        target_p95_ms=float(raw.get("target_p95_ms", defaults.target_p95_ms)),
+        min_batch=int(raw.get("min_batch", defaults.min_batch)),
+        max_batch=int(raw.get("max_batch", defaults.max_batch)),
+        min_latency_ms=float(raw.get("min_latency_ms", defaults.min_latency_ms)),
+        max_latency_ms=float(raw.get("max_latency_ms", defaults.max_latency_ms)),
+    )
+
+
+def _tenant_policy(raw: Any, base: TenantPolicy) -> TenantPolicy:
+    raw = raw if isinstance(raw, dict) else {}
+    return TenantPolicy(
+        rps=float(raw.get("rps", base.rps)),
+        burst=int(raw.get("burst", base.burst)),
+        timeout_s=float(raw.get("timeout_s", base.timeout_s)),
+        weight=float(raw.get("weight", base.weight)),
+        max_queue=int(raw.get("max_queue", base.max_queue)),
+    )
+
+
 def load_bridge_config(path: str) -> BridgeConfig:
     with open(path, "r", encoding="utf-8") as f:
         cfg = yaml.safe_load(f)
@@ -57,7 +103,9 @@ def load_bridge_config(path: str) -> BridgeConfig:
     retr = cfg.get("retriever", {})
     orch = cfg.get("orchestrator", {}) or {}
     b = orch.get("batcher") or {}
-    g = (orch.get("gatekeeper") or {}).get("default_tenant") or {}
+    gk = orch.get("gatekeeper") or {}
+    default = _tenant_policy(gk.get("default_tenant"), TenantPolicy())
+    fq = gk.get("fair_queue") or {}
     return BridgeConfig(
         llm=llm,
         retriever=retr,
@@ -65,10 +113,20 @@ def load_bridge_config(path: str) -> BridgeConfig:
             max_batch=b.get("max_batch", 8),
             max_latency_ms=b.get("max_latency_ms", 5),
             max_queue=b.get("max_queue", 1024),
+            adaptive=_adaptive_policy(b.get("adaptive")),
         ),
         gate=OrchestratorGateCfg(
-            rps=float(g.get("rps", 20.0)),
-            burst=int(g.get("burst", 40)),
-            timeout_s=float(g.get("timeout_s", 30.0)),
+            rps=default.rps,
+            burst=default.burst,
+            timeout_s=default.timeout_s,
+            weight=default.weight,
+            max_queue=default.max_queue,
+            fair_queue=bool(fq.get("enabled", True)),
+            max_inflight=int(fq.get("max_inflight", 16)),
+            quantum=float(fq.get("quantum", 1.0)),
+            tenants={
+                str(name): _tenant_policy(raw, default)
+                for name, raw in (gk.get("tenants") or {}).items()
+            },
         ),
     )
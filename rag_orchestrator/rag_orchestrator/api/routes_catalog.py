@@ -32,7 +32,7 @@ CATALOG = [
     {
         "slug": "coordinator",
         "name": "Coordinator Agent",
-        "description": "Quantization + scheduling.",
+        "description": "Runs a DAG workflow of agents in one step.",
     },
     {
         "slug": "regulatory",
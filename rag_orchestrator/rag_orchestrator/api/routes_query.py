@@ -13,6 +13,7 @@ from ..providers.rag_llm_api_provider import RagLLMApiProvider
 
 # ### NEW
 from rag_orchestrator.batching.microbatch import AsyncMicroBatcher
+from rag_orchestrator.batching.single_flight import AsyncSingleFlight
 import asyncio
 
 router = APIRouter(prefix="", tags=["query"])
@@ -57,11 +58,8 @@ class _FallbackBatcherPool:  # ### NEW
 
         async def forward_fn(batch: list[dict]):  # ### NEW
             outs = []  # ### NEW
-            for item in batch:  # ### NEW
-                text, stats = prov.query(  # ### NEW
-                    item.get("question", ""),  # ### NEW
-                    item.get("context", ""),  # ### NEW
-                )  # ### NEW
+            answers = await asyncio.to_thread(prov.query_batch, batch)
+            for text, stats in answers:
                 outs.append(
                     {  # ### NEW
                         "text": text,  # ### NEW
@@ -91,6 +89,7 @@ class _FallbackBatcherPool:  # ### NEW
 
 
 _fallback_batchers = _FallbackBatcherPool()  # ### NEW
+_fallback_flights = AsyncSingleFlight()
 
 
 # ---- models ----
@@ -99,6 +98,8 @@ class QueryRequest(BaseModel):
     question: str
     context: Optional[str] = None
     system: Optional[str] = None  # optional override
+    priority: Optional[str] = None  # interactive | default | bulk
+    deadline_ms: Optional[int] = None  # drop instead of answering late
 
 
 class QueryResponse(BaseModel):
@@ -205,8 +206,15 @@ async def orchestrator_query(inp: QueryRequest):
     )
     try:
         fb = _fallback_batchers.get(system)  # ### NEW
-        out = await fb.submit(
-            {"question": inp.question, "context": inp.context or ""}
+        out = await _fallback_flights.do_scheduled(
+            (system, inp.question.strip(), inp.context or ""),
+            lambda timeout, priority: fb.submit(
+                {"question": inp.question, "context": inp.context or ""},
+                timeout=timeout,
+                meta={"priority": priority},
+            ),
+            deadline_ms=inp.deadline_ms,
+            priority=inp.priority,
         )  # ### NEW
         if isinstance(out, tuple) and len(out) == 2:  # ### NEW
             text, stats = out  # ### NEW
@@ -214,6 +222,10 @@ async def orchestrator_query(inp: QueryRequest):
         if isinstance(out, dict) and "text" in out:  # ### NEW
             return _mk_resp(out.get("text"), out.get("stats", {}))  # ### NEW
         return _mk_resp(out, {})  # ### NEW
+    except asyncio.TimeoutError:
+        raise HTTPException(
+            status_code=504, detail="Query deadline expired before it was served"
+        )
     except Exception as e:
         detail = (
             f"Agent path failed: {agent_err}" if agent_err else "Agent path unavailable"
@@ -1,6 +1,9 @@
 from __future__ import annotations
 from fastapi import APIRouter
-from ._state import manager
+from fastapi.responses import PlainTextResponse
+
+from ..batching.histogram import render_prometheus
+from ._state import fair_queue, gate, generate_flights, manager
 
 router = APIRouter(prefix="", tags=["telemetry"])
 
@@ -14,19 +17,38 @@ async def telemetry():
     return {k: v.stats() for k, v in batchers.items()}
 
 
+@router.get("/telemetry/prometheus", response_class=PlainTextResponse)
+async def telemetry_prometheus():
+    """
+    Same batcher stats in the Prometheus text exposition format.
+    """
+    batchers = getattr(manager, "batchers", {}) or {}
+    return PlainTextResponse(
+        render_prometheus({k: v.stats() for k, v in batchers.items()}),
+        media_type="text/plain; version=0.0.4",
+    )
+
+
 @router.get("/queue/{task_id}")
 async def queue_snapshot(task_id: str):
     """
     Return snapshot of the pending queue for a specific batcher.
     Includes position, ticket id, age in seconds, and optional meta (e.g. tenant).
+    For "generate", also reports the per-tenant fair-share queues ahead of it.
     """
     batchers = getattr(manager, "batchers", {}) or {}
     b = batchers.get(task_id)
     if not b:
         return {"task_id": task_id, "pending": 0, "items": []}
     items = b.pending_snapshot()
-    return {
+    out = {
         "task_id": task_id,
         "pending": b.stats()["pending"],
         "items": items,
     }
+    if task_id == "generate":
+        out["gatekeeper"] = gate.stats()
+        out["coalescing"] = generate_flights.stats()
+        if fair_queue is not None:
+            out["fair_share"] = fair_queue.pending_snapshot()
+    return out
@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+import math
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Dict
+
+
+@dataclass
+class AdaptiveBatchPolicy:
+    target_p95_ms: float = 1000.0
+    min_batch: int = 1
+    max_batch: int = 32
+    min_latency_ms: float = 0.0
+    max_latency_ms: float = 50.0
+    sample_size: int = 256  # recent end-to-end latencies used for the p95
+    ewma_alpha: float = 0.2  # smoothing of forward-latency estimates
+    rate_horizon_sec: float = 1.0  # decay constant of the arrival-rate estimate
+
+
+class AdaptiveBatchController:
+    """
+    Tunes a micro-batcher's collection window and batch cap online.
+
+    The cap follows AIMD against a p95 end-to-end latency SLO: it grows while
+    requests back up behind full batches with latency headroom left, and is
+    halved when the SLO is breached, at most once per congestion epoch: the p95
+    sample window must turn over after a cut before the next one, so the slow
+    samples behind one spike are not punished on every flush. The window is
+    sized from the arrival rate so the batcher only waits when more requests
+    are actually expected to arrive, and never longer than the SLO leaves room
+    for after the forward call.
+    """
+
+    def __init__(
+        self,
+        policy: AdaptiveBatchPolicy | None = None,
+        *,
+        initial_batch: int = 8,
+        initial_latency_ms: float = 5.0,
+    ) -> None:
+        self.policy = policy or AdaptiveBatchPolicy()
+        p = self.policy
+        self._batch_cap = float(min(max(initial_batch, p.min_batch), p.max_batch))
+        self._window_ms = min(
+            max(initial_latency_ms, p.min_latency_ms), p.max_latency_ms
+        )
+        self._latencies: deque[float] = deque(maxlen=max(8, p.sample_size))
+        self._arrival_rate = 0.0  # requests / second (EWMA)
+        self._last_arrival: float | None = None
+        self._forward_per_item_ms: float | None = None  # EWMA
+        self._forward_base_ms: float | None = None  # EWMA of the fixed cost
+        self._p95_ms: float | None = None
+        self._samples_seen = 0
+        self._last_decrease_at: int | None = None  # ``_samples_seen`` at the cut
+        self._last_action = "init"
+        self._adjustments = 0
+
+    # ---- inputs --------------------------------------------------------------
+    def on_arrival(self, now: float | None = None) -> None:
+        # Exponentially decayed event rate: decays towards zero across idle
+        # gaps instead of remembering the last burst.
+        now = time.perf_counter() if now is None else now
+        tau = self.policy.rate_horizon_sec
+        if self._last_arrival is not None:
+            gap = max(now - self._last_arrival, 0.0)
+            self._arrival_rate = self._arrival_rate * math.exp(-gap / tau) + 1.0 / tau
+        else:
+            self._arrival_rate = 1.0 / tau
+        self._last_arrival = now
+
+    def on_flush(
+        self,
+        *,
+        batch_size: int,
+        forward_sec: float,
+        latencies_sec: list[float],
+        queue_depth: int,
+    ) -> None:
+        p = self.policy
+        a = p.ewma_alpha
+        forward_ms = forward_sec * 1000.0
+        per_item = forward_ms / max(batch_size, 1)
+        if self._forward_per_item_ms is None or self._forward_base_ms is None:
+            self._forward_per_item_ms = per_item
+            self._forward_base_ms = forward_ms
+        else:
+            self._forward_per_item_ms = (
+                1 - a
+            ) * self._forward_per_item_ms + a * per_item
+            self._forward_base_ms = (1 - a) * self._forward_base_ms + a * forward_ms
+
+        self._latencies.extend(lat * 1000.0 for lat in latencies_sec)
+        self._samples_seen += len(latencies_sec)
+        self._p95_ms = _percentile(self._latencies, 95.0)
+        self._adjust(batch_size=batch_size, queue_depth=queue_depth)
+
+    # ---- control law ---------------------------------------------------------
+    def _adjust(self, *, batch_size: int, queue_depth: int) -> None:
+        p = self.policy
+        p95 = self._p95_ms or 0.0
+        cap = self._batch_cap
+
+        if p95 > p.target_p95_ms:
+            epoch_over = (
+                self._last_decrease_at is None
+                or self._samples_seen - self._last_decrease_at
+                >= (self._latencies.maxlen or 0)
+            )
+            if epoch_over:
+                cap = max(p.min_batch, cap * 0.5)
+                self._last_decrease_at = self._samples_seen
+                action = "decrease"
+            else:
+                action = "hold"
+        elif (
+            queue_depth > 0 or batch_size >= int(cap)
+        ) and p95 < 0.8 * p.target_p95_ms:
+            cap = min(p.max_batch, cap + 1)
+            action = "increase"
+        else:
+            action = "hold"
+
+        # Only wait when another request is expected within the window, and
+        # leave the forward call enough of the SLO budget.
+        expected_fill_ms = (
+            (int(cap) - 1) / self._arrival_rate * 1000.0
+            if self._arrival_rate > 0
+            else math.inf
+        )
+        budget_ms = p.target_p95_ms - (self._forward_base_ms or 0.0)
+        if self._arrival_rate * (p.max_latency_ms / 1000.0) < 0.5 and queue_depth == 0:
+            window = p.min_latency_ms
+        else:
+            window = min(p.max_latency_ms, expected_fill_ms, max(budget_ms, 0.0))
+        window = min(max(window, p.min_latency_ms), p.max_latency_ms)
+
+        if int(cap) != int(self._batch_cap) or abs(window - self._window_ms) > 0.05:
+            self._adjustments += 1
+        self._batch_cap = cap
+        self._window_ms = window
+        self._last_action = action
+
+    # ---- outputs -------------------------------------------------------------
+    def batch_limit(self) -> int:
+        return int(self._batch_cap)
+
+    def window_sec(self) -> float:
+        return self._window_ms / 1000.0
+
+    def state(self) -> Dict[str, Any]:
+        p = self.policy
+        return {
+            "target_p95_ms": p.target_p95_ms,
+            "observed_p95_ms": None if self._p95_ms is None else round(self._p95_ms, 3),
+            "batch_limit": self.batch_limit(),
+            "window_ms": round(self._window_ms, 3),
+            "arrival_rate_per_sec": round(self._arrival_rate, 3),
+            "forward_ms_per_item": None
+            if self._forward_per_item_ms is None
+            else round(self._forward_per_item_ms, 3),
+            "last_action": self._last_action,
+            "adjustments": self._adjustments,
+            "bounds": {
+                "batch": [p.min_batch, p.max_batch],
+                "window_ms": [p.min_latency_ms, p.max_latency_ms],
+            },
+        }
+
+
+def _percentile(values: Any, pct: float) -> float | None:
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    rank = max(0, min(len(ordered) - 1, math.ceil(pct / 100.0 * len(ordered)) - 1))
+    return ordered[rank]
@@ -0,0 +1,258 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional
+
+from .histogram import RollingHistogram
+
+DEFAULT_TENANT = "default"
+_WAIT_WINDOW_SEC = 60
+_EVICT_PER_CALL = 2  # idle tenants reclaimed per submit (amortised sweep)
+
+
+def _wait_histogram() -> RollingHistogram:
+    # One coarse window per tenant keeps memory small with many tenants.
+    return RollingHistogram(windows_sec=(_WAIT_WINDOW_SEC,), precision=0.05)
+
+
+@dataclass
+class _Entry:
+    payload: Any
+    fut: asyncio.Future
+    meta: Dict[str, Any]
+    enq_ts: float
+    deadline: Optional[float]
+
+
+@dataclass
+class _TenantQueue:
+    weight: float = 1.0
+    max_queue: int = 64
+    items: Deque[_Entry] = field(default_factory=deque)
+    deficit: float = 0.0
+    fresh: bool = True  # not yet credited for the current visit
+    dispatched: int = 0
+    rejected: int = 0
+    dropped: int = 0
+    inflight: int = 0
+    last_active: float = 0.0
+    configured: bool = False  # has an explicit policy; never evicted
+    active: bool = False  # listed in the scheduler's DRR rotation
+    wait: RollingHistogram = field(default_factory=_wait_histogram)
+
+
+class FairShareScheduler:
+    """
+    Deficit round robin across tenants in front of a shared batcher.
+
+    Callers queue per tenant (``meta["tenant"]``); at most ``max_inflight``
+    requests are handed to ``submit_fn`` at a time, and each free slot goes to
+    the next tenant in DRR order, so a tenant's share of the batcher follows its
+    weight no matter how many requests it has queued. Same call signature as
+    the batcher's ``submit`` so it can sit behind ``Gatekeeper`` unchanged.
+
+    Tenants without an explicit policy are forgotten a few at a time once they
+    have nothing queued or in flight and have been idle for ``idle_evict_sec``
+    (by then their wait statistics have expired too), so memory tracks active
+    tenants like the gatekeeper's buckets do.
+    """
+
+    def __init__(
+        self,
+        submit_fn: Callable[..., Awaitable[Any]],
+        *,
+        max_inflight: int = 16,
+        quantum: float = 1.0,
+        default_weight: float = 1.0,
+        default_max_queue: int = 64,
+        idle_evict_sec: float = _WAIT_WINDOW_SEC,
+        clock: Callable[[], float] = time.perf_counter,
+    ) -> None:
+        self._submit = submit_fn
+        self._max_inflight = max(1, int(max_inflight))
+        self._quantum = quantum
+        self._default_weight = default_weight
+        self._default_max_queue = default_max_queue
+        self._idle_evict_sec = idle_evict_sec
+        self._clock = clock
+        # Least recently active first.
+        self._tenants: OrderedDict[str, _TenantQueue] = OrderedDict()
+        self._evicted = 0
+        self._active: Deque[str] = deque()  # tenants with queued work, DRR order
+        self._inflight = 0
+        self._wake = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self._forwarding: set[asyncio.Task] = set()
+
+    def set_tenant(
+        self,
+        tenant: str,
+        *,
+        weight: float | None = None,
+        max_queue: int | None = None,
+    ) -> None:
+        t = self._tenant(tenant)
+        t.configured = True
+        if weight is not None:
+            t.weight = max(float(weight), 1e-3)
+        if max_queue is not None:
+            t.max_queue = int(max_queue)
+
+    def _tenant(self, tenant: str) -> _TenantQueue:
+        t = self._tenants.get(tenant)
+        if t is None:
+            t = _TenantQueue(
+                weight=self._default_weight, max_queue=self._default_max_queue
+            )
+            self._tenants[tenant] = t
+        else:
+            self._tenants.move_to_end(tenant)
+        return t
+
+    def _evict_idle(self, now: float) -> None:
+        for _ in range(_EVICT_PER_CALL):
+            name, t = next(iter(self._tenants.items()))
+            if t.configured:
+                self._tenants.move_to_end(name)
+                continue
+            if (
+                t.items
+                or t.inflight
+                or t.active
+                or now - t.last_active < self._idle_evict_sec
+            ):
+                return
+            del self._tenants[name]
+            self._evicted += 1
+
+    async def submit(
+        self,
+        payload: Any,
+        *,
+        timeout: float | None = None,
+        meta: Optional[Dict[str, Any]] = None,
+    ) -> Any:
+        meta = dict(meta or {})
+        tenant = str(meta.get("tenant") or DEFAULT_TENANT)
+        t = self._tenant(tenant)
+        t.last_active = self._clock()
+        self._evict_idle(t.last_active)
+        if 0 < t.max_queue <= len(t.items):
+            t.rejected += 1
+            raise asyncio.QueueFull
+        loop = asyncio.get_running_loop()
+        now = time.perf_counter()
+        entry = _Entry(
+            payload=payload,
+            fut=loop.create_future(),
+            meta=meta,
+            enq_ts=now,
+            deadline=None if timeout is None else now + timeout,
+        )
+        if not t.active:
+            t.active = True
+            self._active.append(tenant)
+        t.items.append(entry)
+        if self._task is None or self._task.done():
+            self._task = loop.create_task(self._dispatch())
+        self._wake.set()
+        return await asyncio.wait_for(entry.fut, timeout=timeout)
+
+    # ---- DRR ---------------------------------------------------------------
+    def _next(self) -> tuple[str, _Entry] | None:
+        while self._active:
+            name = self._active[0]
+            t = self._tenants[name]
+            while t.items and t.items[0].fut.done():  # caller already gave up
+                t.items.popleft()
+                t.dropped += 1
+            if not t.items:
+                self._active.popleft()
+                t.active = False
+                t.deficit = 0.0
+                t.fresh = True
+                continue
+            if t.fresh:
+                t.deficit += self._quantum * t.weight
+                t.fresh = False
+            if t.deficit >= 1.0:
+                t.deficit -= 1.0
+                return name, t.items.popleft()
+            t.fresh = True
+            self._active.rotate(-1)
+        return None
+
+    async def _dispatch(self) -> None:
+        while True:
+            picked = self._next() if self._inflight < self._max_inflight else None
+            if picked is None:
+                self._wake.clear()
+                await self._wake.wait()
+                continue
+            name, entry = picked
+            t = self._tenants[name]
+            t.dispatched += 1
+            t.inflight += 1
+            t.wait.record(time.perf_counter() - entry.enq_ts)
+            self._inflight += 1
+            task = asyncio.get_running_loop().create_task(self._forward(t, entry))
+            self._forwarding.add(task)
+            task.add_done_callback(self._forwarding.discard)
+
+    async def _forward(self, t: _TenantQueue, entry: _Entry) -> None:
+        try:
+            timeout = (
+                None
+                if entry.deadline is None
+                else max(entry.deadline - time.perf_counter(), 0.0)
+            )
+            out = await self._submit(entry.payload, timeout=timeout, meta=entry.meta)
+        except Exception as e:
+            if not entry.fut.done():
+                entry.fut.set_exception(e)
+        else:
+            if not entry.fut.done():
+                entry.fut.set_result(out)
+        finally:
+            self._inflight -= 1
+            t.inflight -= 1
+            t.last_active = self._clock()
+            self._wake.set()
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    # ---- telemetry ---------------------------------------------------------
+    def pending_snapshot(self) -> Dict[str, Any]:
+        now = time.perf_counter()
+        tenants: Dict[str, Any] = {}
+        for name, t in self._tenants.items():
+            tenants[name] = {
+                "depth": len(t.items),
+                "max_queue": t.max_queue,
+                "weight": t.weight,
+                "deficit": round(t.deficit, 3),
+                "oldest_wait_sec": round(now - t.items[0].enq_ts, 6)
+                if t.items
+                else None,
+                "dispatched": t.dispatched,
+                "rejected": t.rejected,
+                "dropped": t.dropped,
+                "wait_sec": t.wait.snapshot(_WAIT_WINDOW_SEC),
+            }
+        return {
+            "inflight": self._inflight,
+            "max_inflight": self._max_inflight,
+            "depth": sum(len(t.items) for t in self._tenants.values()),
+            "tenants_evicted": self._evicted,
+            "tenants": tenants,
+        }
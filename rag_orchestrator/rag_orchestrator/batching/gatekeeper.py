@@ -2,9 +2,13 @@ from __future__ import annotations
 
 import asyncio
 import time
+from collections import OrderedDict
 from dataclasses import dataclass
 from typing import Any, Dict, Optional
 
+_NS = 1_000_000_000
+_EVICT_PER_CALL = 2  # idle buckets reclaimed per decision (amortised sweep)
+
 
 class QueueFull429(Exception): ...
 
@@ -17,36 +21,94 @@ class TenantPolicy:
     rps: float = 20.0
     burst: int = 40
     timeout_s: float = 30.0
+    weight: float = 1.0  # fair-queue share relative to other tenants
+    max_queue: int = 64  # fair-queue depth before QueueFull429
+
+
+class _Rate:
+    """A policy's limits precomputed as integer nanoseconds."""
+
+    __slots__ = ("interval_ns", "tolerance_ns", "timeout_s")
+
+    def __init__(self, policy: TenantPolicy) -> None:
+        self.interval_ns = max(1, int(_NS / policy.rps)) if policy.rps > 0 else 0
+        self.tolerance_ns = self.interval_ns * max(int(policy.burst), 1)
+        self.timeout_s = policy.timeout_s
 
 
 class _Bucket:
-    def __init__(self, rate: float, burst: int):
+    """
+    Token bucket stored as one integer: the theoretical time (ns) at which the
+    bucket would be full again (GCRA). Refill is implicit in the clock, so a
+    decision is a compare and an add; a bucket with ``tat <= now`` is full and
+    indistinguishable from a new one, which is what makes eviction safe.
+    """
+
+    __slots__ = ("tat", "rate", "meta")
+
+    def __init__(self, rate: _Rate, tenant: str) -> None:
+        self.tat = 0
         self.rate = rate
-        self.capacity = burst
-        self.tokens = burst
-        self.ts = time.perf_counter()
-        self.lock = asyncio.Lock()
-
-    async def allow(self) -> bool:
-        async with self.lock:
-            now = time.perf_counter()
-            self.tokens = min(self.capacity, self.tokens + (now - self.ts) * self.rate)
-            self.ts = now
-            if self.tokens >= 1:
-                self.tokens -= 1
-                return True
+        self.meta = {"tenant": tenant}  # shared, read-only request meta
+
+    def allow(self, now_ns: int) -> bool:
+        interval = self.rate.interval_ns
+        if interval == 0:  # rps <= 0: tenant is blocked
+            return False
+        tat = self.tat if self.tat > now_ns else now_ns
+        if tat + interval - now_ns > self.rate.tolerance_ns:
             return False
+        self.tat = tat + interval
+        return True
 
 
 class Gatekeeper:
-    def __init__(self, submit_fn):
+    """
+    Per-tenant rate limiting in front of the batchers.
+
+    Decisions run on the event loop without locks or per-call allocation.
+    Buckets are kept in least-recently-used order and reclaimed a few at a time
+    once they have refilled, so memory tracks active tenants, not every tenant
+    name ever seen.
+    """
+
+    def __init__(self, submit_fn, *, clock_ns=time.monotonic_ns):
         self._submit = submit_fn
+        self._clock_ns = clock_ns
         self._policies: dict[str, TenantPolicy] = {}
-        self._buckets: dict[str, _Bucket] = {}
+        self._rates: dict[str, _Rate] = {}
+        self._default_rate = _Rate(TenantPolicy())
+        self._buckets: OrderedDict[str, _Bucket] = OrderedDict()
+        self._evicted = 0
 
     def set_policy(self, tenant: str, policy: TenantPolicy) -> None:
         self._policies[tenant] = policy
-        self._buckets[tenant] = _Bucket(policy.rps, policy.burst)
+        rate = _Rate(policy)
+        self._rates[tenant] = rate
+        if tenant == "default":
+            self._default_rate = rate
+        bucket = self._buckets.get(tenant)
+        if bucket is not None:
+            bucket.rate = rate
+
+    def admit(self, tenant: str) -> _Bucket | None:
+        """Rate-limit decision for one request; returns the bucket if allowed."""
+        now = self._clock_ns()
+        buckets = self._buckets
+        bucket = buckets.get(tenant)
+        if bucket is None:
+            bucket = _Bucket(self._rates.get(tenant, self._default_rate), tenant)
+            buckets[tenant] = bucket
+        else:
+            buckets.move_to_end(tenant)
+        allowed = bucket.allow(now)
+        for _ in range(_EVICT_PER_CALL):
+            oldest = next(iter(buckets))
+            if oldest == tenant or buckets[oldest].tat > now:
+                break
+            del buckets[oldest]
+            self._evicted += 1
+        return bucket if allowed else None
 
     async def handle(
         self,
@@ -55,15 +117,22 @@ class Gatekeeper:
         *,
         meta: Optional[Dict[str, Any]] = None,  # ### NEW (optional)
     ):
-        policy = self._policies.get(tenant, TenantPolicy())
-        buck = self._buckets.setdefault(tenant, _Bucket(policy.rps, policy.burst))
-        if not await buck.allow():
+        bucket = self.admit(tenant)
+        if bucket is None:
             raise RateLimited429("rate limited")
         try:
             # pass timeout as named kwarg; include tenant meta for telemetry
-            meta = {"tenant": tenant, **(meta or {})}  # ### NEW
             return await self._submit(
-                payload, timeout=policy.timeout_s, meta=meta
+                payload,
+                timeout=bucket.rate.timeout_s,
+                meta={**bucket.meta, **meta} if meta else bucket.meta,
             )  # ### NEW
         except asyncio.QueueFull:
             raise QueueFull429("queue full")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "tenants_tracked": len(self._buckets),
+            "tenants_evicted": self._evicted,
+            "policies": len(self._policies),
+        }
@@ -0,0 +1,281 @@
+from __future__ import annotations
+
+import math
+import time
+from array import array
+from typing import Any, Dict, Iterable, Tuple
+
+DEFAULT_WINDOWS_SEC: Tuple[int, ...] = (60, 300)
+DEFAULT_QUANTILES: Tuple[float, ...] = (0.5, 0.9, 0.99)
+
+
+class LogHistogram:
+    """
+    Fixed-memory histogram with log-spaced buckets (HDR-style).
+
+    Every bucket is ``precision`` wider than the previous one, so any recorded
+    value is reported within that relative error. Values outside
+    ``[lowest, highest]`` are clamped into the first or last bucket. The
+    bucket array is allocated on first use, so idle slots cost nothing.
+    """
+
+    __slots__ = (
+        "lowest",
+        "highest",
+        "precision",
+        "_log_base",
+        "size",
+        "counts",
+        "used",
+        "total",
+    )
+
+    def __init__(
+        self, lowest: float = 1e-6, highest: float = 1e4, precision: float = 0.02
+    ) -> None:
+        self.lowest = lowest
+        self.highest = highest
+        self.precision = precision
+        self._log_base = math.log1p(precision)
+        self.size = int(math.ceil(math.log(highest / lowest) / self._log_base)) + 1
+        self.counts: array | None = None
+        self.used: set[int] = set()  # non-empty buckets, bounded by ``size``
+        self.total = 0
+
+    def index_of(self, value: float) -> int:
+        if value <= self.lowest:
+            return 0
+        idx = int(math.log(value / self.lowest) / self._log_base)
+        return min(idx, self.size - 1)
+
+    def value_of(self, index: int) -> float:
+        # Geometric midpoint of the bucket.
+        return self.lowest * math.exp((index + 0.5) * self._log_base)
+
+    def record(self, value: float, count: int = 1) -> None:
+        if self.counts is None:
+            self.counts = array("I", bytes(4 * self.size))
+        idx = self.index_of(value)
+        self.counts[idx] += count
+        self.used.add(idx)
+        self.total += count
+
+    def reset(self) -> None:
+        if self.counts is not None:
+            for idx in self.used:
+                self.counts[idx] = 0
+        self.used.clear()
+        self.total = 0
+
+
+class RollingHistogram:
+    """
+    A ring of `LogHistogram` slots covering the longest sliding window.
+
+    Recording touches only the current slot; queries merge the slots that fall
+    inside the requested window, so memory stays fixed regardless of traffic.
+    Lifetime count and sum are kept alongside for monotonic counters.
+    """
+
+    def __init__(
+        self,
+        *,
+        windows_sec: Iterable[int] = DEFAULT_WINDOWS_SEC,
+        slot_sec: float = 10.0,
+        lowest: float = 1e-6,
+        highest: float = 1e4,
+        precision: float = 0.02,
+        integer: bool = False,
+        clock=time.monotonic,
+    ) -> None:
+        self.windows_sec = tuple(sorted(int(w) for w in windows_sec))
+        self.slot_sec = float(slot_sec)
+        self.integer = integer
+        self._clock = clock
+        n_slots = int(math.ceil(self.windows_sec[-1] / self.slot_sec))
+        self._slots = [LogHistogram(lowest, highest, precision) for _ in range(n_slots)]
+        self._slot_ids = [-1] * n_slots  # absolute slot number held by each entry
+        self._sums = [0.0] * n_slots
+        self._maxes = [0.0] * n_slots
+        self._started = clock()
+        self.total_count = 0
+        self.total_sum = 0.0
+
+    def _slot(self, now: float) -> int:
+        absolute = int(now // self.slot_sec)
+        pos = absolute % len(self._slots)
+        if self._slot_ids[pos] != absolute:
+            self._slots[pos].reset()
+            self._slot_ids[pos] = absolute
+            self._sums[pos] = 0.0
+            self._maxes[pos] = 0.0
+        return pos
+
+    def record(self, value: float, count: int = 1) -> None:
+        pos = self._slot(self._clock())
+        self._slots[pos].record(value, count)
+        self._sums[pos] += value * count
+        self.total_count += count
+        self.total_sum += value * count
+        if value > self._maxes[pos]:
+            self._maxes[pos] = value
+
+    def snapshot(
+        self, window_sec: int, quantiles: Iterable[float] = DEFAULT_QUANTILES
+    ) -> Dict[str, Any]:
+        now = self._clock()
+        current = int(now // self.slot_sec)
+        oldest = current - int(math.ceil(window_sec / self.slot_sec)) + 1
+        live = [
+            i
+            for i, slot_id in enumerate(self._slot_ids)
+            if oldest <= slot_id <= current
+        ]
+        merged: Dict[int, int] = {}
+        count = 0
+        total = 0.0
+        peak = 0.0
+        for i in live:
+            slot = self._slots[i]
+            if slot.counts is not None:
+                for idx in slot.used:
+                    merged[idx] = merged.get(idx, 0) + slot.counts[idx]
+            count += slot.total
+            total += self._sums[i]
+            peak = max(peak, self._maxes[i])
+
+        covered = min(float(window_sec), max(now - self._started, self.slot_sec))
+        out: Dict[str, Any] = {
+            "count": count,
+            "rate_per_sec": round(count / covered, 3) if covered > 0 else 0.0,
+            "mean": round(total / count, 6) if count else None,
+            "max": self._fmt(peak) if count else None,
+        }
+        for q in quantiles:
+            out[f"p{_quantile_label(q)}"] = (
+                self._fmt(min(self._quantile(merged, count, q), peak))
+                if count
+                else None
+            )
+        return out
+
+    def _quantile(self, counts: Dict[int, int], total: int, q: float) -> float:
+        target = max(1, int(math.ceil(q * total)))
+        seen = 0
+        for idx in sorted(counts):
+            seen += counts[idx]
+            if seen >= target:
+                return self._slots[0].value_of(idx)
+        return self._slots[0].value_of(max(counts))
+
+    def _fmt(self, value: float) -> float:
+        return float(round(value)) if self.integer else round(value, 6)
+
+    def summary(self) -> Dict[str, Any]:
+        return {f"{w}s": self.snapshot(w) for w in self.windows_sec}
+
+    def totals(self) -> Dict[str, Any]:
+        return {"count": self.total_count, "sum": round(self.total_sum, 6)}
+
+
+def _quantile_label(q: float) -> str:
+    label = f"{q * 100:g}"
+    return label.replace(".", "_")
+
+
+# ---- Prometheus text exposition ----------------------------------------------
+_PROM_SUMMARIES = {
+    "queue_wait_sec": ("krionis_batcher_queue_wait_seconds", "Time spent queued"),
+    "forward_latency_sec": (
+        "krionis_batcher_forward_latency_seconds",
+        "Duration of one batched forward call",
+    ),
+    "e2e_latency_sec": (
+        "krionis_batcher_end_to_end_latency_seconds",
+        "Enqueue-to-result latency per request",
+    ),
+    "batch_size": ("krionis_batcher_batch_size", "Requests per forwarded batch"),
+}
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels: Any) -> str:
+    return ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items())
+
+
+def render_prometheus(stats_by_batcher: Dict[str, Dict[str, Any]]) -> str:
+    """Render batcher ``stats()`` dicts in the Prometheus text format (0.0.4)."""
+    lines: list[str] = []
+
+    def _family(name: str, kind: str, help_text: str) -> None:
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+
+    for key, (metric, help_text) in _PROM_SUMMARIES.items():
+        _family(
+            metric,
+            "summary",
+            f"{help_text} (quantiles over a sliding window, sum and count since start).",
+        )
+        for batcher, stats in stats_by_batcher.items():
+            windows = (stats.get("histograms") or {}).get(key) or {}
+            for window, snap in windows.items():
+                for field_name, value in snap.items():
+                    if not field_name.startswith("p") or value is None:
+                        continue
+                    quantile = float(field_name[1:].replace("_", ".")) / 100.0
+                    lbl = _labels(
+                        batcher=batcher, window=window, quantile=f"{quantile:g}"
+                    )
+                    lines.append(f"{metric}{{{lbl}}} {value}")
+            # Windowed sums and counts fall as slots expire, which Prometheus
+            # would read as counter resets; export the lifetime totals.
+            totals = (stats.get("histogram_totals") or {}).get(key)
+            if totals:
+                lbl = _labels(batcher=batcher)
+                lines.append(f"{metric}_sum{{{lbl}}} {totals['sum']}")
+                lines.append(f"{metric}_count{{{lbl}}} {totals['count']}")
+
+    _family(
+        "krionis_batcher_throughput_requests_per_second",
+        "gauge",
+        "Completed requests per second over the sliding window.",
+    )
+    for batcher, stats in stats_by_batcher.items():
+        for window, snap in (stats.get("throughput") or {}).items():
+            lbl = _labels(batcher=batcher, window=window)
+            lines.append(
+                "krionis_batcher_throughput_requests_per_second"
+                f"{{{lbl}}} {snap.get('requests_per_sec', 0.0)}"
+            )
+
+    scalars = (
+        (
+            "krionis_batcher_requests_total",
+            "counter",
+            "total_requests",
+            "Requests served.",
+        ),
+        (
+            "krionis_batcher_batches_total",
+            "counter",
+            "total_batches",
+            "Batches forwarded.",
+        ),
+        (
+            "krionis_batcher_pending",
+            "gauge",
+            "pending",
+            "Requests waiting in the queue.",
+        ),
+    )
+    for metric, kind, field_name, help_text in scalars:
+        _family(metric, kind, help_text)
+        for batcher, stats in stats_by_batcher.items():
+            lines.append(
+                f"{metric}{{{_labels(batcher=batcher)}}} {stats.get(field_name) or 0}"
+            )
+    return "\n".join(lines) + "\n"
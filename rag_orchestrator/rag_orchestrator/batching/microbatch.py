@@ -1,10 +1,20 @@
 from __future__ import annotations
 
 import asyncio
+import math
 import time
 from dataclasses import dataclass, field
 from typing import Any, Callable, Dict, List, Optional
 
+from .adaptive import AdaptiveBatchController
+from .histogram import RollingHistogram
+from .scheduling import (
+    PRIORITY_CLASSES,
+    DeadlineQueue,
+    priority_class,
+    priority_rank,
+)
+
 
 # ---- request envelope --------------------------------------------------------
 @dataclass
@@ -16,6 +26,8 @@ class _Req:
     meta: Dict[str, Any] = field(
         default_factory=dict
     )  # ### NEW (optional user/tenant info)
+    priority: str = "default"  # normalised meta["priority"]
+    deadline: float = math.inf  # perf_counter() time after which it is dropped
 
 
 class AsyncMicroBatcher:
@@ -27,9 +39,14 @@ class AsyncMicroBatcher:
         max_batch: int = 8,
         max_latency_ms: int = 5,
         name: str = "default",  # ### NEW (for telemetry/UI)
+        controller: AdaptiveBatchController | None = None,
     ) -> None:
         self.name = name  # ### NEW
-        self._q: asyncio.Queue[_Req] = asyncio.Queue(maxsize=max_queue)
+        # Optional online tuner for the window and batch cap (see adaptive.py);
+        # without one the fixed max_batch / max_latency_ms apply.
+        self._controller = controller
+        # Served by priority class, then earliest deadline (see scheduling.py).
+        self._q: DeadlineQueue[_Req] = DeadlineQueue(maxsize=max_queue)
         self._forward = forward_fn
         self._max_batch = max_batch
         self._window = max_latency_ms / 1000.0
@@ -45,6 +62,23 @@ class AsyncMicroBatcher:
         self._start_time = time.perf_counter()  # ### NEW (uptime)
         self._ticket_ctr = 0  # ### NEW
         self._last_avg_queue_wait: float | None = None  # ### NEW
+        # Fixed-memory sliding-window distributions (see histogram.py).
+        self._hist: Dict[str, RollingHistogram] = {
+            "queue_wait_sec": RollingHistogram(),
+            "forward_latency_sec": RollingHistogram(),
+            "e2e_latency_sec": RollingHistogram(),
+            "batch_size": RollingHistogram(lowest=1.0, highest=1e5, integer=True),
+        }
+        self._classes: Dict[str, Dict[str, Any]] = {
+            name: {
+                "submitted": 0,
+                "served": 0,
+                "expired": 0,
+                "cancelled": 0,
+                "queue_wait": RollingHistogram(),
+            }
+            for name in PRIORITY_CLASSES
+        }
 
     async def start(self) -> None:
         """Start the internal batching task."""
@@ -64,26 +98,49 @@ class AsyncMicroBatcher:
         timeout: float | None = None,
         meta: Optional[Dict[str, Any]] = None,  # ### NEW (optional)
     ) -> Any:
-        """Submit a request payload and wait for the batched output."""
+        """
+        Submit a request payload and wait for the batched output.
+
+        ``meta["priority"]`` selects a class from ``PRIORITY_CLASSES`` and
+        ``meta["deadline_ms"]`` bounds how long the request may wait; together
+        with ``timeout`` the earlier deadline wins. Requests past their
+        deadline are failed with ``asyncio.TimeoutError`` instead of forwarded.
+        """
         fut: asyncio.Future = asyncio.get_running_loop().create_future()
+        now = time.perf_counter()
+        meta = dict(meta or {})
+        prio = priority_class(meta.get("priority"))
+        meta["priority"] = prio
+        deadline = math.inf
+        if timeout is not None:
+            deadline = now + timeout
+        if meta.get("deadline_ms") is not None:
+            deadline = min(deadline, now + float(meta["deadline_ms"]) / 1000.0)
         self._ticket_ctr += 1  # ### NEW
         req = _Req(  # ### NEW (enrich envelope)
             payload=payload,
             fut=fut,
-            enq_ts=time.perf_counter(),
+            enq_ts=now,
             ticket=self._ticket_ctr,
-            meta=meta or {},
+            meta=meta,
+            priority=prio,
+            deadline=deadline,
         )
-        self._q.put_nowait(req)
+        self._q.put_nowait(
+            req, rank=priority_rank(prio), deadline=deadline, ticket=req.ticket
+        )
+        self._classes[prio]["submitted"] += 1
+        if self._controller is not None:
+            self._controller.on_arrival(now)
         return await asyncio.wait_for(fut, timeout=timeout)
 
     # --- Lightweight queue snapshot for UI -----------------------------------
     def pending_snapshot(self, limit: int = 200) -> List[Dict[str, Any]]:  # ### NEW
         """
-        Non-blocking view of the waiting items (position, age, meta).
-        Uses the queue's internal deque for a read-only snapshot.
+        Non-blocking view of the waiting items (position, age, meta),
+        listed in the order they will be served.
         """
-        raw = list(getattr(self._q, "_queue", []))[:limit]
+        raw = self._q.ordered()[:limit]
         now = time.perf_counter()
         out: List[Dict[str, Any]] = []
         for pos, r in enumerate(raw, start=1):
@@ -92,6 +149,10 @@ class AsyncMicroBatcher:
                     "ticket": r.ticket,
                     "position": pos,
                     "age_sec": round(now - r.enq_ts, 6),
+                    "priority": r.priority,
+                    "deadline_in_sec": None
+                    if r.deadline == math.inf
+                    else round(r.deadline - now, 6),
                     "meta": r.meta,
                 }
             )
@@ -104,21 +165,30 @@ class AsyncMicroBatcher:
                 first = await asyncio.wait_for(self._q.get(), timeout=0.01)
             except asyncio.TimeoutError:
                 continue
+            if self._drop_if_stale(first, time.perf_counter()):
+                continue
 
             batch = [first]
-            deadline = time.perf_counter() + self._window
+            max_batch, window = self._limits()
+            deadline = time.perf_counter() + window
 
-            while len(batch) < self._max_batch:
+            while len(batch) < max_batch:
                 remaining = deadline - time.perf_counter()
                 if remaining <= 0:
                     break
                 try:
                     nxt = await asyncio.wait_for(self._q.get(), timeout=remaining)
-                    batch.append(nxt)
                 except asyncio.TimeoutError:
                     break
+                if not self._drop_if_stale(nxt, time.perf_counter()):
+                    batch.append(nxt)
 
+            # The window may have outlived some deadlines; don't spend a
+            # forward slot on callers that have already given up.
             t0 = time.perf_counter()
+            batch = [r for r in batch if not self._drop_if_stale(r, t0)]
+            if not batch:
+                continue
             try:
                 outs = self._forward([r.payload for r in batch])
                 if asyncio.iscoroutine(outs):
@@ -143,10 +213,66 @@ class AsyncMicroBatcher:
             waits = [t0 - r.enq_ts for r in batch]  # ### NEW
             if waits:
                 self._last_avg_queue_wait = round(sum(waits) / len(waits), 6)  # ### NEW
+            latencies = [t1 - r.enq_ts for r in batch]
+            self._hist["batch_size"].record(len(batch))
+            self._hist["forward_latency_sec"].record(t1 - t0)
+            for r, wait, latency in zip(batch, waits, latencies):
+                self._hist["queue_wait_sec"].record(wait)
+                self._hist["e2e_latency_sec"].record(latency)
+                cls = self._classes[r.priority]
+                cls["served"] += 1
+                cls["queue_wait"].record(wait)
+            if self._controller is not None:
+                self._controller.on_flush(
+                    batch_size=len(batch),
+                    forward_sec=t1 - t0,
+                    latencies_sec=latencies,
+                    queue_depth=self._q.qsize(),
+                )
+
+    def _drop_if_stale(self, req: _Req, now: float) -> bool:
+        if req.fut.done():  # caller timed out or was cancelled
+            self._classes[req.priority]["cancelled"] += 1
+            return True
+        if now >= req.deadline:
+            req.fut.set_exception(
+                asyncio.TimeoutError("deadline expired before the request was batched")
+            )
+            self._classes[req.priority]["expired"] += 1
+            return True
+        return False
+
+    def _limits(self) -> tuple[int, float]:
+        if self._controller is None:
+            return self._max_batch, self._window
+        return self._controller.batch_limit(), self._controller.window_sec()
 
     # --- Telemetry API ---
     def stats(self) -> Dict[str, Any]:
         """Return current telemetry stats as a dict."""
+        histograms = {k: h.summary() for k, h in self._hist.items()}
+        throughput = {
+            window: {
+                "requests_per_sec": snap["rate_per_sec"],
+                "batches_per_sec": histograms["batch_size"][window]["rate_per_sec"],
+            }
+            for window, snap in histograms["e2e_latency_sec"].items()
+        }
+        pending_by_class = {name: 0 for name in PRIORITY_CLASSES}
+        for r in self._q.ordered():
+            pending_by_class[r.priority] += 1
+        window_sec = self._hist["queue_wait_sec"].windows_sec[0]
+        classes = {
+            name: {
+                "pending": pending_by_class[name],
+                "submitted": c["submitted"],
+                "served": c["served"],
+                "expired": c["expired"],
+                "cancelled": c["cancelled"],
+                "queue_wait_sec": c["queue_wait"].snapshot(window_sec),
+            }
+            for name, c in self._classes.items()
+        }
         return {
             "name": self.name,  # ### NEW
             "uptime_sec": round(time.perf_counter() - self._start_time, 3),  # ### NEW
@@ -159,4 +285,9 @@ class AsyncMicroBatcher:
             "pending": self._q.qsize(),
             "max_batch": self._max_batch,
             "max_latency_ms": int(self._window * 1000),
+            "adaptive": self._controller.state() if self._controller else None,
+            "histograms": histograms,
+            "histogram_totals": {k: h.totals() for k, h in self._hist.items()},
+            "throughput": throughput,
+            "classes": classes,
         }
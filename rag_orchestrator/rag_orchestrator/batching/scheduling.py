@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import asyncio
+import heapq
+import math
+from typing import Any, Generic, List, Tuple, TypeVar
+
+# Lower rank is served first. Unknown class names fall back to "default".
+PRIORITY_CLASSES: Tuple[str, ...] = ("interactive", "default", "bulk")
+DEFAULT_PRIORITY = "default"
+
+T = TypeVar("T")
+
+
+def priority_class(value: Any) -> str:
+    """Normalise a ``meta["priority"]`` value (name or rank) to a class name."""
+    if isinstance(value, bool) or value is None:
+        return DEFAULT_PRIORITY
+    if isinstance(value, (int, float)):
+        rank = min(max(int(value), 0), len(PRIORITY_CLASSES) - 1)
+        return PRIORITY_CLASSES[rank]
+    name = str(value).strip().lower()
+    return name if name in PRIORITY_CLASSES else DEFAULT_PRIORITY
+
+
+def priority_rank(name: str) -> int:
+    return PRIORITY_CLASSES.index(name)
+
+
+class DeadlineQueue(Generic[T]):
+    """
+    Bounded asyncio queue served by (priority rank, deadline, arrival ticket).
+
+    Within a priority class this is earliest-deadline-first; items without a
+    deadline keep FIFO order behind those that have one. Exposes the subset of
+    the ``asyncio.Queue`` API the micro-batcher uses.
+    """
+
+    def __init__(self, maxsize: int = 0) -> None:
+        self._maxsize = maxsize
+        self._heap: List[Tuple[int, float, int, T]] = []
+        self._not_empty = asyncio.Event()
+
+    def qsize(self) -> int:
+        return len(self._heap)
+
+    def empty(self) -> bool:
+        return not self._heap
+
+    def full(self) -> bool:
+        return 0 < self._maxsize <= len(self._heap)
+
+    def put_nowait(
+        self, item: T, *, rank: int, deadline: float = math.inf, ticket: int
+    ) -> None:
+        if self.full():
+            raise asyncio.QueueFull
+        heapq.heappush(self._heap, (rank, deadline, ticket, item))
+        self._not_empty.set()
+
+    def get_nowait(self) -> T:
+        if not self._heap:
+            raise asyncio.QueueEmpty
+        item = heapq.heappop(self._heap)[-1]
+        if not self._heap:
+            self._not_empty.clear()
+        return item
+
+    async def get(self) -> T:
+        while not self._heap:
+            self._not_empty.clear()
+            await self._not_empty.wait()
+        return self.get_nowait()
+
+    def ordered(self) -> List[T]:
+        """Waiting items in service order (read-only snapshot)."""
+        return [entry[-1] for entry in sorted(self._heap, key=lambda e: e[:3])]
@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+from .scheduling import priority_class
+
+
+class AsyncSingleFlight:
+    """
+    Coalesce identical in-flight calls on the event loop.
+
+    The first caller for a key starts ``fn`` as its own task; later callers
+    with the same key await that task's result until it finishes. A caller
+    timing out or being cancelled does not cancel the shared run for others.
+    """
+
+    def __init__(self) -> None:
+        self._flights: Dict[Hashable, asyncio.Future] = {}
+        # Absolute deadline (perf_counter) each scheduled run was started with.
+        self._run_deadlines: Dict[Hashable, Optional[float]] = {}
+        self._executions = 0
+        self._coalesced = 0
+
+    async def do(
+        self,
+        key: Hashable,
+        fn: Callable[[], Awaitable[Any]],
+        *,
+        timeout: float | None = None,
+    ) -> Any:
+        fut = self._flights.get(key)
+        if fut is None:
+            fut = asyncio.ensure_future(fn())
+            self._flights[key] = fut
+            self._executions += 1
+            fut.add_done_callback(lambda f, k=key: self._finish(k, f))
+        else:
+            self._coalesced += 1
+        return await asyncio.wait_for(asyncio.shield(fut), timeout=timeout)
+
+    async def do_scheduled(
+        self,
+        key: Hashable,
+        fn: Callable[[Optional[float], str], Awaitable[Any]],
+        *,
+        timeout: float | None = None,
+        deadline_ms: float | None = None,
+        priority: Any = None,
+    ) -> Any:
+        """
+        ``do`` for scheduled requests: callers of the same priority class share
+        a run, whatever their deadlines. ``fn(timeout, priority)`` runs with the
+        starting caller's deadline. A sharer with an earlier deadline times out
+        on its own; one with a later deadline whose run times out first starts
+        (or joins) a fresh run with the time it has left.
+        """
+        prio = priority_class(priority)
+        own = timeout
+        if deadline_ms is not None:
+            own = (
+                float(deadline_ms) / 1000.0
+                if own is None
+                else min(own, float(deadline_ms) / 1000.0)
+            )
+        deadline = None if own is None else time.perf_counter() + own
+        flight_key = (key, prio)
+        while True:
+            remaining = None
+            if deadline is not None:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    raise asyncio.TimeoutError()
+            fut = self._flights.get(flight_key)
+            if fut is None or fut.done():
+                fut = asyncio.ensure_future(fn(remaining, prio))
+                self._flights[flight_key] = fut
+                self._run_deadlines[flight_key] = deadline
+                self._executions += 1
+                fut.add_done_callback(lambda f, k=flight_key: self._finish(k, f))
+            else:
+                self._coalesced += 1
+            run_deadline = self._run_deadlines.get(flight_key)
+            try:
+                return await asyncio.wait_for(asyncio.shield(fut), timeout=remaining)
+            except asyncio.TimeoutError:
+                outlives_run = run_deadline is not None and (
+                    deadline is None or deadline > run_deadline
+                )
+                if not (fut.done() and outlives_run):
+                    raise
+
+    def _finish(self, key: Hashable, fut: asyncio.Future) -> None:
+        if self._flights.get(key) is fut:
+            del self._flights[key]
+            self._run_deadlines.pop(key, None)
+        if not fut.cancelled():
+            fut.exception()  # retrieved: every waiter may have gone already
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "in_flight": len(self._flights),
+            "executions": self._executions,
+            "coalesced": self._coalesced,
+        }
@@ -1,8 +1,11 @@
 # rag_orchestrator/providers/rag_llm_api_provider.py
 from __future__ import annotations
 
+import asyncio
+import json
+import threading
 from pathlib import Path
-from typing import Tuple
+from typing import Any, Callable, List, Sequence, Tuple
 
 
 class RagLLMApiProvider:
@@ -19,6 +22,14 @@ class RagLLMApiProvider:
 
         # Detect & bind an "ask" callable from the pipeline.
         self._ask = self._resolve_ask_callable()
+        self._ask_batch = self._resolve_ask_batch_callable()
+
+        # The generate and validate batchers share one model; run their batches
+        # one at a time instead of contending for it from two worker threads.
+        self._generate_lock = threading.Lock()
+        self._embed_lock = threading.Lock()
+        self._rerank_lock = threading.Lock()
+        self._retrieve_lock = threading.Lock()
 
     def _resolve_ask_callable(self):
         try:
@@ -47,6 +58,13 @@ class RagLLMApiProvider:
 
         raise RuntimeError("LLM wrapper found but did not expose `.ask` or `.ask_llm`.")
 
+    def _resolve_ask_batch_callable(self) -> Callable[..., Any] | None:
+        try:
+            from rag_llm_api_pipeline.llm_wrapper import ask_llm_batch  # type: ignore
+        except Exception:
+            return None
+        return ask_llm_batch
+
     def query(self, question: str, context: str = "") -> Tuple[str, dict]:
         """
         Ask the underlying pipeline. Returns (text, stats dict).
@@ -57,3 +75,127 @@ class RagLLMApiProvider:
             return str(text or ""), dict(stats or {})
         # Be forgiving: if just text came back
         return str(out or ""), {}
+
+    # ---- batched interface (used by the AsyncMicroBatcher forwards) ---------
+    @staticmethod
+    def _as_request(payload: Any) -> Tuple[str, str]:
+        if isinstance(payload, dict):
+            question = payload.get("question") or payload.get("prompt") or ""
+            return str(question), str(payload.get("context") or "")
+        return str(payload or ""), ""
+
+    def query_batch(self, payloads: Sequence[Any]) -> List[Tuple[str, dict]]:
+        """
+        Answer several prompts (strings or {"question", "context"} dicts) with a
+        single padded generation call. Falls back to one `query` per prompt
+        when the pipeline has no batched entry point.
+        """
+        requests = [self._as_request(payload) for payload in payloads]
+        if not requests:
+            return []
+        with self._generate_lock:
+            if self._ask_batch is None:
+                return [self.query(question, context) for question, context in requests]
+            outs = self._ask_batch(requests)
+        return [(str(text or ""), dict(stats or {})) for text, stats in outs]
+
+    def embed_batch(self, texts: Sequence[Any]) -> List[List[float]]:
+        from rag_llm_api_pipeline.retriever import embed_texts  # type: ignore
+
+        if not texts:
+            return []
+        with self._embed_lock:
+            vectors = embed_texts([str(text or "") for text in texts])
+        return [[float(value) for value in row] for row in vectors]
+
+    @staticmethod
+    def _as_pair(payload: Any) -> Tuple[str, str]:
+        if isinstance(payload, dict):
+            query = payload.get("query") or payload.get("question") or ""
+            return str(query), str(payload.get("text") or "")
+        query, text = payload
+        return str(query or ""), str(text or "")
+
+    def score_pairs(self, payloads: Sequence[Any]) -> List[float]:
+        """
+        Cross-encoder relevance for (query, text) pairs, possibly from several
+        queries at once; cached pair scores are reused.
+        """
+        from rag_llm_api_pipeline.reranker import score_pairs  # type: ignore
+
+        if not payloads:
+            return []
+        with self._rerank_lock:
+            scores, _ = score_pairs([self._as_pair(p) for p in payloads])
+        return scores
+
+    def retrieve_batch(self, payloads: Sequence[dict]) -> List[dict]:
+        """
+        FAISS retrieval for {"system", "question", "model_selection", "top_k",
+        "filters"} payloads. Payloads for the same system, runtime and filter
+        share one encode and one search against the pipeline's in-memory index.
+        A group that fails (e.g. a system without a built index) gets an
+        ``error`` result; the other groups in the batch are unaffected.
+        """
+        from rag_llm_api_pipeline.retriever import retrieve_batch  # type: ignore
+
+        groups: dict[tuple[str, str, str], List[int]] = {}
+        for i, payload in enumerate(payloads):
+            key = (
+                str(payload.get("system") or ""),
+                json.dumps(
+                    payload.get("model_selection") or {}, sort_keys=True, default=str
+                ),
+                json.dumps(payload.get("filters") or {}, sort_keys=True, default=str),
+            )
+            groups.setdefault(key, []).append(i)
+
+        results: List[dict] = [{} for _ in payloads]
+        with self._retrieve_lock:
+            for (system, _, _), members in groups.items():
+                first = payloads[members[0]]
+                try:
+                    outs = retrieve_batch(
+                        system,
+                        [str(payloads[i].get("question") or "") for i in members],
+                        model_selection=first.get("model_selection") or None,
+                        top_k=[int(payloads[i].get("top_k") or 5) for i in members],
+                        **(
+                            {"filters": first["filters"]}
+                            if first.get("filters")
+                            else {}
+                        ),
+                    )
+                except Exception as exc:
+                    for i in members:
+                        results[i] = {
+                            "chunks": [],
+                            "chunks_meta": [],
+                            "timings": {},
+                            "error": f"{type(exc).__name__}: {exc}",
+                        }
+                    continue
+                for i, (chunks, _, chunks_meta, timings) in zip(members, outs):
+                    results[i] = {
+                        "chunks": chunks,
+                        "chunks_meta": chunks_meta,
+                        "timings": timings,
+                    }
+        return results
+
+    async def forward_batch(self, payloads: Sequence[Any]) -> List[str]:
+        """Batched generation off the event loop; returns one text per payload."""
+        outs = await asyncio.to_thread(self.query_batch, list(payloads))
+        return [text for text, _ in outs]
+
+    async def embed(self, texts: Sequence[Any]) -> List[List[float]]:
+        """Batched SentenceTransformer encoding off the event loop."""
+        return await asyncio.to_thread(self.embed_batch, list(texts))
+
+    async def retrieve(self, payloads: Sequence[dict]) -> List[dict]:
+        """Batched encode + FAISS search off the event loop."""
+        return await asyncio.to_thread(self.retrieve_batch, list(payloads))
+
+    async def rerank(self, payloads: Sequence[Any]) -> List[float]:
+        """Batched cross-encoder scoring off the event loop."""
+        return await asyncio.to_thread(self.score_pairs, list(payloads))
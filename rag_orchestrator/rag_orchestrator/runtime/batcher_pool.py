@@ -1,5 +1,10 @@
 from __future__ import annotations
+from dataclasses import replace
 from typing import Callable, Dict, Any, Awaitable
+from rag_orchestrator.batching.adaptive import (
+    AdaptiveBatchController,
+    AdaptiveBatchPolicy,
+)
 from rag_orchestrator.batching.microbatch import AsyncMicroBatcher
 
 TaskKey = str
@@ -18,14 +23,31 @@ class BatcherPool:
         max_batch: int = 8,
         max_latency_ms: int = 5,
         max_queue: int = 1024,
+        adaptive: AdaptiveBatchPolicy | None = None,
     ) -> None:
         if key in self._pool:
             return
+        if adaptive is not None and adaptive.max_batch > max_batch:
+            # The configured max_batch is a ceiling the tuner may not exceed.
+            adaptive = replace(
+                adaptive,
+                max_batch=max_batch,
+                min_batch=min(adaptive.min_batch, max_batch),
+            )
+        controller = (
+            AdaptiveBatchController(
+                adaptive, initial_batch=max_batch, initial_latency_ms=max_latency_ms
+            )
+            if adaptive is not None
+            else None
+        )
         self._pool[key] = AsyncMicroBatcher(
             forward_fn,
             max_batch=max_batch,
             max_latency_ms=max_latency_ms,
             max_queue=max_queue,
+            name=key,
+            controller=controller,
         )
 
     async def start(self) -> None:
@@ -41,6 +63,11 @@ class BatcherPool:
         self._started = False
 
     async def submit(
-        self, key: TaskKey, payload: Any, *, timeout: float | None = None
+        self,
+        key: TaskKey,
+        payload: Any,
+        *,
+        timeout: float | None = None,
+        meta: Dict[str, Any] | None = None,
     ) -> Any:
-        return await self._pool[key].submit(payload, timeout=timeout)
+        return await self._pool[key].submit(payload, timeout=timeout, meta=meta)
@@ -0,0 +1,192 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Tuple
+
+from rag_orchestrator.agents.base import Agent, AgentSpec
+from rag_orchestrator.agents import registry as agent_registry
+
+
+class WorkflowError(RuntimeError):
+    def __init__(self, node: str, message: str) -> None:
+        super().__init__(f"workflow node '{node}': {message}")
+        self.node = node
+
+
+@dataclass
+class WorkflowNode:
+    name: str
+    agent: str
+    after: Tuple[str, ...] = ()
+    system: str | None = None
+    config: Dict[str, Any] | None = None
+
+    @classmethod
+    def from_dict(cls, raw: Dict[str, Any]) -> "WorkflowNode":
+        after = raw.get("after") or ()
+        if isinstance(after, str):
+            after = (after,)
+        return cls(
+            name=str(raw.get("name") or raw["agent"]),
+            agent=str(raw["agent"]),
+            after=tuple(str(dep) for dep in after),
+            system=raw.get("system"),
+            config=dict(raw.get("config") or {}) or None,
+        )
+
+
+@dataclass
+class Workflow:
+    """
+    A DAG of registered agent types run in-process.
+
+    A node starts as soon as every node in its ``after`` has finished, so
+    independent branches run concurrently. All nodes share one state dict:
+    each node sees the state as of its start (a shallow copy, nothing is
+    serialized) and its result is merged back when it finishes. A node may
+    overwrite keys written by its ancestors, but two nodes that can run
+    concurrently must not write the same key: that fails the run instead of
+    letting whichever branch finishes last win.
+    """
+
+    nodes: List[WorkflowNode]
+    _order: List[WorkflowNode] = field(init=False, repr=False)
+    _ancestors: Dict[str, set[str]] = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self._order = self._toposort()
+        self._ancestors = {}
+        for node in self._order:
+            self._ancestors[node.name] = set(node.after).union(
+                *(self._ancestors[dep] for dep in node.after)
+            )
+
+    @classmethod
+    def from_config(cls, raw: Iterable[Dict[str, Any]]) -> "Workflow":
+        return cls([WorkflowNode.from_dict(item) for item in raw])
+
+    def _toposort(self) -> List[WorkflowNode]:
+        by_name: Dict[str, WorkflowNode] = {}
+        for node in self.nodes:
+            if node.name in by_name:
+                raise WorkflowError(node.name, "duplicate node name")
+            by_name[node.name] = node
+        for node in self.nodes:
+            for dep in node.after:
+                if dep not in by_name:
+                    raise WorkflowError(node.name, f"unknown dependency '{dep}'")
+
+        order: List[WorkflowNode] = []
+        done: set[str] = set()
+        remaining = list(self.nodes)
+        while remaining:
+            ready = [n for n in remaining if all(dep in done for dep in n.after)]
+            if not ready:
+                raise WorkflowError(remaining[0].name, "dependency cycle")
+            for node in ready:
+                order.append(node)
+                done.add(node.name)
+                remaining.remove(node)
+        return order
+
+    def build(self, parent: AgentSpec) -> Dict[str, Agent]:
+        """One agent per node, inheriting the parent's system, tenant and
+        runtime config; node config overrides it key by key."""
+        base = {
+            k: v
+            for k, v in (parent.config or {}).items()
+            if k not in ("workflow", "regulatory_system")
+        }
+        agents: Dict[str, Agent] = {}
+        for node in self._order:
+            spec = AgentSpec(
+                name=f"{parent.name}.{node.name}",
+                system=node.system or parent.system,
+                tenant=parent.tenant,
+                config={**base, **(node.config or {})} or None,
+            )
+            try:
+                agents[node.name] = agent_registry.create(node.agent, spec)
+            except ValueError as exc:
+                raise WorkflowError(node.name, str(exc)) from exc
+        return agents
+
+    async def run(
+        self, agents: Dict[str, Agent], state: Dict[str, Any]
+    ) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Run every node once; returns the merged state and per-node timings."""
+        state = dict(state)
+        writers: Dict[str, str] = {}  # state key -> node that last wrote it
+        timings: Dict[str, Dict[str, Any]] = {}
+        done: set[str] = set()
+        waiting = list(self._order)
+        running: Dict[asyncio.Task, WorkflowNode] = {}
+        started_at = time.perf_counter()
+
+        async def _step(node: WorkflowNode, snapshot: Dict[str, Any]):
+            node_started = time.perf_counter()
+            try:
+                return await agents[node.name].step(snapshot)
+            finally:
+                timings[node.name] = {
+                    "agent": node.agent,
+                    "start_sec": round(node_started - started_at, 4),
+                    "latency_sec": round(time.perf_counter() - node_started, 4),
+                }
+
+        try:
+            while waiting or running:
+                for node in [n for n in waiting if all(d in done for d in n.after)]:
+                    waiting.remove(node)
+                    task = asyncio.ensure_future(_step(node, dict(state)))
+                    running[task] = node
+                finished, _ = await asyncio.wait(
+                    running, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in finished:
+                    node = running.pop(task)
+                    try:
+                        result = task.result()
+                    except Exception as exc:
+                        timings[node.name]["error"] = str(exc)
+                        raise WorkflowError(node.name, str(exc)) from exc
+                    for key in result or {}:
+                        writer = writers.get(key)
+                        if (
+                            writer is not None
+                            and writer not in self._ancestors[node.name]
+                        ):
+                            raise WorkflowError(
+                                node.name,
+                                f"output '{key}' was also written by concurrent "
+                                f"node '{writer}'",
+                            )
+                        writers[key] = node.name
+                    state.update(result or {})
+                    done.add(node.name)
+        finally:
+            for task in running:
+                task.cancel()
+        return state, {
+            "total_sec": round(time.perf_counter() - started_at, 4),
+            "nodes": timings,
+        }
+
+
+def default_rag_workflow(regulatory_system: str | None = None) -> Workflow:
+    """retriever (and regulatory, when a regulation pool is named, in
+    parallel) -> reranker -> compressor -> drafting -> validator."""
+    nodes = [WorkflowNode("retrieve", "retriever")]
+    sources: Tuple[str, ...] = ("retrieve",)
+    if regulatory_system:
+        nodes.append(WorkflowNode("regulatory", "regulatory", system=regulatory_system))
+        sources = ("retrieve", "regulatory")
+    nodes += [
+        WorkflowNode("rerank", "reranker", after=sources),
+        WorkflowNode("compress", "compressor", after=("rerank",)),
+        WorkflowNode("draft", "drafting", after=("compress",)),
+        WorkflowNode("validate", "validator", after=("draft",)),
+    ]
+    return Workflow(nodes)
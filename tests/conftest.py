@@ -79,7 +79,10 @@ def app_client(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
 
     monkeypatch.setattr(controlled, "get_orchestrator", lambda: FakeOrchestrator())
 
-    return {
+    from rag_llm_api_pipeline.core.record_writer import flush_record_writer
+
+    yield {
         "client": TestClient(server.app),
         "audit_log": tmp_path / "audit" / "audit_log.jsonl",
     }
+    flush_record_writer()
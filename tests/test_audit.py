@@ -0,0 +1,247 @@
+import json
+
+import threading
+import time
+
+import pytest
+
+from rag_llm_api_pipeline.core import audit, record_writer
+from rag_llm_api_pipeline.db import audit_index_store
+
+
+def test_trace_and_review_lookups_use_sidecar_index(app_client):
+    for number in range(30):
+        audit.append_audit_record(
+            {
+                "event_type": "query",
+                "trace_id": f"trace-{number % 3}",
+                "review_id": "review-7" if number == 7 else None,
+                "sequence": number,
+            }
+        )
+
+    record_writer.flush_record_writer()
+    log_path = str(app_client["audit_log"])
+    assert (
+        audit_index_store.indexed_through(log_path, 1)
+        == app_client["audit_log"].stat().st_size
+    )
+
+    trace_events = audit.get_trace_events("trace-1")
+    assert [event["sequence"] for event in trace_events] == list(range(1, 30, 3))
+
+    review_events = audit.get_review_events("review-7")
+    assert [event["sequence"] for event in review_events] == [7]
+
+
+def test_tail_read_returns_newest_events_in_order(app_client):
+    for number in range(12):
+        audit.append_audit_record({"event_type": "query", "sequence": number})
+    audit.append_audit_record({"event_type": "review_decision", "sequence": 12})
+
+    tail = audit.get_audit_events(limit=5)
+    assert [event["sequence"] for event in tail] == [8, 9, 10, 11, 12]
+
+    decisions = audit.get_audit_events(limit=5, event_type="review_decision")
+    assert [event["sequence"] for event in decisions] == [12]
+
+
+def test_index_catches_up_with_lines_written_by_other_processes(app_client):
+    audit.append_audit_record({"event_type": "query", "trace_id": "trace-a"})
+    record_writer.flush_record_writer()
+    with open(app_client["audit_log"], "a", encoding="utf-8") as handle:
+        handle.write(json.dumps({"event_type": "query", "trace_id": "trace-b"}) + "\n")
+    audit.append_audit_record({"event_type": "query", "trace_id": "trace-c"})
+
+    assert len(audit.get_trace_events("trace-b")) == 1
+    assert len(audit.get_trace_events("trace-c")) == 1
+
+
+def test_rotation_seals_compressed_segments_and_readers_span_them(
+    app_client, monkeypatch
+):
+    from rag_llm_api_pipeline.core import audit_segments
+
+    monkeypatch.setattr(
+        audit_segments,
+        "get_rotation_settings",
+        lambda config: {
+            "max_segment_bytes": 4096,
+            "max_segment_age_hours": None,
+            "compression": "gzip",
+        },
+    )
+    for number in range(40):
+        audit.append_audit_record(
+            {"event_type": "query", "trace_id": f"trace-{number % 4}", "n": number}
+        )
+
+    record_writer.flush_record_writer()
+    manifest = audit_segments.load_manifest(str(app_client["audit_log"]))
+    assert len(manifest["segments"]) >= 2
+    assert all(item["file"].endswith(".jsonl.gz") for item in manifest["segments"])
+
+    assert [event["n"] for event in audit.get_trace_events("trace-2")] == list(
+        range(2, 40, 4)
+    )
+    assert [event["n"] for event in audit.get_audit_events(limit=40)] == list(range(40))
+
+    first_segment = manifest["segments"][0]
+    later = audit.get_audit_events(
+        limit=100, event_type="query", since=first_segment["last_recorded_at"]
+    )
+    assert later and later[0]["recorded_at"] >= first_segment["last_recorded_at"]
+
+    report = audit.verify_audit_chain()
+    assert report["ok"], report["errors"]
+    # One chained system_metadata event opens every segment, sealed or active.
+    assert report["events_checked"] == 40 + len(manifest["segments"]) + 1
+
+
+def test_age_rotation_reads_the_segment_start_once(app_client, monkeypatch):
+    from datetime import datetime, timedelta, timezone
+
+    from rag_llm_api_pipeline.core import audit_segments
+
+    monkeypatch.setattr(
+        audit_segments,
+        "get_rotation_settings",
+        lambda config: {
+            "max_segment_bytes": 1 << 30,
+            "max_segment_age_hours": 1,
+            "compression": "gzip",
+        },
+    )
+    reads = []
+    first_line = audit._first_line
+    monkeypatch.setattr(
+        audit, "_first_line", lambda path: reads.append(path) or first_line(path)
+    )
+    for number in range(10):
+        audit.append_audit_record({"event_type": "query", "n": number})
+        record_writer.flush_record_writer()
+    assert len(reads) == 1
+
+    later = (datetime.now(timezone.utc) + timedelta(hours=2)).isoformat()
+    monkeypatch.setattr(audit, "utc_now_iso", lambda: later)
+    audit.append_audit_record({"event_type": "query", "n": 10})
+    audit.append_audit_record({"event_type": "query", "n": 11})
+    record_writer.flush_record_writer()
+    manifest = audit_segments.load_manifest(str(app_client["audit_log"]))
+    assert len(manifest["segments"]) == 1
+    # The new segment's start is read afresh, not taken from the sealed one.
+    assert len(reads) == 2
+    assert audit.verify_audit_chain()["ok"]
+
+
+def test_chain_verification_detects_tampering(app_client):
+    for number in range(3):
+        audit.append_audit_record({"event_type": "query", "n": number})
+
+    record_writer.flush_record_writer()
+    lines = app_client["audit_log"].read_text(encoding="utf-8").splitlines()
+    tampered = json.loads(lines[1])
+    tampered["n"] = 99
+    lines[1] = json.dumps(tampered, sort_keys=True)
+    app_client["audit_log"].write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+    report = audit.verify_audit_chain()
+    assert not report["ok"]
+    assert report["errors"][0]["error"] == "hash_mismatch"
+
+
+def test_group_commit_batches_concurrent_appends(app_client):
+    writer = record_writer.RecordWriter(mode="group", max_batch=64)
+    calls: list[int] = []
+    release = threading.Event()
+
+    def _slow_sink(items, *, fsync):
+        calls.append(len(items))
+        release.wait(timeout=5)
+
+    record_writer.register_sink("test-slow", _slow_sink)
+    threads = [
+        threading.Thread(target=writer.submit, args=("test-slow", number))
+        for number in range(20)
+    ]
+    for thread in threads:
+        thread.start()
+    deadline = time.monotonic() + 5
+    while writer.status()["pending"] < 19 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    release.set()
+    for thread in threads:
+        thread.join(timeout=5)
+
+    assert sum(calls) == 20
+    assert len(calls) < 20
+    assert writer.status()["total_records"] == 20
+    writer.close()
+
+
+def test_full_queue_applies_back_pressure(app_client):
+    writer = record_writer.RecordWriter(
+        mode="async", max_queue=1, max_batch=1, enqueue_timeout_sec=0.05
+    )
+    release = threading.Event()
+    record_writer.register_sink("test-blocked", lambda items, *, fsync: release.wait(5))
+
+    writer.submit("test-blocked", 1)
+    with pytest.raises(record_writer.RecordWriterFull):
+        for number in range(5):
+            writer.submit("test-blocked", number)
+    assert writer.status()["queue_full_events"] == 1
+
+    assert writer.flush(timeout=0.05) is False
+
+    release.set()
+    writer.close(timeout=5)
+
+
+def test_async_audit_appends_are_visible_to_readers(app_client):
+    for number in range(50):
+        audit.append_audit_record(
+            {"event_type": "query", "trace_id": "trace-async", "n": number}
+        )
+
+    events = audit.get_trace_events("trace-async")
+    assert [event["n"] for event in events] == list(range(50))
+    assert audit.verify_audit_chain()["ok"]
+
+
+def test_events_reference_system_metadata_written_once_per_segment(app_client):
+    for number in range(5):
+        audit.append_audit_record(
+            {"event_type": "query", "trace_id": "trace-meta", "n": number}
+        )
+    record_writer.flush_record_writer()
+
+    lines = [
+        json.loads(line)
+        for line in app_client["audit_log"].read_text(encoding="utf-8").splitlines()
+    ]
+    assert [line["event_type"] for line in lines] == ["system_metadata"] + ["query"] * 5
+    ref = lines[0]["system_metadata_ref"]
+    assert lines[0]["system_metadata"]["system_name"]
+    assert all(line["system_metadata_ref"] == ref for line in lines[1:])
+    assert all("system_metadata" not in line for line in lines[1:])
+
+    events = audit.get_trace_events("trace-meta")
+    assert all(
+        event["system_metadata"] == lines[0]["system_metadata"] for event in events
+    )
+
+    tail = audit.get_audit_events(limit=10)
+    assert [event["n"] for event in tail] == list(range(5))
+    assert all(
+        event["system_metadata"] == lines[0]["system_metadata"] for event in tail
+    )
+    queries = audit.get_audit_events(limit=10, event_type="query")
+    assert all("system_metadata" in event for event in queries)
+    recent = audit.get_audit_events(limit=10, since=lines[0]["recorded_at"])
+    assert [event["n"] for event in recent] == list(range(5))
+    streamed = list(audit.iter_audit_events())
+    assert [event["n"] for event in streamed] == list(range(5))
+    assert all(
+        event["system_metadata"] == lines[0]["system_metadata"] for event in streamed
+    )
@@ -535,3 +535,71 @@ def test_regulation_pool_routes_support_dedicated_pool_and_agent(
     assert started.status_code == 200
     assert started.json()["agent_type"] == "regulatory"
     assert started.json()["system"] == "EURegulations"
+
+
+def test_asset_registry_caches_pools_until_save_or_config_change(
+    app_client, monkeypatch
+):
+    from rag_llm_api_pipeline.core import system_assets
+    from rag_llm_api_pipeline.db import regulation_pool_store
+
+    reads = []
+    list_pools = regulation_pool_store.list_pools
+
+    def _counting_list_pools():
+        reads.append(1)
+        return list_pools()
+
+    monkeypatch.setattr(regulation_pool_store, "list_pools", _counting_list_pools)
+
+    assert system_assets.find_asset("TestSystem")["name"] == "TestSystem"
+    for _ in range(50):
+        system_assets.find_asset("TestSystem")
+    system_assets.list_regulation_pools()
+    assert len(reads) == 1
+
+    regulation_pool_store.save_pool(
+        {
+            "name": "CachedPool",
+            "docs_dir": "data/manuals/regulations",
+            "timestamps": {"created_at": "2026-01-01T00:00:00+00:00"},
+        }
+    )
+    assert system_assets.find_asset("CachedPool")["is_regulation_pool"]
+    assert len(reads) == 2
+
+    config = {"assets": [{"name": "OnlyInConfig"}]}
+    assert system_assets.find_asset("OnlyInConfig", config)["docs"] == []
+    assert system_assets.find_asset("TestSystem", config) is None
+
+
+def test_parse_cache_reuses_extracted_text_by_content(tmp_path, monkeypatch):
+    from rag_llm_api_pipeline import loader, parse_cache
+
+    calls = []
+    real_load_docs = loader.load_docs
+
+    def _counting_load_docs(path, ocr_lang="eng"):
+        calls.append((path, ocr_lang))
+        return real_load_docs(path, ocr_lang=ocr_lang)
+
+    monkeypatch.setattr(loader, "load_docs", _counting_load_docs)
+    config = {"loader": {"parse_cache_dir": str(tmp_path / "cache")}}
+    original = tmp_path / "sop.txt"
+    original.write_text("Clean the filling line before each batch.", encoding="utf-8")
+    copy = tmp_path / "sop-copy.txt"
+    copy.write_text(original.read_text(encoding="utf-8"), encoding="utf-8")
+
+    assert parse_cache.load_docs_cached(str(original), config)[1] is False
+    # Same bytes under another name: served from the cache.
+    parts, hit = parse_cache.load_docs_cached(str(copy), config)
+    assert hit and parts == ["Clean the filling line before each batch."]
+    assert len(calls) == 1
+
+    config["loader"]["ocr_lang"] = "deu"
+    assert parse_cache.load_docs_cached(str(copy), config)[1] is False
+    monkeypatch.setattr(loader, "LOADER_VERSION", "test-bump")
+    assert parse_cache.load_docs_cached(str(copy), config)[1] is False
+    original.write_text("Revised SOP text.", encoding="utf-8")
+    assert parse_cache.load_docs_cached(str(original), config)[1] is False
+    assert len(calls) == 4
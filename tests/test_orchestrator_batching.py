@@ -0,0 +1,808 @@
+import asyncio
+import os
+
+import pytest
+
+from rag_orchestrator.batching.microbatch import AsyncMicroBatcher
+from rag_orchestrator.providers.rag_llm_api_provider import RagLLMApiProvider
+
+
+def test_provider_forward_batch_runs_one_generation_per_batch(monkeypatch):
+    import rag_llm_api_pipeline.llm_wrapper as llm_wrapper
+
+    calls = []
+
+    def _fake_ask_llm_batch(requests, model_selection=None):
+        calls.append(list(requests))
+        return [
+            (f"answer:{question}", {"batch_size": len(requests)})
+            for question, _ in requests
+        ]
+
+    monkeypatch.setattr(llm_wrapper, "ask_llm_batch", _fake_ask_llm_batch)
+    provider = RagLLMApiProvider("config/system.yaml")
+
+    async def _run():
+        batcher = AsyncMicroBatcher(
+            provider.forward_batch, max_batch=8, max_latency_ms=50
+        )
+        await batcher.start()
+        outs = await asyncio.gather(*(batcher.submit(f"q{n}") for n in range(6)))
+        await batcher.close()
+        return outs
+
+    outs = asyncio.run(_run())
+    assert outs == [f"answer:q{n}" for n in range(6)]
+    assert len(calls) == 1
+    assert calls[0] == [(f"q{n}", "") for n in range(6)]
+
+    answers = provider.query_batch([{"question": "restart?", "context": "manual"}])
+    assert answers == [("answer:restart?", {"batch_size": 1})]
+    assert calls[-1] == [("restart?", "manual")]
+
+
+def test_batched_generation_cuts_each_answer_at_its_own_stop(monkeypatch):
+    import rag_llm_api_pipeline.llm_wrapper as llm_wrapper
+
+    continuations = {
+        "pump": "Close valve V1. Question: and then? Close V2. Question: x",
+        "seal": "Replace the seal kit, torque to 12 Nm, then leak test. Question: y",
+    }
+
+    class _Tokenizer:
+        model_max_length = 4096
+        pad_token_id = eos_token_id = 0
+
+        def __call__(self, text, add_special_tokens=True):
+            return {"input_ids": text.split()}
+
+        def encode(self, text, add_special_tokens=True):
+            return text.split()
+
+        def decode(self, ids, skip_special_tokens=True):
+            return " ".join(ids)
+
+    def _stop_at(text):
+        return text.lower().index("question:") + len("question:")
+
+    def _pipeline(prompts, batch_size=1, **kwargs):
+        # Finished rows may still carry text past their stop string (a stop
+        # ending mid-token, or pipelines without per-row stopping).
+        texts = [continuations[p.split()[1]] for p in prompts]
+        stop = max(_stop_at(text) for text in texts)
+        return [[{"generated_text": text[:stop]}] for text in texts]
+
+    monkeypatch.setattr(
+        llm_wrapper,
+        "_load_runtime",
+        lambda model_selection=None: {
+            "llm_cfg": {
+                "prompt_template": "Question: {question}{context}",
+                "stop_sequences": ["\n", "Question:"],
+            },
+            "tokenizer": _Tokenizer(),
+            "runtime": {},
+            "device": "cpu",
+            "quantization_backend": "none",
+            "pipeline": _pipeline,
+        },
+    )
+    monkeypatch.setattr(
+        llm_wrapper, "_maybe_add_stopping_criteria", lambda kwargs, cfg, tok: kwargs
+    )
+
+    batched = llm_wrapper.ask_llm_batch([("pump", ""), ("seal", "")])
+    single = [llm_wrapper.ask_llm(q, "")[0] for q in ("pump", "seal")]
+    assert [text for text, _ in batched] == single
+    assert single[0] == "Close valve V1. Question:"
+
+
+def test_stop_criterion_finishes_each_row_at_its_first_stop(monkeypatch):
+    torch = pytest.importorskip("torch")
+    import rag_llm_api_pipeline.llm_wrapper as llm_wrapper
+
+    words = ["<pad>", "a", "b", "stop", "c"]
+
+    class _Tokenizer:
+        def encode(self, text, add_special_tokens=True):
+            return [words.index(word) for word in text.lower().split()]
+
+        def decode(self, ids, skip_special_tokens=True):
+            return " ".join(words[i] for i in ids if i or not skip_special_tokens)
+
+    monkeypatch.setattr(
+        llm_wrapper, "_transformers", lambda: {"StoppingCriteria": object}
+    )
+    criterion = llm_wrapper._stop_on_sequences_class()(["stop"], _Tokenizer())
+    steps = [[1, 1], [3, 2], [4, 2], [0, 3]]
+    ids = torch.tensor([[1], [1]])
+    flags = []
+    for step in steps:
+        ids = torch.cat([ids, torch.tensor(step).unsqueeze(1)], dim=1)
+        flags.append(criterion(ids, None).tolist())
+    # Row 0 stays done after generating past its stop string.
+    assert flags == [[False, False], [True, False], [True, False], [True, True]]
+
+    # A new generate() call on the same criterion starts with a fresh mask.
+    assert criterion(torch.tensor([[1, 2]]), None).tolist() == [False]
+
+
+def test_provider_embed_encodes_the_whole_batch_at_once(monkeypatch):
+    pytest.importorskip("numpy")
+    import rag_llm_api_pipeline.retriever as retriever
+
+    calls = []
+
+    def _fake_embed_texts(texts, model_selection=None):
+        calls.append(list(texts))
+        return [[float(len(text)), 1.0] for text in texts]
+
+    monkeypatch.setattr(retriever, "embed_texts", _fake_embed_texts)
+    provider = RagLLMApiProvider("config/system.yaml")
+
+    vectors = asyncio.run(provider.embed(["a", "bbb"]))
+    assert vectors == [[1.0, 1.0], [3.0, 1.0]]
+    assert calls == [["a", "bbb"]]
+
+
+def test_adaptive_controller_widens_under_backlog_and_backs_off_on_slo_breach():
+    from rag_orchestrator.batching.adaptive import (
+        AdaptiveBatchController,
+        AdaptiveBatchPolicy,
+    )
+
+    controller = AdaptiveBatchController(
+        AdaptiveBatchPolicy(target_p95_ms=100, max_batch=16, max_latency_ms=20),
+        initial_batch=4,
+        initial_latency_ms=5,
+    )
+    # Idle traffic: nothing else is expected inside the window, so don't wait.
+    controller.on_arrival(now=0.0)
+    controller.on_flush(
+        batch_size=1, forward_sec=0.005, latencies_sec=[0.006], queue_depth=0
+    )
+    assert controller.window_sec() == 0.0
+
+    # A burst of 1000 req/s backing up behind full batches grows cap and window.
+    now = 10.0
+    for _ in range(20):
+        for _ in range(controller.batch_limit()):
+            now += 0.001
+            controller.on_arrival(now=now)
+        controller.on_flush(
+            batch_size=controller.batch_limit(),
+            forward_sec=0.01,
+            latencies_sec=[0.02] * controller.batch_limit(),
+            queue_depth=10,
+        )
+    assert controller.batch_limit() == 16
+    assert controller.window_sec() > 0.005
+    assert controller.state()["last_action"] in {"increase", "hold"}
+
+    # Breaching the p95 SLO halves the batch cap.
+    for _ in range(300):
+        controller.on_flush(
+            batch_size=16, forward_sec=0.2, latencies_sec=[0.3], queue_depth=0
+        )
+    assert controller.batch_limit() < 16
+    assert controller.state()["observed_p95_ms"] > 100
+
+    # One spike cuts the cap once; the slow samples still in the window do
+    # not cut it again on every following flush.
+    spiked = AdaptiveBatchController(
+        AdaptiveBatchPolicy(target_p95_ms=100.0, max_batch=32), initial_batch=32
+    )
+    spiked.on_flush(
+        batch_size=32, forward_sec=0.5, latencies_sec=[0.5] * 32, queue_depth=0
+    )
+    for _ in range(100):
+        spiked.on_flush(
+            batch_size=16, forward_sec=0.01, latencies_sec=[0.02], queue_depth=0
+        )
+    assert spiked.batch_limit() == 16
+
+
+def test_batcher_stats_expose_adaptive_controller_state():
+    from rag_orchestrator.runtime.batcher_pool import BatcherPool
+    from rag_orchestrator.batching.adaptive import AdaptiveBatchPolicy
+
+    async def _echo(items):
+        return items
+
+    async def _run():
+        pool = BatcherPool()
+        pool.register("echo", _echo, adaptive=AdaptiveBatchPolicy(target_p95_ms=50))
+        await pool.start()
+        outs = await asyncio.gather(*(pool.submit("echo", n) for n in range(10)))
+        stats = pool._pool["echo"].stats()
+        await pool.close()
+        return outs, stats
+
+    outs, stats = asyncio.run(_run())
+    assert outs == list(range(10))
+    assert stats["adaptive"]["target_p95_ms"] == 50
+    assert stats["adaptive"]["observed_p95_ms"] is not None
+    # The tuner never grows past the batcher's configured max_batch (8).
+    assert stats["adaptive"]["bounds"]["batch"] == [1, stats["max_batch"]] == [1, 8]
+    assert stats["adaptive"]["batch_limit"] <= 8
+
+
+def test_rolling_histogram_quantiles_and_window_expiry():
+    from rag_orchestrator.batching.histogram import RollingHistogram
+
+    now = [1000.0]
+    hist = RollingHistogram(windows_sec=(60, 300), slot_sec=10, clock=lambda: now[0])
+    for ms in range(1, 101):
+        hist.record(ms / 1000.0)
+
+    snap = hist.snapshot(60)
+    assert snap["count"] == 100
+    assert snap["p50"] == pytest.approx(0.050, rel=0.02)
+    assert snap["p99"] == pytest.approx(0.099, rel=0.02)
+    assert snap["max"] == pytest.approx(0.1)
+
+    # Two minutes later the samples have left the 1m window but not the 5m one.
+    now[0] += 120
+    hist.record(0.5)
+    assert hist.snapshot(60)["count"] == 1
+    assert hist.snapshot(300)["count"] == 101
+    assert hist.summary()["300s"]["p90"] == pytest.approx(0.091, rel=0.02)
+
+    # Once every window has turned over, lifetime totals still only grow.
+    now[0] += 600
+    hist.record(0.5)
+    assert hist.snapshot(300)["count"] == 1
+    assert hist.totals() == {"count": 102, "sum": pytest.approx(6.05)}
+
+
+def test_batcher_histograms_feed_telemetry_and_prometheus_text():
+    from rag_orchestrator.batching.histogram import render_prometheus
+
+    async def _echo(items):
+        return items
+
+    async def _run():
+        batcher = AsyncMicroBatcher(_echo, max_batch=4, max_latency_ms=20, name="echo")
+        await batcher.start()
+        await asyncio.gather(*(batcher.submit(n) for n in range(8)))
+        stats = batcher.stats()
+        await batcher.close()
+        return stats
+
+    stats = asyncio.run(_run())
+    window = stats["histograms"]["e2e_latency_sec"]["60s"]
+    assert window["count"] == 8
+    assert window["p50"] <= window["p99"]
+    assert stats["histograms"]["batch_size"]["60s"]["p50"] == 4.0
+    assert stats["throughput"]["60s"]["requests_per_sec"] > 0
+
+    text = render_prometheus({"echo": stats})
+    assert "# TYPE krionis_batcher_end_to_end_latency_seconds summary" in text
+    assert (
+        'krionis_batcher_batch_size{batcher="echo",window="60s",quantile="0.5"} 4.0'
+        in text
+    )
+    assert 'krionis_batcher_requests_total{batcher="echo"} 8' in text
+    assert 'krionis_batcher_end_to_end_latency_seconds_count{batcher="echo"} 8' in text
+
+
+def test_batcher_serves_priority_then_deadline_and_drops_expired_requests():
+    forwarded = []
+
+    async def _run():
+        gate = asyncio.Event()
+
+        async def _forward(items):
+            forwarded.append(list(items))
+            if len(forwarded) == 1:
+                await gate.wait()
+            return items
+
+        batcher = AsyncMicroBatcher(_forward, max_batch=2, max_latency_ms=50)
+        await batcher.start()
+        blocker = asyncio.create_task(batcher.submit("blocker"))
+        await asyncio.sleep(0.1)  # the first batch now holds the forward call
+
+        bulk = asyncio.create_task(batcher.submit("bulk", meta={"priority": "bulk"}))
+        late = asyncio.create_task(batcher.submit("late", meta={"deadline_ms": 900}))
+        soon = asyncio.create_task(batcher.submit("soon", meta={"deadline_ms": 500}))
+        urgent = asyncio.create_task(
+            batcher.submit("urgent", meta={"priority": "interactive"})
+        )
+        stale = asyncio.create_task(batcher.submit("stale", meta={"deadline_ms": 1}))
+        await asyncio.sleep(0.02)
+        order = [item["meta"]["priority"] for item in batcher.pending_snapshot()]
+        gate.set()
+
+        results = await asyncio.gather(
+            blocker, bulk, late, soon, urgent, stale, return_exceptions=True
+        )
+        stats = batcher.stats()
+        await batcher.close()
+        return order, results, stats
+
+    order, results, stats = asyncio.run(_run())
+    assert order == ["interactive", "default", "default", "default", "bulk"]
+    # "stale" expired while queued, so it never reaches the forward call.
+    assert forwarded[1:] == [["urgent", "soon"], ["late", "bulk"]]
+    assert isinstance(results[-1], asyncio.TimeoutError)
+    assert results[:5] == ["blocker", "bulk", "late", "soon", "urgent"]
+    assert stats["classes"]["default"]["expired"] == 1
+    assert stats["classes"]["interactive"]["served"] == 1
+    assert stats["classes"]["bulk"]["queue_wait_sec"]["count"] == 1
+
+
+def test_fair_share_scheduler_interleaves_tenants_by_weight():
+    from rag_orchestrator.batching.fair_queue import FairShareScheduler
+    from rag_orchestrator.batching.gatekeeper import (
+        Gatekeeper,
+        QueueFull429,
+        TenantPolicy,
+    )
+
+    served = []
+
+    async def _submit(payload, *, timeout=None, meta=None):
+        await asyncio.sleep(0.001)
+        served.append(meta["tenant"])
+        return payload
+
+    async def _run():
+        fair = FairShareScheduler(_submit, max_inflight=1)
+        gate = Gatekeeper(fair.submit)
+        gate.set_policy("bulk", TenantPolicy(rps=1000, burst=100, max_queue=12))
+        gate.set_policy("ops", TenantPolicy(rps=1000, burst=100))
+        fair.set_tenant("bulk", weight=1.0, max_queue=12)
+        fair.set_tenant("ops", weight=2.0)
+
+        flood = [asyncio.create_task(gate.handle("bulk", n)) for n in range(12)]
+        await asyncio.sleep(0)
+        with pytest.raises(QueueFull429):
+            await gate.handle("bulk", "overflow")
+        ops = [asyncio.create_task(gate.handle("ops", n)) for n in range(4)]
+        await asyncio.sleep(0)
+        snapshot = fair.pending_snapshot()
+        await asyncio.gather(*flood, *ops)
+        after = fair.pending_snapshot()
+        await fair.close()
+        return snapshot, after
+
+    snapshot, after = asyncio.run(_run())
+    # ops (weight 2) is not stuck behind the bulk backlog: it gets two slots
+    # for every bulk one as soon as it has work queued.
+    first_ops = served.index("ops")
+    assert first_ops <= 1
+    assert served[first_ops : first_ops + 6].count("ops") == 4
+    assert snapshot["tenants"]["bulk"]["rejected"] == 1
+    assert snapshot["tenants"]["ops"]["depth"] == 4
+    assert after["tenants"]["ops"]["dispatched"] == 4
+    assert after["tenants"]["bulk"]["wait_sec"]["count"] == 12
+
+
+def test_fair_share_scheduler_forgets_idle_tenants_without_a_policy():
+    from rag_orchestrator.batching.fair_queue import FairShareScheduler
+
+    now = [0.0]
+
+    async def _submit(payload, *, timeout=None, meta=None):
+        return payload
+
+    async def _run():
+        fair = FairShareScheduler(_submit, idle_evict_sec=60, clock=lambda: now[0])
+        fair.set_tenant("ops", weight=2.0)
+        for n in range(100):
+            await fair.submit(n, meta={"tenant": f"visitor-{n}"})
+        now[0] += 120
+        for n in range(60):
+            await fair.submit(n, meta={"tenant": "steady"})
+        snapshot = fair.pending_snapshot()
+        await fair.close()
+        return snapshot
+
+    snapshot = asyncio.run(_run())
+    assert set(snapshot["tenants"]) == {"ops", "steady"}
+    assert snapshot["tenants_evicted"] == 100
+
+
+def test_gatekeeper_token_bucket_refills_lazily_and_evicts_idle_tenants():
+    from rag_orchestrator.batching.gatekeeper import Gatekeeper, TenantPolicy
+
+    now = [0]
+    gate = Gatekeeper(None, clock_ns=lambda: now[0])
+    gate.set_policy("ops", TenantPolicy(rps=10, burst=3))
+
+    assert [gate.admit("ops") is not None for _ in range(4)] == [
+        True,
+        True,
+        True,
+        False,
+    ]
+    now[0] += 100_000_000  # 0.1s refills exactly one token at 10 rps
+    assert gate.admit("ops") is not None
+    assert gate.admit("ops") is None
+
+    # Unknown tenants share the default policy; once refilled they are evicted.
+    for n in range(100):
+        gate.admit(f"visitor-{n}")
+    assert gate.stats()["tenants_tracked"] == 101
+    now[0] += 60 * 1_000_000_000
+    for _ in range(60):
+        gate.admit("ops")
+    assert gate.stats()["tenants_tracked"] == 1
+    assert gate.stats()["tenants_evicted"] == 100
+
+
+def test_gatekeeper_tracks_at_most_one_bucket_per_tenant():
+    from rag_orchestrator.batching.gatekeeper import Gatekeeper
+
+    gate = Gatekeeper(None)
+    for n in range(200_000):
+        gate.admit(f"tenant-{n % 100_000}")
+    assert gate.stats()["tenants_tracked"] <= 100_000
+
+
+@pytest.mark.skipif(
+    not os.getenv("KRIONIS_PERF_TESTS"),
+    reason="wall-clock throughput check; set KRIONIS_PERF_TESTS=1 to run",
+)
+def test_gatekeeper_decides_over_50k_per_second_across_100k_tenants():
+    import time
+
+    from rag_orchestrator.batching.gatekeeper import Gatekeeper
+
+    gate = Gatekeeper(None)
+    tenants = [f"tenant-{n}" for n in range(100_000)]
+    decisions = 200_000
+    start = time.perf_counter()
+    for n in range(decisions):
+        gate.admit(tenants[n % 100_000])
+    elapsed = time.perf_counter() - start
+    assert decisions / elapsed > 50_000
+
+
+def test_async_single_flight_shares_one_run_and_survives_a_caller_timeout():
+    from rag_orchestrator.batching.single_flight import AsyncSingleFlight
+
+    flights = AsyncSingleFlight()
+    runs = []
+
+    async def _generate():
+        runs.append(1)
+        await asyncio.sleep(0.05)
+        return "shared answer"
+
+    async def _run():
+        impatient = asyncio.create_task(flights.do("q", _generate, timeout=0.01))
+        waiters = [asyncio.create_task(flights.do("q", _generate)) for _ in range(3)]
+        with pytest.raises(asyncio.TimeoutError):
+            await impatient
+        return await asyncio.gather(*waiters)
+
+    assert asyncio.run(_run()) == ["shared answer"] * 3
+    assert runs == [1]
+    assert flights.stats() == {"in_flight": 0, "executions": 1, "coalesced": 3}
+
+
+def test_scheduled_single_flight_keeps_each_callers_deadline_and_priority():
+    from rag_orchestrator.batching.single_flight import AsyncSingleFlight
+
+    flights = AsyncSingleFlight()
+    runs = []
+
+    async def _generate(timeout, priority):
+        runs.append((timeout, priority))
+        await asyncio.wait_for(asyncio.sleep(0.2), timeout)
+        return priority
+
+    def _do(deadline_ms, priority="default"):
+        return asyncio.create_task(
+            flights.do_scheduled(
+                "q", _generate, deadline_ms=deadline_ms, priority=priority
+            )
+        )
+
+    async def _run():
+        leader = _do(100)
+        await asyncio.sleep(0.03)
+        # Later arrivals with other deadlines still join the leader's run.
+        followers = [_do(1000), _do(2000)]
+        interactive = _do(1000, "interactive")
+        await asyncio.sleep(0)
+        coalesced = flights.stats()["coalesced"]
+        with pytest.raises(asyncio.TimeoutError):
+            await leader
+        return coalesced, await asyncio.gather(*followers), await interactive
+
+    coalesced, answers, interactive = asyncio.run(_run())
+    assert coalesced == 2
+    # The followers outlive the leader's timed-out run and share one rerun;
+    # an interactive caller is not served at the leader's class.
+    assert answers == ["default", "default"] and interactive == "interactive"
+    assert [priority for _, priority in runs].count("default") == 2
+    first, rerun = [timeout for timeout, p in runs if p == "default"]
+    assert first <= 0.1 and 0.8 < rerun < 1.0
+
+
+def test_reranker_agent_scores_pairs_through_the_rerank_batcher(monkeypatch):
+    import rag_orchestrator.agents.builtin.reranker as reranker_agent
+    from rag_orchestrator.agents.base import AgentSpec
+    from rag_orchestrator.runtime.batcher_pool import BatcherPool
+
+    batches = []
+
+    async def _score(pairs):
+        batches.append(len(pairs))
+        return [float(text.count("restart")) for _, text in pairs]
+
+    async def _run():
+        pool = BatcherPool()
+        pool.register("rerank", _score, max_batch=32, max_latency_ms=20)
+        monkeypatch.setattr(reranker_agent, "batchers", pool)
+        await pool.start()
+        agent = reranker_agent.RerankerAgent(AgentSpec(name="rr", config={"top_k": 2}))
+        retrieved = [{"text": f"chunk {n}"} for n in range(10)]
+        retrieved[6] = {"text": "restart restart", "file": "manual.txt"}
+        retrieved[3] = {"text": "restart"}
+        out = await agent.step({"query": "restart?", "retrieved": retrieved})
+        await pool.close()
+        return out
+
+    out = asyncio.run(_run())
+    assert batches == [10]
+    assert [item["text"] for item in out["reranked"]] == ["restart restart", "restart"]
+    assert out["reranked"][0]["file"] == "manual.txt"
+    assert out["rerank"]["candidates"] == 10
+
+
+def test_compressor_agent_embeds_sentences_through_the_embed_batcher(monkeypatch):
+    import rag_orchestrator.agents.builtin.compressor as compressor_agent
+    from rag_orchestrator.agents.base import AgentSpec
+    from rag_orchestrator.runtime.batcher_pool import BatcherPool
+
+    batches = []
+
+    async def _embed(texts):
+        batches.append(len(texts))
+        return [[t.lower().count("restart"), 0.1] for t in texts]
+
+    async def _run():
+        pool = BatcherPool()
+        pool.register("embed", _embed, max_batch=64, max_latency_ms=20)
+        monkeypatch.setattr(compressor_agent, "batchers", pool)
+        await pool.start()
+        agent = compressor_agent.CompressorAgent(
+            AgentSpec(name="cmp", config={"budget_tokens": 12})
+        )
+        reranked = [
+            {
+                "text": "The housing is cast iron. Restart after isolating power.",
+                "file": "a",
+            },
+            {"text": "Seals are replaced every two years. Inspect seats yearly."},
+        ]
+        out = await agent.step({"query": "restart?", "reranked": reranked})
+        await pool.close()
+        return out
+
+    out = asyncio.run(_run())
+    assert batches == [5]
+    assert out["compressed"] == [
+        {"text": "Restart after isolating power.", "file": "a"}
+    ]
+    assert out["compression"]["sentences_kept"] == 1
+    assert out["compression"]["compression_ratio"] < 0.5
+
+
+def test_retriever_agents_share_one_batched_search(monkeypatch):
+    import rag_orchestrator.agents.builtin.regulatory as regulatory_agent
+    import rag_orchestrator.agents.builtin.retriever as retriever_agent
+    from rag_orchestrator.agents.base import AgentSpec
+    from rag_orchestrator.runtime.batcher_pool import BatcherPool
+
+    batches = []
+
+    async def _retrieve(payloads):
+        batches.append(payloads)
+        return [
+            {
+                "chunks": [f"{p['system']}: {p['question']}"] * p["top_k"],
+                "chunks_meta": [{"rank": r + 1} for r in range(p["top_k"])],
+                "timings": {"query_batch_size": len(payloads)},
+            }
+            for p in payloads
+        ]
+
+    async def _run():
+        pool = BatcherPool()
+        pool.register("retrieve", _retrieve, max_batch=32, max_latency_ms=20)
+        monkeypatch.setattr(retriever_agent, "batchers", pool)
+        await pool.start()
+        profile = {"runtime_profile": "edge", "embedding_model": "bge-small"}
+        agents = [
+            retriever_agent.RetrieverAgent(
+                AgentSpec(
+                    name="r",
+                    system="Pump",
+                    config={**profile, "top_k": 2, "budget_tokens": 512},
+                )
+            ),
+            regulatory_agent.RegulatoryAgent(AgentSpec(name="g", system="GMP")),
+        ]
+        outs = await asyncio.gather(
+            *(agent.step({"query": "restart?"}) for agent in agents)
+        )
+        await pool.close()
+        return outs
+
+    retrieved, regulatory = asyncio.run(_run())
+    assert len(batches) == 1 and len(batches[0]) == 2
+    assert batches[0][0]["model_selection"] == {
+        "runtime_profile": "edge",
+        "embedding_model": "bge-small",
+    }
+    assert batches[0][1]["model_selection"] is None
+    assert retrieved["retrieved"] == [
+        {"text": "Pump: restart?", "rank": 1},
+        {"text": "Pump: restart?", "rank": 2},
+    ]
+    assert retrieved["retrieval"]["query_batch_size"] == 2
+    assert regulatory["regulatory_context"] == [
+        {
+            "text": "GMP: restart?",
+            "rank": n,
+            "agent_type": "regulatory",
+            "system": "GMP",
+        }
+        for n in range(1, 6)
+    ]
+    assert "retrieval" not in regulatory and "regulatory_retrieval" in regulatory
+
+
+def test_provider_retrieve_groups_payloads_by_system_and_runtime(monkeypatch):
+    pytest.importorskip("numpy")
+    import rag_llm_api_pipeline.retriever as retriever
+
+    calls = []
+
+    def _fake_retrieve_batch(system, questions, model_selection=None, top_k=None):
+        calls.append((system, list(questions), model_selection, list(top_k)))
+        return [([q], q, [{"rank": 1}], {}) for q in questions]
+
+    monkeypatch.setattr(retriever, "retrieve_batch", _fake_retrieve_batch)
+    provider = RagLLMApiProvider("config/system.yaml")
+    outs = asyncio.run(
+        provider.retrieve(
+            [
+                {"system": "A", "question": "q1", "top_k": 3},
+                {"system": "B", "question": "q2"},
+                {"system": "A", "question": "q3", "top_k": 1},
+                {"system": "A", "question": "q4", "model_selection": {"x": 1}},
+            ]
+        )
+    )
+    assert calls == [
+        ("A", ["q1", "q3"], None, [3, 1]),
+        ("B", ["q2"], None, [5]),
+        ("A", ["q4"], {"x": 1}, [5]),
+    ]
+    assert [out["chunks"] for out in outs] == [["q1"], ["q2"], ["q3"], ["q4"]]
+
+    # A system without an index fails only its own payloads.
+    def _missing_index(system, questions, model_selection=None, top_k=None):
+        if system == "Missing":
+            raise RuntimeError("index not built")
+        return _fake_retrieve_batch(system, questions, model_selection, top_k)
+
+    monkeypatch.setattr(retriever, "retrieve_batch", _missing_index)
+    outs = asyncio.run(
+        provider.retrieve(
+            [
+                {"system": "Missing", "question": "q5"},
+                {"system": "A", "question": "q6"},
+            ]
+        )
+    )
+    assert outs[0]["error"] == "RuntimeError: index not built"
+    assert outs[1]["chunks"] == ["q6"] and "error" not in outs[1]
+
+
+def test_coordinator_runs_independent_workflow_branches_concurrently():
+    from rag_orchestrator.agents.base import Agent, AgentSpec
+    from rag_orchestrator.agents.builtin.coordinator import CoordinatorAgent
+    from rag_orchestrator.agents.registry import register
+    from rag_orchestrator.runtime.workflow import Workflow, WorkflowError
+
+    seen = {}
+
+    class _Search(Agent):
+        async def start(self) -> None: ...
+        async def stop(self) -> None: ...
+        async def step(self, state):
+            await asyncio.sleep(0.1)
+            key = self.spec.config["key"]
+            return {key: [f"{self.spec.system}:{state['query']}"]}
+
+    class _Join(Agent):
+        async def start(self) -> None: ...
+        async def stop(self) -> None: ...
+        async def step(self, state):
+            seen["state"] = state
+            return {"answer": state["retrieved"] + state["regulatory_context"]}
+
+    register("test_search")(_Search)
+    register("test_join")(_Join)
+    spec = AgentSpec(
+        name="coord",
+        system="Pump",
+        config={
+            "runtime_profile": "edge",
+            "workflow": [
+                {
+                    "name": "plant",
+                    "agent": "test_search",
+                    "config": {"key": "retrieved"},
+                },
+                {
+                    "name": "regs",
+                    "agent": "test_search",
+                    "system": "GMP",
+                    "config": {"key": "regulatory_context"},
+                },
+                {"name": "join", "agent": "test_join", "after": ["plant", "regs"]},
+            ],
+        },
+    )
+    coordinator = CoordinatorAgent(spec)
+    assert coordinator.agents["regs"].spec.config == {
+        "runtime_profile": "edge",
+        "key": "regulatory_context",
+    }
+
+    out = asyncio.run(coordinator.step({"query": "restart?"}))
+    assert out["answer"] == ["Pump:restart?", "GMP:restart?"]
+    nodes = out["workflow"]["nodes"]
+    assert set(nodes) == {"plant", "regs", "join"}
+    assert out["workflow"]["total_sec"] < 0.19  # both branches slept at once
+    assert nodes["join"]["start_sec"] >= nodes["regs"]["latency_sec"]
+
+    # Concurrent branches writing the same key would silently drop one
+    # branch's output; a downstream node may still overwrite its inputs.
+    clash = Workflow.from_config(
+        [
+            {"name": "a", "agent": "test_search", "config": {"key": "retrieved"}},
+            {"name": "b", "agent": "test_search", "config": {"key": "retrieved"}},
+            {
+                "name": "c",
+                "agent": "test_search",
+                "after": ["a"],
+                "config": {"key": "retrieved"},
+            },
+        ]
+    )
+    with pytest.raises(WorkflowError, match="also written by concurrent node"):
+        asyncio.run(
+            clash.run(clash.build(AgentSpec(name="w", system="Pump")), {"query": "q"})
+        )
+    chain = Workflow.from_config(
+        [
+            {"name": "a", "agent": "test_search", "config": {"key": "retrieved"}},
+            {
+                "name": "c",
+                "agent": "test_search",
+                "after": ["a"],
+                "config": {"key": "retrieved"},
+            },
+        ]
+    )
+    state, _ = asyncio.run(
+        chain.run(chain.build(AgentSpec(name="w", system="Pump")), {"query": "q"})
+    )
+    assert state["retrieved"] == ["Pump:q"]
+
+    with pytest.raises(WorkflowError, match="cycle"):
+        Workflow.from_config(
+            [
+                {"name": "a", "agent": "test_join", "after": "b"},
+                {"name": "b", "agent": "test_join", "after": "a"},
+            ]
+        )
@@ -1,4 +1,9 @@
 import json
+import os
+
+import pytest
+
+from rag_llm_api_pipeline.core.record_writer import flush_record_writer
 
 
 def test_normal_query_is_auto_approved(app_client):
@@ -16,6 +21,7 @@ def test_normal_query_is_auto_approved(app_client):
     assert body["sources"] == ["Chunk 1"]
     assert "runtime" in body
 
+    flush_record_writer()
     audit_lines = (
         app_client["audit_log"].read_text(encoding="utf-8").strip().splitlines()
     )
@@ -23,3 +29,943 @@ def test_normal_query_is_auto_approved(app_client):
     assert audit_record["status"] == "approved"
     assert audit_record["reviewer_decision"] == "auto_approved"
     assert audit_record["final_approved_response"] == body["answer"]
+
+
+def test_identical_in_flight_queries_share_one_run(app_client, monkeypatch):
+    import threading
+    import time
+
+    import rag_llm_api_pipeline.core.controlled as controlled
+    from rag_llm_api_pipeline.core.single_flight import SingleFlight
+
+    release = threading.Event()
+    runs = []
+    fake = controlled.get_orchestrator()
+
+    class _SlowOrchestrator:
+        def run_query(self, system_name, question, model_selection=None):
+            runs.append(question)
+            release.wait(timeout=10)
+            return fake.run_query(system_name, question, model_selection)
+
+    flights = SingleFlight()
+    monkeypatch.setattr(controlled, "_query_flights", flights)
+    monkeypatch.setattr(controlled, "get_orchestrator", lambda: _SlowOrchestrator())
+
+    client = app_client["client"]
+    bodies = []
+
+    def _ask(user):
+        response = client.post(
+            "/query",
+            json={"system": "TestSystem", "question": "What is the restart sequence?"},
+            headers={"x-user-id": user},
+        )
+        bodies.append(response.json())
+
+    threads = [threading.Thread(target=_ask, args=(f"op{n}",)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    deadline = time.monotonic() + 10
+    while flights.status()["coalesced"] < 3 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    release.set()
+    for thread in threads:
+        thread.join(timeout=10)
+
+    assert runs == ["What is the restart sequence?"]
+    assert flights.status() == {"in_flight": 0, "executions": 1, "coalesced": 3}
+    assert len({body["trace_id"] for body in bodies}) == 4
+    assert {body["answer"] for body in bodies} == {
+        "The restart sequence begins by isolating the power source."
+    }
+
+    flush_record_writer()
+    records = [
+        json.loads(line)
+        for line in app_client["audit_log"].read_text(encoding="utf-8").splitlines()
+    ]
+    queries = [
+        r for r in records if r.get("trace_id") in {b["trace_id"] for b in bodies}
+    ]
+    assert len(queries) == 4
+    assert sum(1 for r in queries if r.get("coalesced")) == 3
+
+
+def test_document_search_reranks_a_wider_candidate_set(monkeypatch):
+    from collections import OrderedDict
+
+    import rag_llm_api_pipeline.reranker as reranker
+    from rag_llm_api_pipeline.core.interfaces import (
+        GenerationResult,
+        Generator,
+        RetrievalResult,
+        Retriever,
+    )
+    from rag_llm_api_pipeline.core.tools import CrossEncoderReranker, DocumentSearchTool
+
+    chunks = [f"chunk {n} about pumps" for n in range(20)]
+    chunks[13] = "restart sequence: isolate power, then restart"
+    chunks[17] = "restart the pump after isolating power"
+    requested = {}
+    predicted = []
+
+    class _Retriever(Retriever):
+        def retrieve(self, system_name, question, model_selection=None, top_k=None):
+            requested["top_k"] = top_k
+            return RetrievalResult(
+                question=question,
+                chunks=list(chunks),
+                context="\n".join(chunks),
+                chunks_meta=[{"rank": n + 1, "index": n} for n in range(20)],
+                timings={"faiss_search_sec": 0.001},
+            )
+
+    class _Generator(Generator):
+        def generate(self, question, context, model_selection=None):
+            return GenerationResult(text=context.splitlines()[0])
+
+    class _CrossEncoder:
+        def predict(self, pairs, batch_size=32):
+            predicted.append(len(pairs))
+            return [float(text.count("restart")) for _, text in pairs]
+
+    monkeypatch.setattr(reranker, "_SCORE_CACHE", OrderedDict())
+    monkeypatch.setattr(reranker, "_cross_encoder", lambda name: _CrossEncoder())
+    tool = DocumentSearchTool(_Retriever(), _Generator(), CrossEncoderReranker())
+
+    result = tool.run(system_name="TestSystem", question="How do I restart?")
+    assert requested["top_k"] == 30
+    assert result["sources"][:2] == [chunks[13], chunks[17]]
+    assert len(result["sources"]) == 5
+    assert result["answer"] == chunks[13]
+    assert result["retrieved_documents"][0]["retrieval_rank"] == 14
+    assert result["stats"]["retrieval"]["rerank_candidates"] == 20
+
+    again = tool.run(system_name="TestSystem", question="How do I restart?")
+    assert predicted == [20]  # one batched call; the second run is all cache hits
+    assert again["stats"]["retrieval"]["rerank_cache_hits"] == 20
+
+
+def test_document_search_compresses_context_to_the_token_budget(monkeypatch):
+    pytest.importorskip("numpy")
+    import rag_llm_api_pipeline.retriever as retriever
+    from rag_llm_api_pipeline.core.interfaces import (
+        GenerationResult,
+        Generator,
+        RetrievalResult,
+        Retriever,
+    )
+    from rag_llm_api_pipeline.core.tools import (
+        DocumentSearchTool,
+        EmbeddingContextCompressor,
+    )
+
+    chunks = [
+        "The valve housing is cast iron. Restart the pump after isolating power.",
+        "Valve seats are inspected yearly. Valve seals are replaced every two years.",
+        "Check the valve position indicator. Restart only once the alarm clears.",
+    ]
+    encoded = []
+
+    def _fake_embed_texts(texts, model_selection=None):
+        encoded.append(len(texts))
+        return [
+            [t.lower().count("restart"), t.lower().count("valve"), 0.1] for t in texts
+        ]
+
+    class _Retriever(Retriever):
+        def retrieve(self, system_name, question, model_selection=None, top_k=None):
+            return RetrievalResult(
+                question=question,
+                chunks=list(chunks),
+                context="\n".join(chunks),
+                chunks_meta=[{"rank": n + 1} for n in range(3)],
+            )
+
+    class _Generator(Generator):
+        def generate(self, question, context, model_selection=None):
+            return GenerationResult(text=context)
+
+    monkeypatch.setattr(retriever, "embed_texts", _fake_embed_texts)
+    tool = DocumentSearchTool(
+        _Retriever(), _Generator(), compressor=EmbeddingContextCompressor(20)
+    )
+    result = tool.run(system_name="TestSystem", question="How do I restart?")
+
+    assert encoded == [7]  # question and all six sentences in one call
+    assert result["sources"] == [
+        "Restart the pump after isolating power.",
+        "Restart only once the alarm clears.",
+    ]
+    assert [m["rank"] for m in result["retrieved_documents"]] == [1, 3]
+    stats = result["stats"]["retrieval"]["compression"]
+    assert stats["sentences_kept"] == 2 and stats["sentences_total"] == 6
+    assert stats["compressed_tokens"] <= 20
+    assert stats["compression_ratio"] < 0.5
+
+
+def test_retrieve_batch_reuses_the_resident_index_and_encodes_once(
+    tmp_path, monkeypatch
+):
+    np = pytest.importorskip("numpy")
+    faiss = pytest.importorskip("faiss")
+    import pickle
+
+    import rag_llm_api_pipeline.retriever as retriever
+
+    vocab = ("pump", "valve", "alarm")
+    encoded = []
+
+    class _Embedder:
+        def encode(self, texts, batch_size=32):
+            encoded.append(len(texts))
+            return np.asarray(
+                [[t.count(w) for w in vocab] for t in texts], dtype="float32"
+            )
+
+    config = {"retriever": {"index_dir": str(tmp_path), "top_k": 2}}
+    runtime = retriever.resolve_runtime_selection(config)
+    artifacts = retriever._artifact_paths(str(tmp_path), "Plant", runtime)
+    texts = ["pump pump", "valve valve", "alarm alarm", "pump valve"]
+
+    def _write(chunks):
+        index = faiss.IndexFlatL2(len(vocab))
+        index.add(_Embedder().encode(chunks))
+        faiss.write_index(index, artifacts["faiss"])
+        with open(artifacts["texts"], "wb") as handle:
+            pickle.dump(chunks, handle)
+
+    _write(texts)
+    reads = []
+    read_index = faiss.read_index
+    monkeypatch.setattr(retriever, "_INDEXES", {})
+    monkeypatch.setattr(retriever, "load_cached_config", lambda: config)
+    monkeypatch.setattr(retriever, "_get_embedder", lambda runtime: _Embedder())
+    monkeypatch.setattr(
+        faiss, "read_index", lambda path: reads.append(path) or read_index(path)
+    )
+
+    out = retriever.retrieve_batch(
+        "Plant", ["pump", "valve valve", "alarm"], top_k=[1, 2, 1]
+    )
+    assert encoded[-1] == 3
+    assert [chunks for chunks, *_ in out] == [
+        ["pump pump"],
+        ["valve valve", "pump valve"],
+        ["alarm alarm"],
+    ]
+    assert out[1][2][1]["distance"] > out[1][2][0]["distance"]
+
+    chunks, _, _, timings = retriever._retrieve_chunks("Plant", "valve valve")
+    assert chunks == ["valve valve", "pump valve"]
+    assert timings["query_batch_size"] == 1
+    assert len(reads) == 1  # loaded once, then served from memory
+
+    _write(["alarm only"])
+    os.utime(artifacts["faiss"], ns=(0, 10**18))
+    assert retriever._retrieve_chunks("Plant", "alarm")[0] == ["alarm only"]
+    assert len(reads) == 2
+
+
+def test_bm25_matches_part_numbers_and_alarm_codes():
+    from rag_llm_api_pipeline.lexical import BM25Index, reciprocal_rank_fusion, tokenize
+
+    assert tokenize("Replace seal P-101/B.") == [
+        "replace",
+        "seal",
+        "p-101/b",
+        "p",
+        "101",
+        "b",
+    ]
+    texts = [
+        "Alarm E42 means low suction pressure on pump P-101.",
+        "Pump P-202 requires a seal kit every two years.",
+        "General pump maintenance and lubrication schedule.",
+    ]
+    index = BM25Index.build(texts)
+    assert [i for i, _ in index.search("what is alarm E42?", 3)] == [0]
+    assert index.search("P-202 seal", 1)[0][0] == 1
+    assert [i for i, _ in index.search("pump", 3, allowed=[False, True, True])] == [
+        2,
+        1,
+    ]
+    assert [i for i, _ in reciprocal_rank_fusion([[3, 1, 2], [2, 3]])] == [3, 2, 1]
+
+
+def test_retrieve_batch_supports_lexical_and_hybrid_modes(tmp_path, monkeypatch):
+    np = pytest.importorskip("numpy")
+    faiss = pytest.importorskip("faiss")
+    import pickle
+
+    import rag_llm_api_pipeline.retriever as retriever
+
+    texts = [
+        "pump maintenance schedule",
+        "pump lubrication",
+        "alarm E42 low suction pressure",
+        "valve inspection",
+    ]
+    encoded = []
+
+    class _Embedder:
+        # A dense model that knows "pump" but not alarm codes.
+        def encode(self, texts, batch_size=32):
+            encoded.append(len(texts))
+            return np.asarray(
+                [[t.count("pump"), t.count("valve"), 0.5] for t in texts],
+                dtype="float32",
+            )
+
+    config = {"retriever": {"index_dir": str(tmp_path), "top_k": 1}}
+    runtime = retriever.resolve_runtime_selection(config)
+    artifacts = retriever._artifact_paths(str(tmp_path), "Plant", runtime)
+    index = faiss.IndexFlatL2(3)
+    index.add(_Embedder().encode(texts))
+    faiss.write_index(index, artifacts["faiss"])
+    with open(artifacts["texts"], "wb") as handle:
+        pickle.dump(texts, handle)
+    monkeypatch.setattr(retriever, "_INDEXES", {})
+    monkeypatch.setattr(retriever, "load_cached_config", lambda: config)
+    monkeypatch.setattr(retriever, "_get_embedder", lambda runtime: _Embedder())
+
+    question = "pump alarm E42"
+    vector = retriever._retrieve_chunks("Plant", question, mode="vector")
+    assert vector[0] != ["alarm E42 low suction pressure"]
+
+    encoded.clear()
+    chunks, _, meta, timings = retriever._retrieve_chunks(
+        "Plant", question, mode="lexical"
+    )
+    assert chunks == ["alarm E42 low suction pressure"]
+    assert encoded == []  # lexical mode never touches the embedder
+    assert timings["search_mode"] == "lexical" and "lexical_search_sec" in timings
+    assert meta[0]["bm25_score"] > 0
+
+    chunks, _, meta, timings = retriever._retrieve_chunks(
+        "Plant", question, top_k=2, mode="hybrid"
+    )
+    assert "alarm E42 low suction pressure" in chunks
+    assert {"faiss_search_sec", "lexical_search_sec", "fusion_sec"} <= set(timings)
+    assert all("rrf_score" in item for item in meta)
+
+    with pytest.raises(ValueError, match="search mode"):
+        retriever._retrieve_chunks("Plant", question, mode="fuzzy")
+
+
+def test_chunk_columns_filters_by_value_list_and_range():
+    pytest.importorskip("numpy")
+    from rag_llm_api_pipeline.chunk_meta import ChunkColumns, FilterError
+
+    rows = [
+        {
+            "file": "pump.pdf",
+            "page": 1,
+            "doc_type": "manual",
+            "revision_date": "2023-02-01",
+        },
+        {
+            "file": "pump.pdf",
+            "page": 2,
+            "doc_type": "manual",
+            "revision_date": "2023-02-01",
+        },
+        {"file": "sop.txt", "doc_type": "sop", "revision_date": "2024-06-30"},
+        {
+            "file": "gmp.pdf",
+            "page": 7,
+            "doc_type": "regulation",
+            "revision_date": "2025-01-15",
+        },
+    ]
+    columns = ChunkColumns.from_rows(rows)
+    assert columns.row(2) == {
+        "file": "sop.txt",
+        "doc_type": "sop",
+        "revision_date": "2024-06-30",
+    }
+
+    def ids(filters):
+        return columns.mask(filters).nonzero()[0].tolist()
+
+    assert ids({"doc_type": "manual"}) == [0, 1]
+    assert ids({"doc_type": ["sop", "regulation"]}) == [2, 3]
+    assert ids({"page": {"gte": 2}}) == [1, 3]
+    assert ids({"revision_date": {"gte": "2024-01-01"}, "doc_type": {"ne": "sop"}}) == [
+        3
+    ]
+    assert ids({"file": "missing.pdf"}) == []
+    with pytest.raises(FilterError):
+        columns.mask({"author": "x"})
+
+
+def test_filtered_search_runs_inside_faiss_and_bm25(tmp_path, monkeypatch):
+    np = pytest.importorskip("numpy")
+    faiss = pytest.importorskip("faiss")
+    import pickle
+
+    import rag_llm_api_pipeline.retriever as retriever
+    from rag_llm_api_pipeline.chunk_meta import ChunkColumns
+
+    texts = [f"pump note {n}" for n in range(200)]
+
+    class _Embedder:
+        def encode(self, texts, batch_size=32):
+            return np.asarray(
+                [
+                    [float(t.split()[-1]) if t[-1].isdigit() else 0.0, 1.0]
+                    for t in texts
+                ],
+                dtype="float32",
+            )
+
+    config = {"retriever": {"index_dir": str(tmp_path), "top_k": 3}}
+    runtime = retriever.resolve_runtime_selection(config)
+    artifacts = retriever._artifact_paths(str(tmp_path), "Plant", runtime)
+    index = faiss.IndexFlatL2(2)
+    index.add(_Embedder().encode(texts))
+    faiss.write_index(index, artifacts["faiss"])
+    with open(artifacts["texts"], "wb") as handle:
+        pickle.dump(texts, handle)
+    rows = [
+        {
+            "file": f"doc{n % 4}.pdf",
+            "page": n // 4 + 1,
+            "doc_type": "manual",
+            "pool": "Plant",
+        }
+        for n in range(200)
+    ]
+    with open(artifacts["columns"], "wb") as handle:
+        pickle.dump(ChunkColumns.from_rows(rows), handle)
+    monkeypatch.setattr(retriever, "_INDEXES", {})
+    monkeypatch.setattr(retriever, "load_cached_config", lambda: config)
+    monkeypatch.setattr(retriever, "_get_embedder", lambda runtime: _Embedder())
+
+    filters = {"file": "doc3.pdf", "page": {"lte": 10}}
+    chunks, _, meta, timings = retriever._retrieve_chunks(
+        "Plant", "note 0", filters=filters
+    )
+    # Unfiltered, the nearest would be notes 0, 1, 2; filtered, only doc3 pages 1-10.
+    assert chunks == ["pump note 3", "pump note 7", "pump note 11"]
+    assert meta[0]["file"] == "doc3.pdf" and meta[0]["page"] == 1
+    assert timings["filter_matches"] == 10
+
+    chunks, *_ = retriever._retrieve_chunks(
+        "Plant", "pump note", top_k=50, mode="lexical", filters=filters
+    )
+    assert len(chunks) == 10
+    assert all(int(c.split()[-1]) % 4 == 3 for c in chunks)
+
+
+def test_cold_index_load_does_not_block_other_systems(tmp_path, monkeypatch):
+    pytest.importorskip("numpy")
+    import pickle
+    import threading
+
+    import rag_llm_api_pipeline.retriever as retriever
+
+    reading, release = threading.Event(), threading.Event()
+
+    class _Faiss:
+        @staticmethod
+        def read_index(path):
+            if "Slow" in path:
+                reading.set()
+                release.wait(5)
+            return path
+
+    monkeypatch.setattr(retriever, "_INDEXES", {})
+    monkeypatch.setattr(retriever, "_faiss", lambda: _Faiss)
+    paths = {}
+    for system in ("Slow", "Fast"):
+        paths[system] = retriever._artifact_paths(
+            str(tmp_path), system, {"embedding_model": "minilm"}
+        )
+        with open(paths[system]["texts"], "wb") as handle:
+            pickle.dump([system], handle)
+
+    slow = threading.Thread(target=retriever._load_index, args=(paths["Slow"],))
+    slow.start()
+    try:
+        assert reading.wait(5)
+        assert retriever._load_index(paths["Fast"]).texts == ["Fast"]
+        assert slow.is_alive()
+    finally:
+        release.set()
+        slow.join()
+    assert retriever._load_index(paths["Slow"]).texts == ["Slow"]
+
+
+def test_federated_search_shares_the_query_embedding_and_tags_sources(
+    tmp_path, monkeypatch
+):
+    np = pytest.importorskip("numpy")
+    faiss = pytest.importorskip("faiss")
+    import pickle
+
+    import rag_llm_api_pipeline.retriever as retriever
+
+    encoded = []
+
+    class _Embedder:
+        def encode(self, texts, batch_size=32):
+            encoded.append(len(texts))
+            return np.asarray(
+                [[t.count("pump"), t.count("gmp"), 1.0] for t in texts],
+                dtype="float32",
+            )
+
+    config = {"retriever": {"index_dir": str(tmp_path), "top_k": 3}}
+    runtime = retriever.resolve_runtime_selection(config)
+    corpora = {
+        "Plant": ["pump pump seal", "pump startup", "conveyor belt"],
+        "GMP": ["gmp pump cleaning", "gmp records", "gmp gmp audit"],
+    }
+    for system, texts in corpora.items():
+        artifacts = retriever._artifact_paths(str(tmp_path), system, runtime)
+        index = faiss.IndexFlatL2(3)
+        index.add(_Embedder().encode(texts))
+        faiss.write_index(index, artifacts["faiss"])
+        with open(artifacts["texts"], "wb") as handle:
+            pickle.dump(texts, handle)
+    monkeypatch.setattr(retriever, "_INDEXES", {})
+    monkeypatch.setattr(retriever, "load_cached_config", lambda: config)
+    monkeypatch.setattr(retriever, "_get_embedder", lambda runtime: _Embedder())
+
+    encoded.clear()
+    chunks, _, meta, timings = retriever.federated_retrieve(
+        ["Plant", "GMP", "Missing"], "gmp pump"
+    )
+    assert encoded == [1]  # one query embedding shared by both indexes
+    assert timings["federated"] and timings["shared_query_embeddings"] == 1
+    assert "error" in timings["systems"]["Missing"]
+    assert len(chunks) == 3
+    assert {item["source_system"] for item in meta} == {"Plant", "GMP"}
+    assert all(0.0 <= item["score"] <= 1.0 for item in meta)
+    assert [item["rank"] for item in meta] == [1, 2, 3]
+    # Same model and normalization: hits merge on raw distance, so GMP's
+    # exact match outranks Plant's best hit and GMP's runner-up ties with it.
+    assert timings["merged_on"] == "distance"
+    assert chunks == ["gmp pump cleaning", "pump startup", "gmp records"]
+    assert [item["distance"] for item in meta] == [0.0, 1.0, 1.0]
+
+    # Indexes built with different normalization are not in one metric
+    # space; each source's scores are normalized before merging instead.
+    gmp = retriever._artifact_paths(str(tmp_path), "GMP", runtime)
+    with open(gmp["normflag"], "w", encoding="utf-8") as handle:
+        handle.write("1")
+    chunks, _, meta, timings = retriever.federated_retrieve(
+        ["Plant", "GMP"], "gmp pump"
+    )
+    assert timings["merged_on"] == "normalized"
+    assert set(chunks[:2]) == {"pump startup", "gmp pump cleaning"}
+    assert [item["source_rank"] for item in meta[:2]] == [1, 1]
+
+
+def test_sharded_scatter_gather_matches_a_single_index(tmp_path):
+    np = pytest.importorskip("numpy")
+    faiss = pytest.importorskip("faiss")
+    import threading
+
+    from rag_llm_api_pipeline import shards
+
+    rng = np.random.default_rng(7)
+    vectors = rng.random((300, 8), dtype="float32")
+    documents = [f"doc{n // 10}.pdf" for n in range(300)]
+    manifest_path = str(tmp_path / "Plant--minilm.shards.json")
+    manifest = shards.write_shards(
+        faiss, vectors, documents, 3, manifest_path, system="Plant"
+    )
+    assert manifest["ntotal"] == 300
+    assert sum(item["vectors"] for item in manifest["files"]) == 300
+    assert sum(item["documents"] for item in manifest["files"]) == 30
+
+    # Socket servers on loopback threads stand in for shard hosts.
+    servers = [
+        shards.ShardServer(path) for path in shards.shard_paths(manifest_path, manifest)
+    ]
+    for server in servers:
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+    index = shards.open_sharded_index(
+        manifest_path,
+        endpoints=[f"{host}:{port}" for host, port in (s.address for s in servers)],
+    )
+    try:
+        flat = faiss.IndexFlatL2(8)
+        flat.add(vectors)
+        queries = rng.random((4, 8), dtype="float32")
+        expected_d, expected_i = flat.search(queries, 10)
+        distances, ids = index.search(queries, 10)
+        assert ids.tolist() == expected_i.tolist()
+        assert np.allclose(distances, expected_d, rtol=1e-5)
+
+        allowed = np.zeros(300, dtype=bool)
+        allowed[[5, 50, 150, 299]] = True
+        _, ids = index.search(queries, 6, allowed=allowed)
+        assert sorted(ids[0][:4].tolist()) == [5, 50, 150, 299]
+        assert ids[0][4:].tolist() == [-1, -1]
+
+        # A rebuild with the same vector counts is caught while the servers
+        # still serve the old files.
+        shards.write_shards(
+            faiss, vectors[::-1].copy(), documents, 3, manifest_path, system="Plant"
+        )
+        with pytest.raises(RuntimeError, match="does not match the manifest"):
+            shards.open_sharded_index(
+                manifest_path,
+                endpoints=[f"{h}:{p}" for h, p in (s.address for s in servers)],
+            )
+    finally:
+        index.close()
+        for server in servers:
+            server.shutdown()
+            server.server_close()
+
+
+def test_retrieve_batch_searches_shards_in_worker_processes(tmp_path, monkeypatch):
+    np = pytest.importorskip("numpy")
+    faiss = pytest.importorskip("faiss")
+    import pickle
+
+    import rag_llm_api_pipeline.retriever as retriever
+    from rag_llm_api_pipeline import shards
+
+    texts = [f"pump note {n}" for n in range(40)]
+
+    class _Embedder:
+        def encode(self, texts, batch_size=32):
+            return np.asarray(
+                [[float(t.split()[-1]), 1.0] for t in texts], dtype="float32"
+            )
+
+    config = {"retriever": {"index_dir": str(tmp_path), "top_k": 3}}
+    runtime = retriever.resolve_runtime_selection(config)
+    artifacts = retriever._artifact_paths(str(tmp_path), "Plant", runtime)
+    shards.write_shards(
+        faiss,
+        _Embedder().encode(texts),
+        [f"doc{n % 5}.txt" for n in range(40)],
+        2,
+        artifacts["shards"],
+        system="Plant",
+    )
+    with open(artifacts["texts"], "wb") as handle:
+        pickle.dump(texts, handle)
+    monkeypatch.setattr(retriever, "_INDEXES", {})
+    monkeypatch.setattr(retriever, "load_cached_config", lambda: config)
+    monkeypatch.setattr(retriever, "_get_embedder", lambda runtime: _Embedder())
+
+    try:
+        chunks, _, meta, timings = retriever._retrieve_chunks("Plant", "note 21")
+        assert chunks == ["pump note 21", "pump note 20", "pump note 22"]
+        assert timings["shards"] == 2
+        loaded = retriever._INDEXES[artifacts["pointer"]]
+        assert all(p.is_alive() for p in loaded.index.workers.processes)
+    finally:
+        for loaded in retriever._INDEXES.values():
+            loaded.index.close()
+
+
+def test_build_index_publishes_immutable_versions(tmp_path, monkeypatch):
+    np = pytest.importorskip("numpy")
+    pytest.importorskip("faiss")
+
+    import rag_llm_api_pipeline.retriever as retriever
+
+    class _Embedder:
+        def encode(self, texts, batch_size=32):
+            return np.asarray(
+                [[float(len(t)), float(t.count("v2"))] for t in texts], dtype="float32"
+            )
+
+    def _write_docs(version):
+        (tmp_path / "pump.txt").write_text(f"pump seal {version}", encoding="utf-8")
+        (tmp_path / "valve.txt").write_text(f"valve {version}", encoding="utf-8")
+
+    config = {
+        "settings": {"data_dir": str(tmp_path)},
+        "loader": {"parse_cache_dir": str(tmp_path / "parse_cache")},
+        "retriever": {
+            "index_dir": str(tmp_path / "indices"),
+            "embedding_cache_dir": str(tmp_path / "embedding_cache"),
+            "top_k": 1,
+            "publish": {"keep_versions": 2, "grace_sec": 0},
+        },
+    }
+    _write_docs("v1")
+    monkeypatch.setattr(retriever, "_INDEXES", {})
+    monkeypatch.setattr(retriever, "load_config", lambda: config)
+    monkeypatch.setattr(retriever, "load_cached_config", lambda: config)
+    monkeypatch.setattr(retriever, "_get_embedder", lambda runtime: _Embedder())
+    monkeypatch.setattr(
+        retriever,
+        "find_asset",
+        lambda name, cfg: {"name": name, "docs": ["pump.txt", "valve.txt"]},
+    )
+
+    first = retriever.build_index("Plant")
+    runtime = retriever.resolve_runtime_selection(config)
+    artifacts = retriever._artifact_paths(
+        config["retriever"]["index_dir"], "Plant", runtime
+    )
+    assert artifacts["build_id"] == first["build_id"]
+    in_flight = retriever._load_index(artifacts)
+
+    _write_docs("v2")
+    second = retriever.build_index("Plant")
+    assert second["previous_build_id"] == first["build_id"]
+    chunks, _, _, timings = retriever._retrieve_chunks("Plant", "pump seal v2")
+    assert chunks == ["pump seal v2"]
+    assert timings["index_build_id"] == second["build_id"]
+    # A reader that resolved the old build keeps a consistent view of it.
+    assert in_flight.texts == ["pump seal v1", "valve v1"]
+    assert os.path.exists(artifacts["texts"])
+
+    third = retriever.build_index("Plant")
+    assert third["parse_cache_hits"] == 2 and second["parse_cache_hits"] == 0
+    assert third["embedding_cache"]["hit_rate"] == 1.0
+    assert third["embedding_cache"]["encoded"] == 0
+    from rag_llm_api_pipeline.index_versions import list_builds
+
+    base = f"Plant--{artifacts['variant']}"
+    kept = list_builds(config["retriever"]["index_dir"], base)
+    assert kept == sorted([second["build_id"], third["build_id"]])
+
+
+def test_prune_spares_unpublished_and_recently_retired_builds(tmp_path):
+    import time
+
+    from rag_llm_api_pipeline import index_versions as iv
+
+    index_dir, base = str(tmp_path), "Plant--minilm"
+    builds = [iv.new_build_id() for _ in range(4)]
+    for build_id in builds[:3]:
+        iv.begin_build(index_dir, base, build_id)
+        iv.publish(index_dir, base, build_id, {}, keep=2, grace_sec=60)
+    # Two quick rebuilds: the first build was retired seconds ago, so a reader
+    # that resolved it before the swap can still load it.
+    assert iv.list_builds(index_dir, base) == builds[:3]
+
+    # A concurrent build still being written is never pruned.
+    writing = iv.begin_build(index_dir, base, builds[3])
+    past = time.time() - 120
+    for build_id in builds:
+        os.utime(iv.version_dir(index_dir, base, build_id), (past, past))
+    assert iv.prune(index_dir, base, keep=2, grace_sec=60) == [builds[0]]
+    assert iv.list_builds(index_dir, base) == builds[1:]
+    assert os.path.exists(os.path.join(writing, iv.BUILDING_MARKER))
+    assert not os.path.exists(
+        os.path.join(iv.version_dir(index_dir, base, builds[2]), iv.BUILDING_MARKER)
+    )
+
+    with pytest.raises(ValueError):
+        iv.prune(index_dir, base, keep=1)
+    with pytest.raises(ValueError):
+        iv.publish_settings({"publish": {"keep_versions": 1}})
+    assert iv.read_pointer(index_dir, base)["build_id"] == builds[2]
+
+
+def test_embedding_cache_encodes_each_distinct_text_once(tmp_path):
+    np = pytest.importorskip("numpy")
+    from rag_llm_api_pipeline.embedding_cache import EmbeddingCache, encode_with_cache
+
+    encoded = []
+
+    def _encode(batch):
+        encoded.extend(batch)
+        return np.asarray([[len(t), t.count("a")] for t in batch], dtype="float32")
+
+    boilerplate = "All deviations shall be recorded and investigated."
+    texts = [boilerplate, "Pool A specific clause.", boilerplate]
+    cache = EmbeddingCache(
+        str(tmp_path), "sentence-transformers/all-MiniLM-L6-v2", False
+    )
+    vectors, stats = encode_with_cache(_encode, texts, cache, batch_size=1)
+    assert encoded == [boilerplate, "Pool A specific clause."]
+    assert stats["duplicates_in_build"] == 1 and stats["hit_rate"] == 0.0
+    assert vectors[0].tolist() == vectors[2].tolist()
+
+    # A second pool sharing the boilerplate reopens the cache from disk.
+    encoded.clear()
+    reopened = EmbeddingCache(
+        str(tmp_path), "sentence-transformers/all-MiniLM-L6-v2", False
+    )
+    assert len(reopened) == 2
+    vectors, stats = encode_with_cache(
+        _encode, [boilerplate, "Pool B clause."], reopened
+    )
+    assert encoded == ["Pool B clause."]
+    assert stats["cache_hits"] == 1 and stats["hit_rate"] == 0.5
+    assert vectors[0].tolist() == [float(len(boilerplate)), 4.0]
+
+    other = EmbeddingCache(
+        str(tmp_path), "sentence-transformers/all-MiniLM-L6-v2", True
+    )
+    assert len(other) == 0  # normalized vectors are cached separately
+
+
+def test_embedding_cache_survives_torn_appends_and_other_writers(tmp_path):
+    np = pytest.importorskip("numpy")
+    from rag_llm_api_pipeline.embedding_cache import EmbeddingCache, text_key
+
+    def _open():
+        return EmbeddingCache(str(tmp_path), "model", False)
+
+    cache = _open()
+    cache.put([text_key("a")], np.asarray([[1.0, 1.0]], dtype="float32"))
+    # A writer crashed after appending a vector but before its key.
+    with open(cache._vectors_path, "ab") as handle:
+        handle.write(np.asarray([[9.0, 9.0]], dtype="float32").tobytes())
+
+    cache = _open()
+    cache.put([text_key("b")], np.asarray([[2.0, 2.0]], dtype="float32"))
+    assert _open().get([text_key("b")])[0].tolist() == [2.0, 2.0]
+
+    # Two handles stand in for two processes appending to one cache.
+    first, second = _open(), _open()
+    first.put([text_key("c")], np.asarray([[3.0, 3.0]], dtype="float32"))
+    second.put([text_key("d")], np.asarray([[4.0, 4.0]], dtype="float32"))
+    assert second.get([text_key("c")])[0].tolist() == [3.0, 3.0]
+
+    reopened = _open()
+    assert len(reopened) == 4
+    assert [v.tolist() for v in reopened.get([text_key(t) for t in "abcd"])] == [
+        [1.0, 1.0],
+        [2.0, 2.0],
+        [3.0, 3.0],
+        [4.0, 4.0],
+    ]
+
+    # Appends extend the key index in place instead of copying it per batch,
+    # so a reader holding an older (shorter) vector view sees new rows as
+    # misses rather than reading past its view.
+    rows = second._rows
+    stale_vectors = second._vectors
+    second.put([text_key("e")], np.asarray([[5.0, 5.0]], dtype="float32"))
+    assert second._rows is rows and text_key("e") in rows
+    second._vectors = stale_vectors
+    assert second.get([text_key("e"), text_key("d")])[0] is None
+
+
+def test_dedup_collapses_near_duplicates_and_keeps_their_sources():
+    pytest.importorskip("numpy")
+    from rag_llm_api_pipeline.chunk_meta import ChunkColumns
+    from rag_llm_api_pipeline.dedup import dedupe_chunks
+
+    clause = (
+        "Before each production batch the operator shall verify that the filling "
+        "line has been cleaned sanitized and released by quality assurance and "
+        "shall record the verification in the batch record together with the "
+        "equipment identifier the date and the signature of the second person"
+    )
+    texts = [
+        clause,
+        "Valve V-12 must be inspected every six months for seat leakage.",
+        clause.replace("six", "6").replace("second person", "second  person"),
+        clause.replace("operator", "technician"),
+    ]
+    metas = [{"file": f} for f in ("sop-2023.pdf", "pm.txt", "sop-2024.pdf", "wi.pdf")]
+    rows = [
+        {"file": "sop-2023.pdf", "page": 4},
+        {"file": "pm.txt"},
+        {"file": "sop-2024.pdf", "page": 5},
+        {"file": "wi.pdf", "page": 1},
+    ]
+    kept, kept_metas, kept_rows, stats = dedupe_chunks(texts, metas, rows)
+    assert kept == texts[:2]
+    assert kept_rows == [{**rows[0], "merged": [rows[2], rows[3]]}, rows[1]]
+    assert kept_metas[0]["sources"] == [
+        {"file": "sop-2023.pdf", "page": 4},
+        {"file": "sop-2024.pdf", "page": 5},
+        {"file": "wi.pdf", "page": 1},
+    ]
+    assert "sources" not in kept_metas[1]
+    assert stats["removed"] == 2 and stats["dedup_ratio"] == 0.5
+    assert stats["duplicate_groups"] == 1
+
+    # Filters on a merged-away document still find the chunk standing for it.
+    columns = ChunkColumns.from_rows(kept_rows)
+    assert columns.mask({"file": "wi.pdf"}).tolist() == [True, False]
+    assert columns.mask({"file": "sop-2024.pdf", "page": 4}).tolist() == [
+        False,
+        False,
+    ]
+    assert columns.row(0) == rows[0]
+
+
+def test_dedup_does_not_chain_similarity_transitively():
+    pytest.importorskip("numpy")
+    from rag_llm_api_pipeline.dedup import near_duplicate_groups
+
+    words = [f"w{n}" for n in range(60)]
+    second = list(words)
+    second[10] = "changed"
+    third = list(second)
+    third[45] = "changed"
+    texts = [" ".join(words), " ".join(second), " ".join(third)]
+    # Estimated similarities: first~second 0.92, second~third 0.89, but
+    # first~third only 0.81.
+    groups = near_duplicate_groups(texts, threshold=0.85)
+    assert groups[0] != groups[2]
+
+
+def test_build_index_stores_quantized_vectors_per_system(tmp_path, monkeypatch):
+    np = pytest.importorskip("numpy")
+    pytest.importorskip("faiss")
+
+    import rag_llm_api_pipeline.core.index_admin as index_admin
+    import rag_llm_api_pipeline.retriever as retriever
+
+    words = ["pump", "valve", "seal", "motor", "filter", "gasket", "bearing", "hose"]
+
+    class _Embedder:
+        def encode(self, texts, batch_size=32):
+            return np.asarray(
+                [[float(t.count(w)) for w in words] for t in texts], dtype="float32"
+            )
+
+    for i, word in enumerate(words):
+        (tmp_path / f"{word}.txt").write_text(f"{word} {words[i - 1]}", "utf-8")
+    config = {
+        "settings": {"data_dir": str(tmp_path)},
+        "loader": {"parse_cache_dir": str(tmp_path / "parse_cache")},
+        "retriever": {
+            "index_dir": str(tmp_path / "indices"),
+            "embedding_cache_dir": str(tmp_path / "embedding_cache"),
+            "top_k": 1,
+            "vector_storage": {"default": "float32", "systems": {"Large": "sq8"}},
+        },
+    }
+    asset = {"docs": [f"{word}.txt" for word in words]}
+    monkeypatch.setattr(retriever, "_INDEXES", {})
+    monkeypatch.setattr(retriever, "load_config", lambda: config)
+    monkeypatch.setattr(retriever, "load_cached_config", lambda: config)
+    monkeypatch.setattr(retriever, "_get_embedder", lambda runtime: _Embedder())
+    monkeypatch.setattr(
+        retriever, "find_asset", lambda name, cfg: {"name": name, **asset}
+    )
+    monkeypatch.setattr(
+        index_admin, "find_asset", lambda name, cfg: {"name": name, **asset}
+    )
+
+    small = retriever.build_index("Small")
+    large = retriever.build_index("Large")
+    assert small["vector_storage"]["storage"] == "float32"
+    assert small["vector_storage"]["recall_vs_float32"] is None
+    report = large["vector_storage"]
+    assert report["storage"] == "sq8" and report["bytes_per_vector"] == 8
+    assert report["memory_bytes"] * 4 == report["float32_memory_bytes"]
+    assert report["recall_vs_float32"]["queries"] == 4
+    assert report["recall_vs_float32"]["recall"] == 1.0
+
+    chunks, _, _, _ = retriever._retrieve_chunks("Large", "gasket filter")
+    assert chunks == ["gasket filter"]
+    status = index_admin.get_index_status("Large", config)
+    assert (status["vector_storage"], status["bytes_per_vector"]) == ("sq8", 8)
+    assert index_admin.get_index_status("Small", config)["bytes_per_vector"] == 32
+
+    config["retriever"]["vector_storage"] = "int4"
+    with pytest.raises(ValueError):
+        retriever.build_index("Small")